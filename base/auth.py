@@ -0,0 +1,96 @@
+# base/auth.py
+"""
+โหลดผู้ใช้ + Profile ในคำสั่งเดียว
+
+- ProfileModelBackend.get_user() ใช้ select_related("profile")
+  request.user.profile (navbar, ตรวจสิทธิ์) จึงไม่ต้อง SELECT base_profile แยก
+- get_user_role(request) อ่าน role จาก Profile ที่โหลดมาพร้อมผู้ใช้ในทุก request
+  ไม่จำไว้ใน session/cache: role ที่ถูกเปลี่ยน (เช่น ถอดครูฝึก) มีผลทันทีทุก worker
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import resolve_url
+
+PROFILE_BACKEND = "base.auth.ProfileModelBackend"
+LEGACY_BACKEND = "django.contrib.auth.backends.ModelBackend"
+
+
+class ProfileModelBackend(ModelBackend):
+    """ModelBackend ที่ดึง Profile มาพร้อม User (JOIN เดียว)"""
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related("profile").get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class SessionBackendMiddleware:
+    """
+    session ที่ล็อกอินไว้ก่อนเปลี่ยนมาใช้ ProfileModelBackend ยังอ้าง ModelBackend เดิม
+    ย้ายให้ใช้ backend ใหม่ (ครั้งเดียวต่อ session) แทนที่จะบังคับทุกคนล็อกอินใหม่
+    ต้องอยู่ต่อจาก SessionMiddleware และก่อนมีการอ่าน request.user
+
+    รองรับทั้ง sync และ async: ถ้ามี middleware แบบ sync อย่างเดียวอยู่ในสาย ASGI
+    Django ต้องสลับไปรันทั้งสายใน thread ทุก request (async view จะไม่ได้ประโยชน์)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _has_session_cookie(request):
+        # ไม่มี cookie = ไม่มี session ให้ย้าย (ไม่ต้องโหลด session จากฐานข้อมูล)
+        session = getattr(request, "session", None)
+        return session is not None and session.session_key is not None
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if self._has_session_cookie(request) and request.session.get(BACKEND_SESSION_KEY) == LEGACY_BACKEND:
+            request.session[BACKEND_SESSION_KEY] = PROFILE_BACKEND
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self._has_session_cookie(request) and await request.session.aget(BACKEND_SESSION_KEY) == LEGACY_BACKEND:
+            await request.session.aset(BACKEND_SESSION_KEY, PROFILE_BACKEND)
+        return await self.get_response(request)
+
+
+# ===== role ของผู้ใช้ =====
+def get_user_role(request):
+    """role ของผู้ใช้ที่ล็อกอิน ('' ถ้ายังไม่ล็อกอิน/ไม่มี Profile)"""
+    user = request.user
+    if not user.is_authenticated:
+        return ""
+    # Profile ถูก JOIN มากับ user แล้ว (ProfileModelBackend) จึงไม่มี query เพิ่ม
+    profile = getattr(user, "profile", None)
+    return profile.role if profile else ""
+
+
+def role_required(role, login_url=None):
+    """decorator: อนุญาตเฉพาะผู้ใช้ที่ role ตรง (ไม่ตรง -> ไปหน้า login เหมือน user_passes_test)"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if get_user_role(request) == role:
+                return view_func(request, *args, **kwargs)
+            return redirect_to_login(
+                request.get_full_path(), resolve_url(login_url or settings.LOGIN_URL)
+            )
+        return login_required(_wrapped)
+    return decorator
@@ -0,0 +1,120 @@
+# base/db/mysql_pool/base.py
+"""
+backend MySQL แบบมี connection pool ต่อ process (ใช้แทน django.db.backends.mysql ได้ทันที)
+
+    DATABASES["default"] = {
+        "ENGINE": "base.db.mysql_pool",
+        ...,
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {"charset": "utf8mb4", "pool": {"size": 5, "max_overflow": 5, "timeout": 10}},
+    }
+
+- ตัวเลือกของ pool อยู่ใน OPTIONS["pool"] (ดู base/dbpool.ConnectionPool) ไม่ใส่ = ไม่ใช้ pool
+- Django ยัง "ปิด" connection ตอนจบ request ตามปกติ (CONN_MAX_AGE = 0) แต่การปิดคือคืนเข้า pool
+  request ถัดไปจึงไม่ต้อง TCP connect + auth handshake ใหม่
+- connection ที่ใช้ซ้ำข้าม SET SQL_AUTO_IS_NULL / isolation level / autocommit ที่ตั้งไว้แล้ว
+  (ค่าระดับ session ยังอยู่) ไม่เสีย round trip ทุกครั้งที่ยืม
+- connection ที่ถูกปิดกลาง transaction หรือใช้งานไม่ได้ (error) ถูกทิ้ง ไม่คืนเข้า pool
+- pool ผูกกับ pid: process ที่ fork ออกมา (gunicorn --preload) สร้าง pool ของตัวเอง
+- metrics: pool_stats() / หน้า Authen:db_pool_metrics (staff)
+"""
+import os
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.mysql import base as mysql_base
+
+from base.dbpool import ConnectionPool
+
+_INITIALIZED = "_tmd_pool_initialized"
+
+
+def _autocommit_on(conn):
+    try:
+        return conn.get_autocommit()
+    except Exception:
+        return False
+
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+    _connection_pools = {}  # alias -> (pid, ConnectionPool)
+    _inherited_pools = []   # pool ของ process แม่หลัง fork: เก็บ reference ไว้ ไม่ให้ GC ปิด socket ที่แม่ยังใช้
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        options = self.settings_dict["OPTIONS"].get("pool")
+        if not options:
+            return None
+        pid = os.getpid()
+        current = self._connection_pools.get(self.alias)
+        if current is not None and current[0] == pid:
+            return current[1]
+        with self._pools_lock:
+            current = self._connection_pools.get(self.alias)
+            if current is None or current[0] != pid:
+                if current is not None:
+                    # connection ที่สืบทอดมาจาก process แม่ห้ามใช้ร่วมกัน และห้ามปิด (socket เดียวกับของแม่)
+                    self._inherited_pools.append(current[1])
+                current = (pid, self._create_pool({} if options is True else dict(options)))
+                self._connection_pools[self.alias] = current
+        return current[1]
+
+    def _create_pool(self, options):
+        if self.settings_dict.get("CONN_MAX_AGE", 0) != 0:
+            raise ImproperlyConfigured("ใช้ pool แล้วต้องตั้ง CONN_MAX_AGE = 0 (pool จัดการอายุ connection เอง)")
+        params = self.get_connection_params()
+        return ConnectionPool(
+            lambda: super(DatabaseWrapper, self).get_new_connection(params),
+            ping=lambda conn: conn.ping(),
+            **options,
+        )
+
+    def close_pool(self):
+        with self._pools_lock:
+            current = self._connection_pools.pop(self.alias, None)
+        if current is not None and current[0] == os.getpid():
+            current[1].close()
+
+    def pool_stats(self):
+        pool = self.pool
+        return pool.stats() if pool is not None else None
+
+    # ===== วงจรของ connection =====
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pool", None)  # OPTIONS ถูกส่งต่อให้ MySQLdb.connect ทั้งหมด
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        return pool.checkout()
+
+    def _set_autocommit(self, autocommit):
+        # get_autocommit() อ่านสถานะจาก client ไม่ต้องถาม server
+        if self.pool is not None and self.connection.get_autocommit() == autocommit:
+            return
+        super()._set_autocommit(autocommit)
+
+    def init_connection_state(self):
+        if self.pool is not None and getattr(self.connection, _INITIALIZED, False):
+            return
+        super().init_connection_state()
+        if self.pool is not None:
+            setattr(self.connection, _INITIALIZED, True)
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        conn, self.connection = self.connection, None
+        # ปิดกลาง transaction / มี error / ปิด autocommit ค้างไว้ -> ทิ้ง ไม่ให้ request ถัดไปรับสถานะค้าง
+        dirty = self.in_atomic_block or self.needs_rollback or self.errors_occurred
+        pool.checkin(conn, discard=dirty or not _autocommit_on(conn))
+
+    def close_if_health_check_failed(self):
+        if self.pool is not None:
+            return  # pool ping (pre_ping) ก่อนส่ง connection ให้แล้ว
+        return super().close_if_health_check_failed()
@@ -0,0 +1,204 @@
+# base/dbpool.py
+"""
+pool ของ connection ฐานข้อมูลต่อ process (thread-safe) ใช้โดย backend base/db/mysql_pool
+
+- เปิดค้างไว้ไม่เกิน size + max_overflow; connection ส่วนเกิน (overflow) ถูกปิดเมื่อคืน
+  ถ้า idle ครบ size แล้ว เมื่อเต็มจะรอได้ไม่เกิน timeout วินาทีแล้ว PoolTimeout
+- max_lifetime: connection ที่เปิดนานกว่านี้ถูกปิดตอนคืน/ตอนยืม (กระจายการต่อใหม่ ไม่ให้ถือ
+  connection เก่าข้าม failover / การเปลี่ยนรหัสผ่าน)
+- recycle: connection ที่ idle นานกว่านี้ถูกปิดก่อนยืม (ต้องน้อยกว่า wait_timeout ของ MySQL
+  ที่จะตัด connection ที่เงียบทิ้งเอง)
+- pre_ping: ping ก่อนส่งให้ผู้ยืม ตัวที่ตายแล้วถูกทิ้งแล้วยืม/เปิดตัวใหม่แทน
+- idle ถูกหยิบแบบ LIFO: ตัวที่เพิ่งใช้ (ยังอุ่น) ถูกใช้ซ้ำ ตัวที่เหลือค่อยๆ หมดอายุด้วย recycle
+- stats(): ขนาด pool, จำนวนที่ถูกยืม, latency ของการยืม (p50/p95/max) และเหตุที่ปิด connection
+
+ไม่ผูกกับ driver: รับฟังก์ชัน connect / ping / close จากผู้เรียก จึงทดสอบด้วย connection
+ปลอมได้ (manage.py check_db_pool)
+"""
+import threading
+import time
+from collections import Counter, deque
+
+
+class PoolTimeout(Exception):
+    """รอ connection ว่างเกิน timeout"""
+
+
+class _Entry:
+    __slots__ = ("conn", "created", "last_used")
+
+    def __init__(self, conn, now):
+        self.conn = conn
+        self.created = now
+        self.last_used = now
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class ConnectionPool:
+
+    def __init__(self, connect, *, ping=None, close=None, size=5, max_overflow=5, timeout=10.0,
+                 recycle=300.0, max_lifetime=3600.0, pre_ping=True, clock=time.monotonic, samples=1000):
+        if size < 1 or max_overflow < 0:
+            raise ValueError("size ต้อง >= 1 และ max_overflow ต้อง >= 0")
+        self._connect = connect
+        self._ping = ping
+        self._close = close or (lambda conn: conn.close())
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping and ping is not None
+        self._clock = clock
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = []          # stack ของ _Entry (LIFO)
+        self._in_use = {}        # id(conn) -> _Entry
+        self._opening = 0        # กำลังเปิดอยู่ (จองที่ไว้แล้ว)
+        self._closed = False
+
+        self._waits = deque(maxlen=samples)  # เวลารอยืม (วินาที) ล่าสุด
+        self._counters = Counter()
+        self._peak_in_use = 0
+
+    # ===== ยืม / คืน =====
+    @property
+    def limit(self):
+        return self.size + self.max_overflow
+
+    def _open_count(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def _expired(self, entry, now):
+        if self.max_lifetime and now - entry.created >= self.max_lifetime:
+            return "lifetime"
+        if self.recycle and now - entry.last_used >= self.recycle:
+            return "recycle"
+        return None
+
+    def checkout(self):
+        start = self._clock()
+        deadline = start + self.timeout
+        while True:
+            entry, reason = None, None
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("pool ถูกปิดแล้ว")
+                while not self._idle and self._open_count() >= self.limit:
+                    remaining = deadline - self._clock()
+                    if remaining <= 0:
+                        self._counters["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"ไม่มี connection ว่างภายใน {self.timeout} วินาที "
+                            f"(ใช้อยู่ {len(self._in_use)}/{self.limit})"
+                        )
+                    self._cond.wait(remaining)
+                now = self._clock()
+                if self._idle:
+                    entry = self._idle.pop()
+                    reason = self._expired(entry, now)
+                    # จองที่ไว้ระหว่างตรวจ/ปิดนอก lock
+                    self._opening += 1
+                else:
+                    self._opening += 1
+
+            if entry is not None and reason is None and self.pre_ping and not self._safe_ping(entry.conn):
+                reason = "ping_failed"
+            if entry is not None and reason is not None:
+                self._discard(entry.conn, reason, reserved=True)
+                continue
+
+            reused = entry is not None
+            if not reused:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                entry = _Entry(conn, self._clock())
+
+            with self._cond:
+                self._counters["reuses" if reused else "connects"] += 1
+                self._opening -= 1
+                self._in_use[id(entry.conn)] = entry
+                self._peak_in_use = max(self._peak_in_use, len(self._in_use))
+                self._counters["checkouts"] += 1
+                self._waits.append(self._clock() - start)
+            return entry.conn
+
+    def checkin(self, conn, discard=False):
+        """คืน connection; discard=True เมื่อ connection อยู่ในสถานะที่ไว้ใจไม่ได้ (error / ค้าง transaction)"""
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+            if entry is None:
+                reason = "unknown"
+            elif discard:
+                reason = "error"
+            elif self._closed:
+                reason = "pool_closed"
+            elif self.max_lifetime and self._clock() - entry.created >= self.max_lifetime:
+                reason = "lifetime"
+            elif len(self._idle) >= self.size:
+                reason = "overflow"
+            else:
+                entry.last_used = self._clock()
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+            self._opening += 1
+        self._discard(conn, reason, reserved=True)
+
+    def _discard(self, conn, reason, reserved=False):
+        try:
+            self._close(conn)
+        except Exception:
+            pass
+        with self._cond:
+            if reserved:
+                self._opening -= 1
+            self._counters[f"closed_{reason}"] += 1
+            self._cond.notify()
+
+    def _safe_ping(self, conn):
+        try:
+            return self._ping(conn) is not False
+        except Exception:
+            return False
+
+    def close(self):
+        """ปิดทุก connection ที่ว่างอยู่ ตัวที่ถูกยืมอยู่จะถูกปิดตอนคืน"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._opening += len(idle)
+        for entry in idle:
+            self._discard(entry.conn, "pool_closed", reserved=True)
+
+    # ===== metrics =====
+    def stats(self):
+        with self._cond:
+            waits = sorted(self._waits)
+            data = {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": len(self._idle) + len(self._in_use),
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "peak_in_use": self._peak_in_use,
+                "checkout_ms": {
+                    "p50": round(percentile(waits, 50) * 1000, 3),
+                    "p95": round(percentile(waits, 95) * 1000, 3),
+                    "max": round(waits[-1] * 1000, 3) if waits else 0.0,
+                    "samples": len(waits),
+                },
+            }
+            data.update(sorted(self._counters.items()))
+        return data
@@ -0,0 +1,160 @@
+# base/dbrouter.py
+"""
+แยกอ่าน/เขียน: เขียน (และ select_for_update) ไปที่ primary ("default"), อ่านไปที่ replica
+
+    DATABASE_ROUTERS = ["base.dbrouter.PrimaryReplicaRouter"]
+    DATABASE_REPLICAS = ["replica"]   # alias ใน DATABASES, ว่าง = ทุกอย่างไปที่ primary
+    REPLICA_STICKY_SECONDS = 5
+
+- อ่านจาก primary เสมอเมื่อ: อยู่ใน transaction.atomic() ของ primary, request ที่ไม่ใช่ GET/HEAD,
+  หลัง request นี้เขียนไปแล้ว, อยู่ใน use_primary() หรือผู้ใช้ยังอยู่ในช่วง "ติด primary"
+- ReadYourWritesMiddleware: request ที่เขียนข้อมูล (จองคอร์ส / อนุมัติคำขอ / แก้โปรไฟล์ ฯลฯ)
+  ตั้ง cookie ให้ผู้ใช้นั้นอ่านจาก primary ต่ออีก REPLICA_STICKY_SECONDS วินาที
+  กัน replica ที่ยังตามไม่ทันทำให้ผู้ใช้ไม่เห็นสิ่งที่เพิ่งทำ (ควรตั้งมากกว่า replication lag ปกติ)
+- "เขียน" นับจากการที่ Django ขอ db_for_write (save / update / delete / get_or_create /
+  select_for_update) จึงติด primary แม้ get_or_create จะไม่ได้สร้างแถวใหม่ (เผื่อไว้ก่อน)
+- สถานะต่อ request เก็บใน contextvar (ใช้ได้ทั้ง WSGI, ASGI และ thread ของ sync_to_async)
+- replica ไม่ถูก migrate (รับ schema + ข้อมูลจาก replication)
+- แคชแบบ DatabaseCache (settings.CACHES) อ่านจาก primary เสมอ
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = DEFAULT_DB_ALIAS
+STICKY_COOKIE = "db_primary_until"
+# ตารางของ DatabaseCache: version stamp ของแคชต้องอ่านจาก primary (replica ที่ช้าจะคืน version เก่า)
+CACHE_APP_LABEL = "django_cache"
+
+
+class _RoutingState:
+    __slots__ = ("pinned", "wrote")
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+
+def replica_aliases():
+    # ตรวจกับ connections (ที่ Django ใช้ส่ง query จริง) = settings.DATABASES ตอนเริ่ม process
+    return [alias for alias in getattr(settings, "DATABASE_REPLICAS", ()) if alias in connections]
+
+
+def sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+
+
+@contextmanager
+def use_primary():
+    """อ่านทุกอย่างจาก primary ภายใน block นี้ (worker / คำสั่งที่ต้องเห็นข้อมูลล่าสุด)"""
+    token = _state.set(_RoutingState(pinned=True))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def _reads_from_primary():
+    state = _state.get()
+    if state is not None and (state.pinned or state.wrote):
+        return True
+    # อ่านใน transaction ต้องเห็นสิ่งที่ transaction นี้เขียน และอ่านจาก snapshot เดียวกัน
+    return connections[PRIMARY].in_atomic_block
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or model._meta.app_label == CACHE_APP_LABEL or _reads_from_primary():
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        # เขียนแคช (เช่น เก็บหน้าที่เพิ่ง render) ไม่ใช่ข้อมูลของผู้ใช้ ไม่ต้องติด primary
+        if state is not None and model._meta.app_label != CACHE_APP_LABEL:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {PRIMARY, *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
+
+
+def _pinned_by_cookie(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """
+    ผู้ใช้ที่เพิ่งเขียนข้อมูลอ่านจาก primary ต่ออีกช่วงหนึ่ง (ดูด้านบน)
+    ต้องอยู่ก่อน SessionMiddleware: session ที่เพิ่งบันทึกตอนล็อกอินก็ต้องอ่านจาก primary เช่นกัน
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _begin(request):
+        pinned = request.method not in ("GET", "HEAD", "OPTIONS") or _pinned_by_cookie(request)
+        state = _RoutingState(pinned=pinned)
+        return state, _state.set(state)
+
+    @staticmethod
+    def _finish(state, token, response):
+        _state.reset(token)
+        if state.wrote:
+            seconds = sticky_seconds()
+            response.set_cookie(
+                STICKY_COOKIE, f"{time.time() + seconds:.0f}", max_age=seconds,
+                httponly=True, samesite="Lax", secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+        state, token = self._begin(request)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            _state.reset(token)
+            raise
+        return self._finish(state, token, response)
+
+    async def __acall__(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+        state, token = self._begin(request)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            _state.reset(token)
+            raise
+        return self._finish(state, token, response)
@@ -0,0 +1,129 @@
+# base/images.py
+"""
+สร้างรูปย่อหลายขนาด (WebP + JPEG) และ placeholder เบลอ สำหรับรูปที่ผู้ใช้อัปโหลด
+(รูปปกคอร์ส Course.cover_image และรูปโปรไฟล์ Profile.avatar)
+
+- การย่อรูปทำใน worker ของคิวงาน (trainmydog/jobs.py, manage.py run_workers) ไม่ใช่ใน web process
+  งานถูกบันทึกใน transaction เดียวกับแถวที่เปลี่ยนรูป (ดู base/tasks.py)
+- รูปย่อเก่าถูกลบพร้อมไฟล์ต้นทางเมื่อรูปถูกเปลี่ยน/ลบ (register_file_cleanup ใน base/storage.py)
+- ผลลัพธ์ (ขนาดที่มี + placeholder) เก็บใน JSONField <field>_variants ของโมเดล
+- template ใช้ {% responsive_image %} (base/templatetags/images.py) สร้าง srcset
+
+โมดูลนี้ต้อง import ได้โดยไม่ต้อง setup Django (process pool ของ generate_image_variants ใช้แค่ Pillow)
+"""
+import base64
+import io
+import os
+
+from PIL import Image, ImageFilter, ImageOps
+
+# ความกว้างของรูปย่อ (px) ต่อชนิดรูป
+COVER_WIDTHS = (320, 640, 1024)
+AVATAR_WIDTHS = (64, 128)
+VARIANT_FORMATS = (("webp", "WEBP", 80), ("jpg", "JPEG", 82))
+PLACEHOLDER_WIDTH = 16
+
+
+def variant_name(name, width, ext):
+    """courses/5/dog.jpg -> courses/5/_v/dog.320.webp"""
+    folder, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(folder, "_v", f"{stem}.{width}.{ext}").replace(os.sep, "/")
+
+
+def generate_variants(src_path, name, dest_root, widths):
+    """
+    (รันใน worker) ย่อรูป src_path ตามความกว้างใน widths
+    คืน dict สำหรับเก็บใน <field>_variants
+    """
+    with Image.open(src_path) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        orig_w, orig_h = im.size
+
+        # ไม่ขยายรูปเล็กให้ใหญ่ขึ้น: ความกว้างที่เกินรูปจริงจะใช้ความกว้างจริงแทน
+        made = sorted({min(w, orig_w) for w in widths})
+        for width in made:
+            resized = im.resize((width, max(1, round(orig_h * width / orig_w))), Image.LANCZOS)
+            for ext, fmt, quality in VARIANT_FORMATS:
+                out = os.path.join(dest_root, variant_name(name, width, ext))
+                os.makedirs(os.path.dirname(out), exist_ok=True)
+                resized.save(out, fmt, quality=quality, optimize=True)
+
+        tiny = im.resize(
+            (PLACEHOLDER_WIDTH, max(1, round(orig_h * PLACEHOLDER_WIDTH / orig_w))), Image.BILINEAR
+        ).filter(ImageFilter.GaussianBlur(1))
+        buf = io.BytesIO()
+        tiny.save(buf, "JPEG", quality=40)
+
+    return {
+        "name": name,
+        "widths": made,
+        "width": orig_w,
+        "height": orig_h,
+        "placeholder": "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode(),
+    }
+
+
+def save_variants(model_label, pk, field, meta):
+    """บันทึกผลลงฐานข้อมูล (เฉพาะถ้ารูปยังเป็นไฟล์เดิม กันรูปที่ถูกเปลี่ยนระหว่างรอ) คืน True ถ้าบันทึก"""
+    from django.apps import apps
+    from trainmydog.cache import bump_page_cache_version
+
+    model = apps.get_model(model_label)
+    updated = model.objects.filter(pk=pk, **{field: meta["name"]}).update(**{f"{field}_variants": meta})
+    if updated:
+        bump_page_cache_version()
+    return bool(updated)
+
+
+def variant_files(name, widths):
+    """ชื่อไฟล์รูปย่อทั้งหมดของ name (ทุกความกว้าง ทุกนามสกุล)"""
+    return [variant_name(name, width, ext) for width in widths for ext, _, _ in VARIANT_FORMATS]
+
+
+def schedule_variants(instance, field, widths):
+    """ใส่งานย่อรูปของ instance.<field> เข้าคิว Job (worker เห็นงานหลัง transaction commit)"""
+    from base.tasks import make_image_variants
+    from trainmydog.jobs import enqueue
+
+    file = getattr(instance, field)
+    if not file or not file.name:
+        return
+    enqueue(
+        make_image_variants,
+        model_label=instance._meta.label, pk=instance.pk, field=field, name=file.name, widths=list(widths),
+    )
+
+
+def register_variant_field(model, field, widths):
+    """
+    ผูก signal ให้ model.<field>: เมื่อไฟล์รูปเปลี่ยน -> ล้าง <field>_variants แล้วใส่งานย่อรูปเข้าคิว
+    (เรียกครั้งเดียวหลังประกาศโมเดล)
+    """
+    from django.db.models.signals import post_init, post_save
+
+    loaded_attr = f"_loaded_{field}"
+    uid = f"image-variants:{model._meta.label}.{field}"
+
+    # ฟิลด์ที่ถูก defer (.only() / .defer()) ยังไม่อยู่ใน __dict__: อ่านตรงนี้จะยิง SELECT ทีละแถว
+    # ไม่ได้โหลดรูปมาก็เปลี่ยนรูปไม่ได้ จึงข้ามทั้งตอนโหลดและตอนบันทึก
+    def remember(sender, instance, **kwargs):
+        if field in instance.__dict__:
+            setattr(instance, loaded_attr, getattr(instance, field).name or "")
+
+    def on_save(sender, instance, created, **kwargs):
+        if field not in instance.__dict__:
+            return
+        name = getattr(instance, field).name or ""
+        if name == getattr(instance, loaded_attr, ""):
+            return
+        setattr(instance, loaded_attr, name)
+        if not created:
+            sender.objects.filter(pk=instance.pk).update(**{f"{field}_variants": {}})
+            setattr(instance, f"{field}_variants", {})
+        schedule_variants(instance, field, widths)
+
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,203 @@
+# base/management/commands/check_db_pool.py
+"""
+ตรวจพฤติกรรมของ connection pool (base/dbpool.py) และวัด latency ของการต่อฐานข้อมูล
+
+    python manage.py check_db_pool
+    python manage.py check_db_pool --threads 32 --rounds 200
+    python manage.py check_db_pool --database default --cycles 500
+
+ส่วนแรกใช้ driver ปลอม (ไม่ต้องมี MySQL): ตรวจขอบเขต size + max_overflow ภายใต้หลาย thread,
+การคืน overflow, PoolTimeout, pre_ping ทิ้งตัวที่ตาย, recycle / max_lifetime และ connect ที่ล้มเหลว
+ส่วน --database: เปิด-ปิด connection ของ Django ตามวงจรของ request ซ้ำ (SELECT 1)
+แล้วรายงาน p50/p95 ต่อรอบ เทียบกันได้ระหว่าง ENGINE base.db.mysql_pool กับ mysql ปกติ
+"""
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from base.dbpool import ConnectionPool, PoolTimeout, percentile
+
+
+class StubConnection:
+    """connection ปลอม: ping ล้มเหลวเมื่อ alive = False (server ตัดทิ้ง)"""
+
+    def __init__(self, latency):
+        self.alive = True
+        self.closed = False
+        time.sleep(latency)
+
+    def ping(self):
+        if not self.alive:
+            raise OSError("server has gone away")
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _stub_pool(latency=0.0, **options):
+    made = []
+
+    def connect():
+        conn = StubConnection(latency)
+        made.append(conn)
+        return conn
+
+    return ConnectionPool(connect, ping=StubConnection.ping, **options), made
+
+
+class Command(BaseCommand):
+    help = "ตรวจ connection pool ด้วย driver ปลอม และ (ถ้าระบุ) วัดเวลาเปิด-ปิด connection จริง"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--rounds", type=int, default=100, help="จำนวนครั้งที่แต่ละ thread ยืม-คืน")
+        parser.add_argument("--database", help="alias ใน DATABASES ที่จะวัดวงจร connection จริง")
+        parser.add_argument("--cycles", type=int, default=200)
+
+    def handle(self, *args, **opts):
+        checks = [
+            ("ขอบเขตภายใต้หลาย thread", lambda: self._check_bounds(opts["threads"], opts["rounds"])),
+            ("รอเกิน timeout -> PoolTimeout", self._check_timeout),
+            ("pre_ping ทิ้ง connection ที่ตาย", self._check_pre_ping),
+            ("recycle / max_lifetime", self._check_expiry),
+            ("connect ล้มเหลวไม่กินที่ใน pool", self._check_connect_failure),
+        ]
+        failures = 0
+        for label, check in checks:
+            try:
+                detail = check()
+            except AssertionError as exc:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"FAIL {label}: {exc}"))
+            else:
+                self.stdout.write(f"ok   {label}{f' ({detail})' if detail else ''}")
+        if failures:
+            raise CommandError(f"pool ผิดพลาด {failures} ข้อ")
+
+        if opts["database"]:
+            self._measure_database(opts["database"], opts["cycles"])
+        self.stdout.write(self.style.SUCCESS("connection pool ทำงานตามที่กำหนด"))
+
+    # ===== ตรวจด้วย driver ปลอม =====
+    def _check_bounds(self, threads, rounds):
+        pool, made = _stub_pool(latency=0.002, size=4, max_overflow=2, timeout=30)
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(rounds):
+                    conn = pool.checkout()
+                    time.sleep(0.0005)
+                    pool.checkin(conn)
+            except Exception as exc:  # ให้ thread หลักรายงาน
+                errors.append(exc)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        stats = pool.stats()
+        assert not errors, f"thread ล้มเหลว: {errors[0]!r}"
+        assert stats["peak_in_use"] <= pool.limit, f"ยืมพร้อมกัน {stats['peak_in_use']} เกิน {pool.limit}"
+        assert stats["in_use"] == 0, f"ยังมี connection ค้าง {stats['in_use']}"
+        assert stats["idle"] <= pool.size, f"idle {stats['idle']} เกิน size {pool.size}"
+        open_now = sum(1 for c in made if not c.closed)
+        assert open_now == stats["idle"], f"connection ที่เปิดจริง {open_now} ไม่ตรงกับ idle {stats['idle']}"
+        assert stats["checkouts"] == threads * rounds
+        return (
+            f"{stats['checkouts']} ครั้ง, เปิดใหม่ {stats['connects']}, สูงสุด {stats['peak_in_use']}/{pool.limit}, "
+            f"รอยืม p95 {stats['checkout_ms']['p95']} ms"
+        )
+
+    def _check_timeout(self):
+        pool, _ = _stub_pool(size=1, max_overflow=0, timeout=0.05)
+        held = pool.checkout()
+        try:
+            pool.checkout()
+        except PoolTimeout:
+            pass
+        else:
+            raise AssertionError("ยืมเกินขนาด pool ได้")
+        pool.checkin(held)
+        assert pool.checkout() is held, "คืนแล้วยืมตัวเดิมไม่ได้"
+        assert pool.stats()["timeouts"] == 1
+        return None
+
+    def _check_pre_ping(self):
+        pool, made = _stub_pool(size=2, max_overflow=0)
+        conn = pool.checkout()
+        pool.checkin(conn)
+        conn.alive = False  # server ตัด connection ระหว่าง idle
+        fresh = pool.checkout()
+        assert fresh is not conn and conn.closed, "ได้ connection ที่ตายแล้วกลับมา"
+        assert pool.stats()["closed_ping_failed"] == 1
+        return None
+
+    def _check_expiry(self):
+        clock = FakeClock()
+        pool, _ = _stub_pool(size=2, max_overflow=0, recycle=60, max_lifetime=600, clock=clock)
+        first = pool.checkout()
+        pool.checkin(first)
+        clock.now = 30
+        assert pool.checkout() is first, "idle ยังไม่ถึง recycle ควรได้ตัวเดิม"
+        pool.checkin(first)
+        clock.now = 100  # idle 70 วินาที > recycle
+        second = pool.checkout()
+        assert second is not first and first.closed, "connection ที่ idle เกิน recycle ไม่ถูกปิด"
+        clock.now = 700  # เปิดมาแล้วเกิน max_lifetime ตอนคืน
+        pool.checkin(second)
+        assert second.closed, "connection ที่เกิน max_lifetime ไม่ถูกปิดตอนคืน"
+        stats = pool.stats()
+        assert stats["closed_recycle"] == 1 and stats["closed_lifetime"] == 1
+        return None
+
+    def _check_connect_failure(self):
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError("connection refused")
+            return StubConnection(0)
+
+        pool = ConnectionPool(connect, size=1, max_overflow=0, timeout=0.05)
+        try:
+            pool.checkout()
+        except OSError:
+            pass
+        pool.checkout()  # ถ้าที่ไม่ถูกคืนจะ PoolTimeout
+        return None
+
+    # ===== วงจร connection จริง =====
+    def _measure_database(self, alias, cycles):
+        if alias not in connections:
+            raise CommandError(f"ไม่มีฐานข้อมูล {alias}")
+        conn = connections[alias]
+        conn.close()
+        samples = []
+        for _ in range(cycles):
+            start = time.perf_counter()
+            with conn.cursor() as cursor:  # เปิด (หรือยืมจาก pool)
+                cursor.execute("SELECT 1")
+            conn.close()  # จบ request: ปิด (หรือคืนเข้า pool)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        engine = conn.settings_dict["ENGINE"]
+        self.stdout.write(
+            f"{alias} ({engine}): {cycles} รอบ p50 {percentile(samples, 50) * 1000:.2f} ms "
+            f"p95 {percentile(samples, 95) * 1000:.2f} ms max {samples[-1] * 1000:.2f} ms"
+        )
+        stats = getattr(conn, "pool_stats", lambda: None)()
+        if stats:
+            self.stdout.write(f"    pool: {stats}")
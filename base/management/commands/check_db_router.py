@@ -0,0 +1,133 @@
+# base/management/commands/check_db_router.py
+"""
+ตรวจการแยกอ่าน/เขียนของ PrimaryReplicaRouter และ read-your-writes (base/dbrouter.py)
+
+    python manage.py check_db_router --sync-sqlite
+    python manage.py check_db_router --wait 2        # replica จริง (MySQL replication)
+
+ต้องมี alias ใน DATABASE_REPLICAS ทดสอบในเครื่องได้ด้วย SQLite สองไฟล์ เช่น
+    DATABASES = {"default": {... "NAME": "primary.sqlite3"}, "replica": {... "NAME": "replica.sqlite3"}}
+    DATABASE_REPLICAS = ["replica"]
+--sync-sqlite คัดลอกไฟล์ primary ไปทับ replica (จำลอง replication แบบ snapshot) ก่อนเริ่มและหลังจบ
+
+1) เส้นทางของ query: อ่านปกติ -> replica; select_for_update / ใน atomic / use_primary / เขียน -> primary
+2) ผ่าน request จริง: สมาชิกแก้ชื่อใน profile_edit แล้วเปิดหน้าโปรไฟล์ทันทีต้องเห็นชื่อใหม่
+   (ติด primary ด้วย cookie) และเมื่อไม่มี cookie หน้าเดียวกันอ่านจาก replica
+"""
+import sqlite3
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from base.dbrouter import PRIMARY, STICKY_COOKIE, replica_aliases, use_primary
+from base.models import Profile
+from course.models import Course
+
+
+class Command(BaseCommand):
+    help = "ตรวจว่าการอ่านไป replica การเขียนไป primary และผู้ใช้ที่เพิ่งเขียนอ่านจาก primary"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sync-sqlite", action="store_true", help="คัดลอก primary (SQLite) ไปทับทุก replica")
+        parser.add_argument("--wait", type=float, default=0.0, help="วินาทีที่รอ replication หลังสร้างข้อมูลทดสอบ")
+
+    def handle(self, *args, **opts):
+        replicas = replica_aliases()
+        if not replicas:
+            raise CommandError("ยังไม่ได้ตั้ง DATABASE_REPLICAS (ดู docstring ของคำสั่งนี้)")
+        self.replicas = replicas
+        self.sync = opts["sync_sqlite"]
+        if self.sync:
+            self._sync_sqlite()
+
+        failures = []
+        for label, ok in self._check_routing():
+            self._report(label, ok, failures)
+
+        setup_test_environment()
+        try:
+            for label, ok in self._check_request_flow(opts["wait"]):
+                self._report(label, ok, failures)
+        finally:
+            teardown_test_environment()
+            if self.sync:
+                self._sync_sqlite()
+
+        if failures:
+            raise CommandError(f"ผิดพลาด {len(failures)} ข้อ: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS(f"อ่านจาก {', '.join(replicas)} เขียนที่ {PRIMARY} ถูกต้อง"))
+
+    def _report(self, label, ok, failures):
+        if ok is None:
+            self.stdout.write(f"-    {label} (ข้าม)")
+        elif ok:
+            self.stdout.write(f"ok   {label}")
+        else:
+            failures.append(label)
+            self.stdout.write(self.style.ERROR(f"FAIL {label}"))
+
+    def _sync_sqlite(self):
+        source = connections[PRIMARY].settings_dict
+        if source["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("--sync-sqlite ใช้ได้เมื่อ primary เป็น SQLite เท่านั้น")
+        for alias in [PRIMARY, *self.replicas]:
+            connections[alias].close()
+        with sqlite3.connect(source["NAME"]) as src:
+            for alias in self.replicas:
+                with sqlite3.connect(connections[alias].settings_dict["NAME"]) as dst:
+                    src.backup(dst)
+
+    # ===== 1) เส้นทางของ query =====
+    def _check_routing(self):
+        yield "อ่านปกติไป replica", Course.objects.all().db in self.replicas
+        yield "select_for_update ไป primary", Course.objects.select_for_update().db == PRIMARY
+        with transaction.atomic(using=PRIMARY):
+            yield "อ่านใน transaction ไป primary", Course.objects.all().db == PRIMARY
+        with use_primary():
+            yield "use_primary() ไป primary", Course.objects.all().db == PRIMARY
+        yield "เขียนไป primary", router.db_for_write(Course) == PRIMARY
+        yield "replica ไม่ถูก migrate", not any(router.allow_migrate(alias, "course") for alias in self.replicas)
+        cache_model = getattr(cache, "cache_model_class", None)  # มีเฉพาะ DatabaseCache
+        yield "แคช (DatabaseCache) อ่านจาก primary", cache_model and router.db_for_read(cache_model) == PRIMARY
+
+    # ===== 2) read-your-writes ผ่าน request =====
+    def _check_request_flow(self, wait):
+        tag = uuid.uuid4().hex[:8]
+        email = f"router-{tag}@example.com"
+        with use_primary():
+            user = User.objects.create_user(email, email=email, first_name="ชื่อเดิม")
+            Profile.objects.get_or_create(user=user)
+        client = Client()
+        client.force_login(user)  # session อยู่ที่ primary
+        if self.sync:
+            self._sync_sqlite()  # replica เห็นผู้ใช้ + session แล้ว แต่จะไม่เห็นการแก้ไขถัดไป
+        elif wait:
+            time.sleep(wait)
+
+        try:
+            response = client.post(reverse("Authen:profile_edit"), {
+                "first_name": f"ชื่อใหม่{tag}", "last_name": "", "phone": "0800000000", "bio": "",
+            })
+            yield "แก้โปรไฟล์สำเร็จ", response.status_code == 302
+            yield "ตั้ง cookie ติด primary หลังเขียน", STICKY_COOKIE in response.cookies
+
+            page = client.get(reverse("Authen:profile"))
+            yield "เห็นชื่อใหม่ทันที (อ่านจาก primary)", f"ชื่อใหม่{tag}" in page.content.decode()
+
+            client.cookies.pop(STICKY_COOKIE, None)
+            page = client.get(reverse("Authen:profile"))
+            if self.sync:
+                # replica เป็น snapshot ก่อนแก้ -> ไม่มี cookie แล้วต้องอ่านค่าเดิมจาก replica
+                yield "ไม่มี cookie อ่านจาก replica", "ชื่อเดิม" in page.content.decode()
+            else:
+                yield "ไม่มี cookie อ่านจาก replica", None
+        finally:
+            with use_primary():
+                User.objects.filter(pk=user.pk).delete()
@@ -0,0 +1,69 @@
+# base/management/commands/dedupe_media.py
+"""
+ย้ายไฟล์ media เดิม (ชื่อตาม upload_to) เข้า content-addressed storage
+ไฟล์ที่เนื้อหาซ้ำกันจะเหลือบนดิสก์ไฟล์เดียว แล้วลบไฟล์เดิมทิ้ง
+
+    python manage.py dedupe_media
+    python manage.py dedupe_media --dry-run
+
+ชื่อไฟล์เปลี่ยน -> สั่ง generate_image_variants ต่อเพื่อสร้างรูปย่อตามชื่อใหม่
+"""
+import os
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from base.models import Profile, StoredBlob
+from base.storage import CAS_PREFIX
+from course.models import Course
+from trainmydog.models import TrainerCertificate
+
+TARGETS = (
+    (Course, "cover_image"),
+    (Profile, "avatar"),
+    (TrainerCertificate, "file"),
+)
+
+
+class Command(BaseCommand):
+    help = "ย้ายไฟล์อัปโหลดเดิมเข้า storage แบบ SHA-256 และตัดไฟล์ซ้ำ"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="แสดงจำนวนไฟล์ที่จะย้ายเท่านั้น")
+
+    def handle(self, *args, **opts):
+        moved = missing = before = 0
+        old_files = set()
+        for model, field in TARGETS:
+            storage = model._meta.get_field(field).storage
+            qs = (
+                model.objects.exclude(**{f"{field}__isnull": True})
+                .exclude(**{field: ""})
+                .exclude(**{f"{field}__startswith": CAS_PREFIX + "/"})
+            )
+            for pk, name in qs.values_list("pk", field).iterator():
+                if not storage.exists(name):
+                    missing += 1
+                    continue
+                if opts["dry_run"]:
+                    moved += 1
+                    continue
+                before += storage.size(name)
+                with storage.open(name) as fh:
+                    new_name = storage.save(name, fh)
+                # update() ตรงๆ: ไม่ยิง signal สร้างรูปย่อซ้ำ (รูปย่อจะถูกสร้างจาก generate_image_variants)
+                model.objects.filter(pk=pk).update(**{field: new_name})
+                old_files.add(storage.path(name))
+                moved += 1
+
+        # ลบไฟล์เดิมหลังย้ายครบทุกแถว (หลายแถวอาจอ้างไฟล์เดิมไฟล์เดียวกัน)
+        for path in old_files:
+            os.remove(path)
+
+        if opts["dry_run"]:
+            self.stdout.write(f"จะย้าย {moved} ไฟล์ (ไม่พบไฟล์ {missing})")
+            return
+        after = StoredBlob.objects.aggregate(total=Sum("size"))["total"] or 0
+        self.stdout.write(self.style.SUCCESS(
+            f"ย้ายแล้ว {moved} ไฟล์ ({before} bytes -> พื้นที่ cas/ ทั้งหมด {after} bytes), ไม่พบไฟล์ {missing}"
+        ))
@@ -0,0 +1,55 @@
+# base/management/commands/generate_image_variants.py
+"""
+สร้างรูปย่อ/placeholder ให้รูปที่อัปโหลดไว้แล้ว (ปกคอร์ส + รูปโปรไฟล์) แบบขนาน
+
+    python manage.py generate_image_variants --workers 4
+    python manage.py generate_image_variants --force   # สร้างใหม่ทั้งหมด
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+
+from base.images import AVATAR_WIDTHS, COVER_WIDTHS, generate_variants, save_variants
+from base.models import Profile
+from course.models import Course
+
+
+class Command(BaseCommand):
+    help = "สร้างรูปย่อ (WebP/JPEG) และ placeholder ให้รูปปกคอร์สและรูปโปรไฟล์ที่มีอยู่"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--force", action="store_true", help="สร้างใหม่แม้มีรูปย่ออยู่แล้ว")
+
+    def _jobs(self, force):
+        targets = (
+            (Course, "cover_image", COVER_WIDTHS),
+            (Profile, "avatar", AVATAR_WIDTHS),
+        )
+        for model, field, widths in targets:
+            qs = model.objects.exclude(**{f"{field}__isnull": True}).exclude(**{field: ""})
+            for pk, name, variants in qs.values_list("pk", field, f"{field}_variants").iterator():
+                if not force and (variants or {}).get("name") == name:
+                    continue
+                yield model._meta.label, pk, field, name, widths
+
+    def handle(self, *args, **opts):
+        storage = Course._meta.get_field("cover_image").storage
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=opts["workers"], mp_context=get_context("spawn")) as pool:
+            futures = {
+                pool.submit(generate_variants, storage.path(name), name, storage.location, widths):
+                    (label, pk, field, name)
+                for label, pk, field, name, widths in self._jobs(opts["force"])
+            }
+            for future in as_completed(futures):
+                label, pk, field, name = futures[future]
+                try:
+                    save_variants(label, pk, field, future.result())
+                    done += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{label} pk={pk} {name}: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(f"สร้างรูปย่อแล้ว {done} รูป (ล้มเหลว {failed})"))
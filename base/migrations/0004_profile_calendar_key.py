@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:26
+
+import secrets
+
+import base.models
+from django.db import migrations, models
+
+
+def fill_calendar_keys(apps, schema_editor):
+    Profile = apps.get_model('base', 'Profile')
+
+    # AddField ใช้ default ค่าเดียวกับทุกแถวเดิม: สุ่มใหม่ให้แต่ละคน
+    for pk in Profile.objects.values_list('pk', flat=True).iterator():
+        Profile.objects.filter(pk=pk).update(calendar_key=secrets.token_urlsafe(16))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_stored_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='calendar_key',
+            field=models.CharField(default=base.models.new_calendar_key, editable=False, max_length=32),
+        ),
+        migrations.RunPython(fill_calendar_keys, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,24 @@
+import copy
+import secrets
+
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_init, post_save
 from django.dispatch import receiver
 
+from .images import AVATAR_WIDTHS, register_variant_field
+from .storage import register_file_cleanup
+
 
 def profile_upload_path(instance, filename):
     return f'profiles/user_{instance.user.id}/{filename}'
 
 
+def new_calendar_key():
+    return secrets.token_urlsafe(16)
+
+
 class Profile(models.Model):
     class Role(models.TextChoices):
         MEMBER = "member", "สมาชิก"
@@ -18,15 +29,85 @@ class Profile(models.Model):
     role = models.CharField(max_length=20, choices=Role.choices, default=Role.MEMBER)
     phone = models.CharField(max_length=20, blank=True)
     avatar = models.ImageField(upload_to=profile_upload_path, blank=True, null=True)
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)  # base/images.py
     bio = models.TextField(blank=True)
+    # ส่วนหนึ่งของลิงก์ปฏิทิน .ics (trainmydog/ical.py) สุ่มใหม่เมื่อผู้ใช้กด "สร้างลิงก์ใหม่"
+    calendar_key = models.CharField(max_length=32, default=new_calendar_key, editable=False)
 
     def __str__(self):
         return f'{self.user.username} ({self.get_role_display()})'
 
+    # ===== dirty-field tracking =====
+    # save() ที่ไม่ระบุ update_fields จะเขียนเฉพาะคอลัมน์ที่เปลี่ยนจากตอนโหลด
+    # และไม่ยิง UPDATE เลยถ้าไม่มีอะไรเปลี่ยน
+    def _tracked_state(self):
+        deferred = self.get_deferred_fields()
+        state = {}
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname in deferred:
+                continue
+            value = getattr(self, field.attname)
+            if isinstance(value, FieldFile):
+                # ไฟล์ที่เพิ่งอัปโหลด (ยังไม่ commit) นับว่าเปลี่ยนเสมอ
+                value = value.name if value._committed else object()
+            state[field.attname] = copy.deepcopy(value)
+        return state
+
+    def changed_fields(self):
+        loaded = getattr(self, '_loaded_state', {})
+        return [name for name, value in self._tracked_state().items()
+                if name not in loaded or loaded[name] != value]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if not self._state.adding and update_fields is None and not kwargs.get('force_insert'):
+            changed = self.changed_fields()
+            if not changed:
+                return
+            kwargs['update_fields'] = changed
+        super().save(*args, **kwargs)
+        state = self._tracked_state()
+        if update_fields is not None:
+            # save(update_fields=[...]) เขียนแค่บางคอลัมน์: คอลัมน์อื่นที่แก้ค้างไว้ยังนับว่าเปลี่ยน
+            saved = {self._meta.get_field(name).attname for name in update_fields}
+            state = {**getattr(self, '_loaded_state', {}), **{k: v for k, v in state.items() if k in saved}}
+        self._loaded_state = state
+
+
+register_variant_field(Profile, "avatar", AVATAR_WIDTHS)
+register_file_cleanup(Profile, "avatar")
+
+
+class StoredBlob(models.Model):
+    """
+    ไฟล์ใน media ที่เก็บตาม SHA-256 ของเนื้อหา (base/storage.py)
+    ref_count = จำนวนครั้งที่ถูกอัปโหลด/อ้างอิง ไฟล์จริงจะถูกลบเมื่อเหลือ 0
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} (refs={self.ref_count})'
+
+
+@receiver(post_init, sender=Profile)
+def remember_profile_state(sender, instance, **kwargs):
+    instance._loaded_state = instance._tracked_state()
+
 
 @receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
+def create_or_update_user_profile(sender, instance, created, update_fields=None, **kwargs):
     if created:
         Profile.objects.create(user=instance)
-    else:
-        getattr(instance, 'profile', None) and instance.profile.save()
+        return
+    # update_last_login() ตอนล็อกอิน: ไม่เกี่ยวกับ Profile เลย
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    # บันทึกเฉพาะ Profile ที่โหลดมากับ user แล้ว (ไม่ SELECT เพิ่ม) และเขียนเฉพาะคอลัมน์ที่เปลี่ยน
+    if sender.profile.is_cached(instance):
+        profile = getattr(instance, 'profile', None)
+        if profile is not None:
+            profile.save()
@@ -0,0 +1,169 @@
+# base/storage.py
+"""
+Storage ของไฟล์ media แบบ content-addressed (ตั้งเป็น default ใน settings.STORAGES)
+
+- ชื่อไฟล์มาจาก SHA-256 ของเนื้อหา: cas/ab/cd/<sha256>.<ext>
+  ไฟล์เดียวกันที่อัปโหลดซ้ำ (รูปปก/ใบรับรองซ้ำ) จะถูกเก็บบนดิสก์ครั้งเดียว
+- hash ระหว่างเขียนลงไฟล์ชั่วคราวในรอบเดียว (ไม่อ่านไฟล์ทั้งก้อนเข้าหน่วยความจำ)
+  ถ้าซ้ำก็ลบไฟล์ชั่วคราวทิ้ง ถ้าไม่ซ้ำก็ rename เข้าที่ (atomic)
+- นับการอ้างอิงใน StoredBlob.ref_count: delete() จะลบไฟล์จริงเมื่อไม่เหลือผู้อ้างอิง
+  register_file_cleanup() ผูกให้ฟิลด์ไฟล์เรียก delete() เมื่อไฟล์ถูกแทนที่/ล้าง หรือแถวถูกลบ
+- url()/path()/open() เหมือน FileSystemStorage เดิม ไฟล์เก่าที่ไม่ได้อยู่ใต้ cas/ ยังใช้ได้ตามปกติ
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+CAS_PREFIX = "cas"
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def cas_name(digest, ext):
+    """sha256 + นามสกุล -> cas/ab/cd/<sha256>.ext"""
+    return f"{CAS_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def _clean_ext(name):
+    ext = os.path.splitext(name)[1].lower()
+    return ext if 1 < len(ext) <= 10 and ext[1:].isalnum() else ""
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # ชื่อจริงถูกกำหนดใน _save จาก hash ของเนื้อหา ไม่ต้องหาชื่อว่าง
+        return name
+
+    def _write_temp(self, content):
+        """เขียน content ลงไฟล์ชั่วคราวใน MEDIA_ROOT พร้อมคำนวณ hash -> (path, digest, size)"""
+        tmp_dir = self.path(os.path.join(CAS_PREFIX, "tmp"))
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                if hasattr(content, "seek"):
+                    content.seek(0)
+                for chunk in content.chunks(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest(), size
+
+    def _save(self, name, content):
+        from .models import StoredBlob
+
+        tmp_path, digest, size = self._write_temp(content)
+        try:
+            with transaction.atomic():
+                blob, created = StoredBlob.objects.select_for_update().get_or_create(
+                    sha256=digest,
+                    defaults={"name": cas_name(digest, _clean_ext(name)), "size": size},
+                )
+                full_path = self.path(blob.name)
+                if not os.path.exists(full_path):
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(tmp_path, self.file_permissions_mode)
+                    os.replace(tmp_path, full_path)
+                StoredBlob.objects.filter(pk=digest).update(ref_count=F("ref_count") + 1)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return blob.name
+
+    def delete(self, name):
+        """ลดจำนวนผู้อ้างอิง ลบไฟล์จริง (และรูปย่อใน _v/) เมื่อเหลือ 0"""
+        from .models import StoredBlob
+
+        if not name:
+            raise ValueError("The name must be given to delete().")
+
+        if name.startswith(CAS_PREFIX + "/"):
+            with transaction.atomic():
+                blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+                if blob is not None and blob.ref_count > 1:
+                    StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") - 1)
+                    return
+                if blob is not None:
+                    blob.delete()
+        # ไฟล์เก่าที่ไม่ได้อยู่ใต้ cas/ ก็มีรูปย่อใน _v/ ได้เหมือนกัน
+        super().delete(name)
+        self._delete_variants(name)
+
+    def _delete_variants(self, name):
+        folder, filename = os.path.split(name)
+        stem = os.path.splitext(filename)[0]
+        variant_dir = os.path.join(folder, "_v")
+        try:
+            _, files = self.listdir(variant_dir)
+        except FileNotFoundError:
+            return
+        for f in files:
+            if f.startswith(stem + "."):
+                super().delete(os.path.join(variant_dir, f))
+
+
+# ===== คืนไฟล์เมื่อแถวเลิกใช้ =====
+def release_file(storage, name):
+    """storage.delete(name) หลัง transaction commit (ถ้า rollback แถวยังอ้างไฟล์เดิมอยู่)"""
+    if name:
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+def register_file_cleanup(model, field):
+    """
+    ผูก signal ให้ model.<field>: ไฟล์เดิมถูกแทนที่/ล้าง หรือแถวถูกลบ -> release_file(ชื่อเดิม)
+    Django ไม่ลบไฟล์ให้เอง ถ้าไม่คืน StoredBlob.ref_count จะเพิ่มอย่างเดียวและไฟล์ค้างบนดิสก์
+    (เรียกครั้งเดียวหลังประกาศโมเดล)
+    """
+    from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+    stored_attr = f"_stored_{field}"
+    uploading_attr = f"_uploading_{field}"
+    uid = f"file-cleanup:{model._meta.label}.{field}"
+    storage = model._meta.get_field(field).storage
+
+    def saves_field(instance, update_fields):
+        # ฟิลด์ที่ถูก defer ไม่อยู่ใน __dict__: ไม่รู้ชื่อเดิมก็ไม่แตะ (และไม่ยิง SELECT เพิ่ม)
+        return field in instance.__dict__ and (update_fields is None or field in update_fields)
+
+    def remember(sender, instance, **kwargs):
+        if field in instance.__dict__:
+            file = getattr(instance, field)
+            # ไฟล์ที่ยังไม่อัปโหลด (ชื่อจากเครื่องผู้ใช้) ไม่ใช่ไฟล์ใน storage
+            setattr(instance, stored_attr, (file.name or "") if file._committed else "")
+
+    def before_save(sender, instance, update_fields=None, **kwargs):
+        if saves_field(instance, update_fields):
+            file = getattr(instance, field)
+            # ไฟล์ใหม่จาก form (ยังไม่ commit): storage.save นับอ้างอิงเพิ่มทุกครั้ง
+            # แม้เนื้อหาซ้ำไฟล์เดิมจนได้ชื่อเดิม -> ต้องคืนอ้างอิงเดิมหนึ่งครั้ง
+            setattr(instance, uploading_attr, bool(file) and not file._committed)
+
+    def after_save(sender, instance, update_fields=None, **kwargs):
+        if not saves_field(instance, update_fields):
+            return
+        old = getattr(instance, stored_attr, "")
+        new = getattr(instance, field).name or ""
+        uploaded = getattr(instance, uploading_attr, False)
+        setattr(instance, stored_attr, new)
+        setattr(instance, uploading_attr, False)
+        if old and (old != new or uploaded):
+            release_file(storage, old)
+
+    def after_delete(sender, instance, **kwargs):
+        release_file(storage, getattr(instance, stored_attr, ""))
+
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=uid)
+    pre_save.connect(before_save, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(after_save, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(after_delete, sender=model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,26 @@
+# base/tasks.py
+"""งานเบื้องหลังของแอป base (ใส่คิวด้วย trainmydog.jobs.enqueue)"""
+import contextlib
+import os
+
+from django.apps import apps
+
+from trainmydog.jobs import task
+
+from .images import generate_variants, save_variants, variant_files
+
+
+@task
+def make_image_variants(model_label, pk, field, name, widths):
+    """ย่อรูป <model>.<field> ของแถว pk (ข้ามถ้ารูปถูกเปลี่ยน/ลบไปแล้วระหว่างรอคิว)"""
+    model = apps.get_model(model_label)
+    if not model.objects.filter(pk=pk, **{field: name}).exists():
+        return
+    storage = model._meta.get_field(field).storage
+    meta = generate_variants(storage.path(name), name, storage.location, widths)
+    if save_variants(model_label, pk, field, meta) or storage.exists(name):
+        return
+    # รูปถูกเปลี่ยนและไฟล์ต้นทางถูกคืนไปแล้วระหว่างย่อ: ไม่มีใครลบรูปย่อที่เพิ่งสร้างให้อีก
+    for variant in variant_files(name, meta["widths"]):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(storage.path(variant))
@@ -0,0 +1,49 @@
+# base/templatetags/images.py
+from django import template
+from django.utils.html import format_html
+
+from base.images import variant_name
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, variants, alt="", css_class="", sizes="100vw", lazy=True):
+    """
+    <picture> พร้อม srcset (WebP + JPEG) จาก <field>_variants, loading="lazy"
+    และ placeholder เบลอเป็นพื้นหลังระหว่างโหลด
+    ถ้ายังสร้างรูปย่อไม่เสร็จ จะใช้ไฟล์ต้นฉบับแทน
+    """
+    if not image:
+        return ""
+    loading = "lazy" if lazy else "eager"
+    variants = variants or {}
+    widths = variants.get("widths") or []
+    if variants.get("name") != image.name or not widths:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            image.url, alt, css_class, loading,
+        )
+
+    storage = image.storage
+
+    def srcset(ext):
+        return ", ".join(
+            f"{storage.url(variant_name(image.name, w, ext))} {w}w" for w in widths
+        )
+
+    style = ""
+    if variants.get("placeholder"):
+        style = f"background-image:url({variants['placeholder']});background-size:cover;background-position:center"
+
+    return format_html(
+        '<picture style="display:contents">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" '
+        'loading="{}" decoding="async" style="{}">'
+        '</picture>',
+        srcset("webp"), sizes,
+        storage.url(variant_name(image.name, widths[-1], "jpg")), srcset("jpg"), sizes,
+        variants.get("width", ""), variants.get("height", ""), alt, css_class,
+        loading, style,
+    )
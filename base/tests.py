@@ -1,3 +1,192 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.db import connection, connections, router, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from trainmydog.jobs import work
+from trainmydog.models import Job
+
+from .dbrouter import PRIMARY, STICKY_COOKIE, sticky_seconds, use_primary
+from .images import AVATAR_WIDTHS, variant_files
+from .models import Profile
+from .tasks import make_image_variants
+
+
+def image_file(color, size=(200, 100)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, "JPEG")
+    return ContentFile(buf.getvalue(), name="avatar.jpg")
+
+
+# ===== รูปย่อ (base/images.py + base/tasks.py) =====
+class ImageVariantTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.profile = User.objects.create_user("member@example.com").profile
+
+    def upload(self, color):
+        self.profile.avatar = image_file(color)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+
+    def variant_paths(self, name):
+        storage = self.profile.avatar.storage
+        return [storage.path(v) for v in variant_files(name, AVATAR_WIDTHS)]
+
+    def test_upload_queues_job_and_worker_writes_variants(self):
+        self.upload("red")
+        job = Job.objects.get()
+        self.assertEqual(job.task, make_image_variants.task_name)
+        self.assertEqual(job.payload["name"], self.profile.avatar.name)
+
+        self.assertEqual(work(burst=True), 1)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.avatar_variants["widths"], list(AVATAR_WIDTHS))
+        self.assertTrue(all(os.path.exists(p) for p in self.variant_paths(self.profile.avatar.name)))
+
+    def test_replacing_image_removes_old_variants(self):
+        self.upload("red")
+        work(burst=True)
+        old_name = self.profile.avatar.name
+        old_paths = self.variant_paths(old_name)
+
+        self.upload("blue")
+        self.assertFalse(any(os.path.exists(p) for p in old_paths))
+        self.assertEqual(self.profile.avatar_variants, {})
+
+        work(burst=True)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.avatar_variants["name"], self.profile.avatar.name)
+
+
+# ===== สิทธิ์ตาม role (base/auth.py) =====
+class RoleAccessTests(TestCase):
+
+    def test_demoted_trainer_loses_access_on_next_request(self):
+        user = User.objects.create_user("trainer@example.com", "trainer@example.com", "x")
+        Profile.objects.filter(user=user).update(role=Profile.Role.TRAINER)
+        self.client.force_login(user)
+        url = reverse("trainmydog:trainer_booking_list")
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        # ถอดสิทธิ์จากที่อื่น (admin / worker อื่น) โดยไม่ผ่าน session ของผู้ใช้คนนี้
+        Profile.objects.filter(user=user).update(role=Profile.Role.MEMBER)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+# ===== บันทึกเฉพาะคอลัมน์ที่เปลี่ยน (Profile.save) =====
+class ProfileDirtyFieldTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user("member@example.com")
+        self.profile = Profile.objects.get(user=user)
+
+    def test_unchanged_save_issues_no_query(self):
+        with self.assertNumQueries(0):
+            self.profile.save()
+            self.profile.phone = self.profile.phone
+            self.profile.save()
+
+    def test_only_changed_columns_are_written(self):
+        self.profile.phone = "0811111111"
+        with CaptureQueriesContext(connection) as ctx:
+            self.profile.save()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        sql = ctx.captured_queries[0]["sql"]
+        self.assertIn('"phone"', sql)
+        self.assertNotIn('"bio"', sql)
+        self.assertNotIn('"role"', sql)
+
+        with self.assertNumQueries(0):
+            self.profile.save()
+
+    def test_update_fields_keeps_other_pending_changes(self):
+        self.profile.phone = "0811111111"
+        self.profile.bio = "ชอบสุนัข"
+        self.profile.save(update_fields=["phone"])
+        self.assertEqual(self.profile.changed_fields(), ["bio"])
+
+        self.profile.save()
+        self.assertEqual(Profile.objects.get(pk=self.profile.pk).bio, "ชอบสุนัข")
+
+
+# ===== แยกอ่าน/เขียน (base/dbrouter.py) =====
+@skipUnless(connection.vendor == "sqlite", "จำลอง replica ด้วยไฟล์ SQLite")
+@override_settings(DATABASE_REPLICAS=["replica"])
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    """replica = ไฟล์ SQLite อีกไฟล์ที่คัดลอกจาก primary ตอน sync_replica() (จำลอง replication แบบ snapshot)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # alias เพิ่มหลัง setUpClass: test runner ไม่รู้จัก alias นี้ (ไม่สร้าง test DB ให้) ไฟล์ได้จาก sync_replica()
+        cls.replica_dir = tempfile.mkdtemp()
+        cls.replica_path = os.path.join(cls.replica_dir, "replica.sqlite3")
+        connections.settings["replica"] = {**connections[PRIMARY].settings_dict, "NAME": cls.replica_path}
+        cls.databases = {*cls.databases, "replica"}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        cls.databases = cls.databases - {"replica"}
+        shutil.rmtree(cls.replica_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.sync_replica()
+
+    def sync_replica(self):
+        connections["replica"].close()
+        connections[PRIMARY].ensure_connection()
+        with closing(sqlite3.connect(self.replica_path)) as replica:
+            connections[PRIMARY].connection.backup(replica)
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(Profile.objects.all().db, "replica")
+        self.assertEqual(Profile.objects.select_for_update().db, PRIMARY)
+        self.assertEqual(router.db_for_write(Profile), PRIMARY)
+        with transaction.atomic():
+            self.assertEqual(Profile.objects.all().db, PRIMARY)
+        with use_primary():
+            self.assertEqual(Profile.objects.all().db, PRIMARY)
+        self.assertFalse(router.allow_migrate("replica", "base"))
+
+        user = User.objects.create_user("member@example.com")
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())  # replica ยังไม่ได้ sync
+        self.sync_replica()
+        self.assertTrue(User.objects.filter(pk=user.pk).exists())
+
+    def test_user_reads_own_writes_for_sticky_window(self):
+        user = User.objects.create_user("member@example.com", email="member@example.com", first_name="ชื่อเดิม")
+        self.client.force_login(user)
+        self.sync_replica()  # replica เห็นผู้ใช้ + session แต่ไม่เห็นการแก้ไขถัดไป
+
+        response = self.client.post(reverse("Authen:profile_edit"), {
+            "first_name": "ชื่อใหม่", "last_name": "", "phone": "0800000000", "bio": "",
+        })
+        self.assertEqual(response.status_code, 302)
+        sticky = response.cookies[STICKY_COOKIE]
+        self.assertEqual(sticky["max-age"], sticky_seconds())
+        self.assertContains(self.client.get(reverse("Authen:profile")), "ชื่อใหม่")
+
+        # หมดช่วงติด primary -> อ่านจาก replica ที่ยังเป็นค่าเดิม
+        self.client.cookies[STICKY_COOKIE] = "0"
+        self.assertContains(self.client.get(reverse("Authen:profile")), "ชื่อเดิม")
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import AuthLoginView, logout_view, register_view, profile_view, profile_edit_view
+from .views import AuthLoginView, logout_view, register_view, profile_view, profile_edit_view, db_pool_metrics
 
 app_name = 'Authen'
 
@@ -9,4 +9,5 @@ urlpatterns = [
     path('register/', register_view, name='register'),
     path('profile/', profile_view, name='profile'),
     path('profile/edit/', profile_edit_view, name='profile_edit'),
+    path('metrics/db-pool/', db_pool_metrics, name='db_pool_metrics'),
 ]
@@ -1,9 +1,15 @@
 # base/views.py
+import os
+
 from django.contrib.auth import login, logout
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import JsonResponse
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.views.decorators.cache import never_cache
 
 from .models import Profile
 from .forms import RegisterForm, UserUpdateForm, ProfileUpdateForm
@@ -84,7 +90,7 @@ def profile_edit_view(request):
     # เคสคลิกปุ่ม "ลบรูปโปรไฟล์"
     if request.method == 'POST' and 'delete_avatar' in request.POST:
         if profile.avatar:
-            profile.avatar.delete(save=False)
+            # ไฟล์เดิมถูกคืนให้ storage หลังบันทึก (register_file_cleanup ใน base/models.py)
             profile.avatar = None
             profile.save(update_fields=['avatar'])
         return redirect('Authen:profile_edit')
@@ -112,3 +118,19 @@ def profile_edit_view(request):
         'uform': uform,
         'pform': pform,
     })
+
+
+@never_cache
+@staff_member_required
+def db_pool_metrics(request):
+    """
+    metrics ของ connection pool (base/db/mysql_pool) ใน process ที่รับ request นี้
+    (แต่ละ worker มี pool ของตัวเอง ค่าจึงเป็นของ worker เดียว) ฐานข้อมูลที่ไม่ใช้ pool = null
+    """
+    return JsonResponse({
+        "pid": os.getpid(),
+        "databases": {
+            alias: getattr(connections[alias], "pool_stats", lambda: None)()
+            for alias in connections
+        },
+    })
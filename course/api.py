@@ -0,0 +1,245 @@
+# course/api.py
+"""
+JSON API (อ่านอย่างเดียว) ของคอร์สและรอบเรียน สำหรับแอปมือถือ — /api/v1/
+
+- เห็นเฉพาะคอร์สเดียวกับหน้าแรก (Course.objects.public())
+- serialize จาก .values() ตรงๆ ไม่สร้าง model instance
+- ?fields=id,title,rounds เลือกเฉพาะฟิลด์ที่ต้องการ (SELECT เฉพาะคอลัมน์ที่ใช้)
+- รายการแบ่งหน้าแบบ cursor (trainmydog/pagination.py) ?cursor= / ?limit=
+- รอบเรียนของทั้งหน้าโหลดด้วย query เพิ่มอีกหนึ่งครั้งเท่านั้น
+- response แคชแบบเดียวกับหน้า public (ETag + anonymous_page_cache)
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from base.images import variant_name
+from trainmydog.cache import anonymous_page_cache, public_page_condition
+from trainmydog.pagination import (
+    DEFAULT_PER_PAGE, MAX_PER_PAGE, decode_cursor, encode_position, keyset_queryset,
+)
+
+from .models import Course, CourseRound, display_mask, mask_to_days
+
+_cover_storage = Course._meta.get_field("cover_image").storage
+
+
+def _trainer_name(row):
+    full = f"{row['trainer__first_name']} {row['trainer__last_name']}".strip()
+    return full or row["trainer__username"]
+
+
+def _cover_image(row, request):
+    """URL รูปปก + รูปย่อ (ถ้าสร้างเสร็จแล้ว) แบบ URL เต็ม"""
+    name = row["cover_image"]
+    if not name:
+        return None
+    variants = row["cover_image_variants"] or {}
+    # รูปย่อที่สร้างไว้เป็นของไฟล์เก่า (เปลี่ยนรูปแล้วยังย่อไม่เสร็จ) -> ส่งแค่ต้นฉบับ
+    widths = (variants.get("widths") or []) if variants.get("name") == name else []
+    return {
+        "url": request.build_absolute_uri(_cover_storage.url(name)),
+        "width": variants.get("width") if widths else None,
+        "height": variants.get("height") if widths else None,
+        "placeholder": variants.get("placeholder") if widths else None,
+        "variants": [
+            {
+                "width": w,
+                "webp": request.build_absolute_uri(_cover_storage.url(variant_name(name, w, "webp"))),
+                "jpg": request.build_absolute_uri(_cover_storage.url(variant_name(name, w, "jpg"))),
+            }
+            for w in widths
+        ],
+    }
+
+
+def _column(name):
+    return (name,), lambda row, request: row[name]
+
+
+# ===== ฟิลด์ของคอร์ส: ชื่อใน API -> (คอลัมน์ใน .values(), ฟังก์ชันแปลงค่า) =====
+COURSE_FIELDS = {
+    "id": _column("id"),
+    "title": _column("title"),
+    "description": _column("description"),
+    "duration_hr": _column("duration_hr"),
+    "price": _column("price"),
+    "deposit_price": _column("deposit_price"),
+    "location": _column("location"),
+    "max_dogs": _column("max_dogs"),
+    "benefits": _column("benefits"),
+    "weekdays": (
+        ("weekday_mask",),
+        lambda row, request: mask_to_days(row["weekday_mask"]),
+    ),
+    "weekdays_display": (
+        ("weekday_mask",),
+        lambda row, request: display_mask(row["weekday_mask"]),
+    ),
+    "cover_image": (("cover_image", "cover_image_variants"), _cover_image),
+    "trainer": (
+        ("trainer_id", "trainer__first_name", "trainer__last_name", "trainer__username"),
+        lambda row, request: {"id": row["trainer_id"], "name": _trainer_name(row)},
+    ),
+    "created_at": _column("created_at"),
+    "updated_at": _column("updated_at"),
+    "rounds": ((), None),  # เติมใน serialize_courses ด้วย rounds_by_course (query เดียวต่อหน้า)
+}
+DEFAULT_FIELDS = tuple(COURSE_FIELDS)
+ROUND_COLUMNS = ("id", "course_id", "weekday_mask", "start_time", "end_time")
+
+
+class FieldError(ValueError):
+    pass
+
+
+def parse_fields(raw):
+    """?fields=a,b -> tuple ของชื่อฟิลด์ (ไม่ระบุ = ทุกฟิลด์) ชื่อที่ไม่รู้จัก -> FieldError"""
+    if not raw:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in COURSE_FIELDS]
+    if unknown or not fields:
+        raise FieldError(f"ไม่รู้จักฟิลด์: {', '.join(unknown) or raw}")
+    return fields
+
+
+def course_columns(fields):
+    """คอลัมน์ที่ต้อง SELECT สำหรับฟิลด์ที่เลือก (id / created_at มีเสมอ ใช้ทำ cursor และผูกรอบเรียน)"""
+    columns = {"id": None, "created_at": None}
+    for name in fields:
+        columns.update(dict.fromkeys(COURSE_FIELDS[name][0]))
+    return list(columns)
+
+
+def serialize_round(row):
+    return {
+        "id": row["id"],
+        "weekdays": mask_to_days(row["weekday_mask"]),
+        "weekdays_display": display_mask(row["weekday_mask"]),
+        "start_time": row["start_time"].strftime("%H:%M"),
+        "end_time": row["end_time"].strftime("%H:%M"),
+    }
+
+
+def _rounds_queryset(course_ids):
+    return (
+        CourseRound.objects.filter(course_id__in=course_ids)
+        .order_by("course_id", "start_time", "pk")
+        .values(*ROUND_COLUMNS)
+    )
+
+
+def rounds_by_course(course_ids):
+    """{course_id: [รอบ, ...]} ของหลายคอร์สด้วย query เดียว"""
+    grouped = {pk: [] for pk in course_ids}
+    if grouped:
+        for row in _rounds_queryset(grouped):
+            grouped[row["course_id"]].append(serialize_round(row))
+    return grouped
+
+
+async def arounds_by_course(course_ids):
+    grouped = {pk: [] for pk in course_ids}
+    if grouped:
+        async for row in _rounds_queryset(grouped):
+            grouped[row["course_id"]].append(serialize_round(row))
+    return grouped
+
+
+def serialize_courses(rows, fields, request, rounds=None):
+    """
+    แถวจาก .values() -> list ของ dict ตาม fields
+    rounds: ผลของ rounds_by_course ที่โหลดไว้แล้ว (async view) ไม่ส่ง = โหลดเองถ้าขอฟิลด์ rounds
+    """
+    rows = list(rows)
+    if rounds is None and "rounds" in fields:
+        rounds = rounds_by_course([r["id"] for r in rows])
+    converters = [(name, COURSE_FIELDS[name][1]) for name in fields]
+    items = []
+    for row in rows:
+        item = {}
+        for name, convert in converters:
+            item[name] = rounds[row["id"]] if convert is None else convert(row, request)
+        items.append(item)
+    return items
+
+
+async def aserialize_courses(rows, fields, request):
+    rounds = await arounds_by_course([r["id"] for r in rows]) if "rounds" in fields else None
+    return serialize_courses(rows, fields, request, rounds)
+
+
+def _error(message, status):
+    return JsonResponse({"error": message}, status=status, json_dumps_params={"ensure_ascii": False})
+
+
+def _json(data):
+    return JsonResponse(data, encoder=DjangoJSONEncoder, json_dumps_params={"ensure_ascii": False})
+
+
+def _limit(raw):
+    try:
+        return max(1, min(int(raw), MAX_PER_PAGE))
+    except (TypeError, ValueError):
+        return DEFAULT_PER_PAGE
+
+
+# ===== views (async: ใต้ ASGI ไม่ถือ thread ไว้ระหว่างรอฐานข้อมูล) =====
+@require_GET
+@public_page_condition
+@anonymous_page_cache
+async def course_list(request):
+    """GET /api/v1/courses/?fields=&cursor=&limit= — คอร์สใหม่สุดก่อน"""
+    try:
+        fields = parse_fields(request.GET.get("fields"))
+    except FieldError as exc:
+        return _error(str(exc), 400)
+    token = request.GET.get("cursor")
+    position = decode_cursor(token)
+    if token and position is None:
+        return _error("cursor ไม่ถูกต้อง", 400)
+    limit = _limit(request.GET.get("limit"))
+
+    qs = keyset_queryset(Course.objects.public(), position).values(*course_columns(fields))
+    rows = [row async for row in qs[:limit + 1]]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_position(rows[-1]["created_at"], rows[-1]["id"])
+
+    return _json({
+        "results": await aserialize_courses(rows, fields, request),
+        "next_cursor": next_cursor,
+    })
+
+
+@require_GET
+@public_page_condition(course_kwarg="pk")
+@anonymous_page_cache(course_kwarg="pk")
+async def course_detail(request, pk):
+    """GET /api/v1/courses/<pk>/?fields="""
+    try:
+        fields = parse_fields(request.GET.get("fields"))
+    except FieldError as exc:
+        return _error(str(exc), 400)
+    rows = [row async for row in Course.objects.public().filter(pk=pk).values(*course_columns(fields))]
+    if not rows:
+        return _error("ไม่พบคอร์ส", 404)
+    return _json((await aserialize_courses(rows, fields, request))[0])
+
+
+@require_GET
+@public_page_condition(course_kwarg="pk")
+@anonymous_page_cache(course_kwarg="pk")
+async def course_rounds(request, pk):
+    """GET /api/v1/courses/<pk>/rounds/"""
+    rows = [
+        row async for row in
+        CourseRound.objects.filter(course__in=Course.objects.public().filter(pk=pk))
+        .order_by("start_time", "pk")
+        .values(*ROUND_COLUMNS)
+    ]
+    if not rows and not await Course.objects.public().filter(pk=pk).aexists():
+        return _error("ไม่พบคอร์ส", 404)
+    return _json({"results": [serialize_round(row) for row in rows]})
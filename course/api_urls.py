@@ -0,0 +1,11 @@
+# course/api_urls.py
+from django.urls import path
+from . import api
+
+app_name = "api_v1"
+
+urlpatterns = [
+    path("courses/", api.course_list, name="course_list"),
+    path("courses/<int:pk>/", api.course_detail, name="course_detail"),
+    path("courses/<int:pk>/rounds/", api.course_rounds, name="course_rounds"),
+]
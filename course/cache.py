@@ -0,0 +1,51 @@
+# course/cache.py
+"""
+แคชรายการรอบเรียน (CourseRound) ต่อคอร์ส
+
+key ของแต่ละคอร์สผูกกับ Course.updated_at ของ instance ที่โหลดมาจากฐานข้อมูล
+(บันทึก/ลบ CourseRound จะเลื่อน updated_at ของคอร์สด้วย ดู course/models.py)
+รอบที่ถูกแก้จึงใช้ key ใหม่ทันทีในทุก worker โดยไม่ต้องพึ่ง version ที่เก็บในแคช
+และหน้าที่เปิดซ้ำ (รายละเอียดคอร์ส / ฟอร์มจอง) ไม่ต้อง query รอบเรียนเลย
+"""
+from django.core.cache import cache
+
+from base.dbrouter import use_primary
+
+ROUNDS_CACHE_TIMEOUT = 60 * 60
+
+
+def _rounds_key(course):
+    return f"course:{course.pk}:rounds:{course.updated_at.timestamp():.6f}"
+
+
+def get_cached_rounds(course):
+    """list ของ CourseRound ของคอร์ส (จาก cache ถ้ามี ไม่งั้น query แล้วเก็บไว้)"""
+    key = _rounds_key(course)
+    fk = course.rounds.field
+    rounds = cache.get(key)
+    if rounds is None:
+        with use_primary():  # ไม่เก็บข้อมูลเก่าจาก replica ไว้ใต้ key ใหม่
+            rounds = list(course.rounds.all())
+        # ไม่เก็บ course ที่ผูกอยู่กับแต่ละรอบลง cache (ผูกกลับตอนอ่าน)
+        for r in rounds:
+            fk.delete_cached_value(r)
+        cache.set(key, rounds, ROUNDS_CACHE_TIMEOUT)
+    for r in rounds:
+        fk.set_cached_value(r, course)
+    return rounds
+
+
+async def aget_cached_rounds(course):
+    """get_cached_rounds สำหรับ async view"""
+    key = _rounds_key(course)
+    fk = course.rounds.field
+    rounds = await cache.aget(key)
+    if rounds is None:
+        with use_primary():
+            rounds = [r async for r in course.rounds.all()]
+        for r in rounds:
+            fk.delete_cached_value(r)
+        await cache.aset(key, rounds, ROUNDS_CACHE_TIMEOUT)
+    for r in rounds:
+        fk.set_cached_value(r, course)
+    return rounds
@@ -1,6 +1,8 @@
 from django import forms
-from django.forms import inlineformset_factory
-from .models import Course, CourseRound
+from django.forms import BaseInlineFormSet, inlineformset_factory
+from .models import Course, CourseRound, days_to_mask, display_mask, mask_to_days, masks_with_any_day
+from .geo import geocode
+from .schedule import find_overlaps
 
 class CourseForm(forms.ModelForm): 
     class Meta:
@@ -58,8 +60,9 @@ class CourseRoundForm(forms.ModelForm):
             self.fields["days"].initial = [str(x) for x in self.instance.days or []]
 
     def clean_days(self):
+        # เรียง + ตัดซ้ำ: CourseRound.save() แปลงเป็น weekday_mask จากค่านี้
         data = self.cleaned_data.get("days") or []
-        return [int(x) for x in data]
+        return sorted({int(x) for x in data})
 
     def clean(self):
         cleaned = super().clean()
@@ -73,11 +76,143 @@ class CourseRoundForm(forms.ModelForm):
                 raise forms.ValidationError("เวลาสิ้นสุดต้องมากกว่าเวลาเริ่ม")
         return cleaned
 
+class BaseCourseRoundFormSet(BaseInlineFormSet):
+    """
+    ตรวจเวลาชนของรอบเรียน: ระหว่างรอบในฟอร์มเดียวกัน และกับทุกรอบของคอร์สอื่นของครูฝึกคนเดียวกัน
+    ข้อความผิดพลาดติดอยู่ที่แถวของฟอร์มที่ชน (ดู course/schedule.py)
+    """
+
+    def __init__(self, *args, trainer=None, **kwargs):
+        self.trainer = trainer
+        super().__init__(*args, **kwargs)
+
+    def clean(self):
+        super().clean()
+        rows = {}
+        for i, form in enumerate(self.forms):
+            data = getattr(form, "cleaned_data", None) or {}
+            if not data.get("days") or not data.get("start_time") or not data.get("end_time"):
+                continue
+            if self._should_delete_form(form) or form.errors:
+                continue
+            rows[("form", i)] = (days_to_mask(data["days"]), data["start_time"], data["end_time"])
+        if not rows:
+            return
+
+        others = {}
+        if self.trainer is not None:
+            wanted = 0
+            for mask, _, _ in rows.values():
+                wanted |= mask
+            existing = (
+                CourseRound.objects
+                .filter(course__trainer=self.trainer, weekday_mask__in=masks_with_any_day(mask_to_days(wanted)))
+                .values_list("pk", "course__title", "weekday_mask", "start_time", "end_time")
+            )
+            if self.instance.pk:
+                # รอบของคอร์สนี้อยู่ในฟอร์มแล้ว (รวมที่กำลังแก้ / ลบ)
+                existing = existing.exclude(course=self.instance)
+            for pk, title, mask, start, end in existing:
+                others[("round", pk)] = (title, mask, start, end)
+
+        slots = [(key, *value) for key, value in rows.items()]
+        slots += [(key, mask, start, end) for key, (_, mask, start, end) in others.items()]
+        for (a, b), days in find_overlaps(slots).items():
+            days_text = display_mask(days_to_mask(days))
+            if a[0] == "form" and b[0] == "form":
+                self.forms[a[1]].add_error(None, f"เวลาชนกับรอบที่ {b[1] + 1} ของคอร์สนี้ (วัน{days_text})")
+                self.forms[b[1]].add_error(None, f"เวลาชนกับรอบที่ {a[1] + 1} ของคอร์สนี้ (วัน{days_text})")
+                continue
+            row, other = (a, b) if a[0] == "form" else (b, a)
+            if row[0] != "form":
+                continue  # รอบเดิมในฐานข้อมูลชนกันเอง ไม่เกี่ยวกับฟอร์มนี้
+            title, _, start, end = others[other]
+            self.forms[row[1]].add_error(
+                None, f"เวลาชนกับรอบ {start:%H:%M}-{end:%H:%M} ของคอร์ส “{title}” (วัน{days_text})"
+            )
+
+
 CourseRoundFormSet = inlineformset_factory(
     parent_model=Course,
     model=CourseRound,
     form=CourseRoundForm,
+    formset=BaseCourseRoundFormSet,
     fields=["days", "start_time", "end_time"],
     extra=1,
     can_delete=True,
 )
+
+
+class ScheduleFilterForm(forms.Form):
+    """
+    ตัวกรองคอร์สตามวันและช่วงเวลาเริ่มของรอบเรียน (หน้าแรก)
+    เป็น query เดียว: คอร์สที่มีรอบ weekday_mask IN (...) AND start_time ในช่วง
+    ผ่าน index (weekday_mask, start_time) ของ CourseRound
+    """
+    day = forms.TypedMultipleChoiceField(
+        choices=Course.Day.choices, coerce=int, required=False,
+        widget=forms.CheckboxSelectMultiple, label="วันที่สะดวก",
+    )
+    start_from = forms.TimeField(required=False, label="เริ่มตั้งแต่")
+    start_to = forms.TimeField(required=False, label="ถึง")
+
+    def clean(self):
+        cleaned = super().clean()
+        start, end = cleaned.get("start_from"), cleaned.get("start_to")
+        if start and end and start > end:
+            raise forms.ValidationError("เวลาเริ่มต้องไม่อยู่หลังเวลาสิ้นสุดของช่วง")
+        return cleaned
+
+    @property
+    def is_filtering(self):
+        data = getattr(self, "cleaned_data", {})
+        return bool(data.get("day") or data.get("start_from") or data.get("start_to"))
+
+    def filter_courses(self, queryset):
+        """เรียก is_valid() ก่อน (ช่องที่ไม่ถูกต้องจะถูกข้าม)"""
+        if not self.is_filtering:
+            return queryset
+        data = self.cleaned_data
+        # ไม่ได้เลือกวัน = ทุกวัน (รอบที่ไม่มีวันเลยไม่นับ)
+        rounds = CourseRound.objects.filter(weekday_mask__in=masks_with_any_day(data.get("day") or range(7)))
+        if data.get("start_from"):
+            rounds = rounds.filter(start_time__gte=data["start_from"])
+        if data.get("start_to"):
+            rounds = rounds.filter(start_time__lte=data["start_to"])
+        return queryset.filter(pk__in=rounds.values("course_id"))
+
+
+class NearbyFilterForm(forms.Form):
+    """
+    "คอร์สใกล้ฉัน" (หน้าแรก): ชื่ออำเภอ/เขต/จังหวัด หรือพิกัดจากปุ่ม "ใช้ตำแหน่งของฉัน" + รัศมี
+    ค้นผ่าน index ของช่องตาราง แล้วเรียงตามระยะจริง (course/geo.py)
+    """
+    RADIUS_CHOICES = [(5, "5 กม."), (10, "10 กม."), (25, "25 กม."), (50, "50 กม."), (100, "100 กม.")]
+
+    near = forms.CharField(required=False, max_length=100, label="ใกล้")
+    lat = forms.FloatField(required=False, min_value=-90, max_value=90, widget=forms.HiddenInput)
+    lng = forms.FloatField(required=False, min_value=-180, max_value=180, widget=forms.HiddenInput)
+    radius = forms.TypedChoiceField(choices=RADIUS_CHOICES, coerce=int, required=False, empty_value=25, label="รัศมี")
+
+    def clean(self):
+        cleaned = super().clean()
+        near = (cleaned.get("near") or "").strip()
+        cleaned["origin"] = None
+        if near:
+            place = geocode(near)
+            if place is None:
+                self.add_error("near", "ไม่รู้จักสถานที่นี้ ลองพิมพ์ชื่ออำเภอ/เขต หรือจังหวัด")
+            else:
+                cleaned["origin"] = (place.lat, place.lng, place.label)
+        elif cleaned.get("lat") is not None and cleaned.get("lng") is not None:
+            cleaned["origin"] = (cleaned["lat"], cleaned["lng"], "ตำแหน่งของฉัน")
+        return cleaned
+
+    @property
+    def origin(self):
+        """(lat, lng, ชื่อที่แสดง) ของจุดค้น หรือ None — เรียก is_valid() ก่อน"""
+        return getattr(self, "cleaned_data", {}).get("origin")
+
+    @property
+    def radius_km(self):
+        return getattr(self, "cleaned_data", {}).get("radius") or 25
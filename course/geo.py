@@ -0,0 +1,295 @@
+# course/geo.py
+"""
+"คอร์สใกล้ฉัน": แปลง Course.location (ข้อความอิสระ) เป็นพิกัดแบบออฟไลน์ แล้วค้นตามรัศมี
+
+- geocode: จับคู่ชื่ออำเภอ/เขต/จังหวัดจากทำเนียบ data/th_gazetteer.tsv (ไม่เรียกบริการภายนอก)
+  ได้พิกัดจุดกลางของอำเภอ/จังหวัดนั้น — ละเอียดพอสำหรับ "ใกล้ฉัน" ในระดับกิโลเมตร
+- grid_cell: เลขช่องตาราง GRID_DEGREES องศา (แถว x คอลัมน์) เก็บใน Course.geo_cell ที่มี index
+  ช่องในแถวเดียวกันเป็นเลขติดกัน กรอบสี่เหลี่ยมรอบจุดค้นจึงเป็นช่วงเดียวต่อแถว
+- ค้นตามรัศมี: (1) จำนวนคอร์สต่อพิกัด (เรียงตาม geo_cell) แคชไว้ตาม version ของหน้ารายการ
+  (2) ตัดด้วยกรอบบนช่องตาราง (bisect) แล้วคิด haversine ของพิกัดที่เหลือในรอบเดียว เรียงใกล้สุดก่อน
+  (3) ดึงเฉพาะคอร์สของหน้าจากพิกัดที่ใกล้ที่สุด ผ่าน index (geo_cell, geo_lat, geo_lng) เรียงใน SQL
+- แบ่งหน้าด้วย cursor (ระยะ, id) ของแถวสุดท้าย หน้าตาเดียวกับ trainmydog/pagination.py
+"""
+import base64
+import bisect
+import math
+from collections import namedtuple
+from functools import lru_cache
+from itertools import repeat
+from operator import itemgetter
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+from base.dbrouter import use_primary
+from trainmydog.cache import apage_version, page_version
+from trainmydog.pagination import DEFAULT_PER_PAGE, MAX_PER_PAGE, CursorPage
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / "data" / "th_gazetteer.tsv"
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+GRID_DEGREES = 0.1  # ~11 กม. ต่อช่อง (แนวเหนือ-ใต้)
+_GRID_COLUMNS = round(360 / GRID_DEGREES)
+POINTS_CACHE_TIMEOUT = 60 * 60
+
+
+class Place(namedtuple("Place", "province district lat lng")):
+    __slots__ = ()
+
+    @property
+    def label(self):
+        return f"{self.district}, {self.province}" if self.district else self.province
+
+
+def _latin_key(text):
+    """ตัวอักษรอังกฤษ/ตัวเลขเป็นคำคั่นด้วยช่องว่างเดียว มีช่องว่างหัวท้าย (จับคู่ทั้งคำ)"""
+    words = "".join(ch if ch.isascii() and ch.isalnum() else " " for ch in text.lower()).split()
+    return f" {' '.join(words)} "
+
+
+def _thai_key(text):
+    return "".join(text.split())
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    """คืน (ชื่อไทย, ชื่ออังกฤษ): list ของ (คำที่ใช้จับคู่, Place) เรียงคำยาวก่อน"""
+    thai, latin = [], []
+    with open(GAZETTEER_PATH, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip() or line.startswith("#"):
+                continue
+            province, district, lat, lng, names = line.rstrip("\n").split("\t")
+            place = Place(province, district, float(lat), float(lng))
+            for name in names.split(","):
+                if name.isascii():
+                    latin.append((_latin_key(name), place))
+                else:
+                    thai.append((_thai_key(name), place))
+    thai.sort(key=lambda item: -len(item[0]))
+    latin.sort(key=lambda item: -len(item[0]))
+    return tuple(thai), tuple(latin)
+
+
+def _matches(text, needles):
+    """ชื่อที่พบใน text โดยชื่อที่สั้นกว่าและอยู่ในช่วงของชื่อที่ยาวกว่าไม่นับ (พระนคร ใน พระนครศรีอยุธยา)"""
+    taken, found = [], []
+    for needle, place in needles:
+        pad = len(needle) - len(needle.strip())  # ช่องว่างหัว/ท้ายของชื่ออังกฤษไม่นับเป็นช่วงของคำ
+        start = text.find(needle)
+        while start != -1:
+            lo, hi = start + pad // 2, start + len(needle) - pad // 2
+            if not any(s < hi and lo < e for s, e in taken):
+                taken.append((lo, hi))
+                found.append(place)
+                break
+            start = text.find(needle, start + 1)
+    return found
+
+
+def geocode(text):
+    """
+    ข้อความสถานที่ -> Place หรือ None
+    อำเภอ/เขตมาก่อนจังหวัด และถ้ามีหลายอำเภอ เลือกอำเภอที่อยู่ในจังหวัดที่ระบุไว้ด้วย
+    """
+    if not text:
+        return None
+    thai, latin = load_gazetteer()
+    hits = _matches(_thai_key(text), thai) + _matches(_latin_key(text), latin)
+    if not hits:
+        return None
+    named_provinces = {p.province for p in hits if not p.district}
+    districts = [p for p in hits if p.district]
+    for place in districts:
+        if place.province in named_provinces:
+            return place
+    return districts[0] if districts else hits[0]
+
+
+def _grid_row(lat):
+    return math.floor((lat + 90) / GRID_DEGREES)
+
+
+def _grid_col(lng):
+    return math.floor((lng + 180) / GRID_DEGREES) % _GRID_COLUMNS
+
+
+def grid_cell(lat, lng):
+    return _grid_row(lat) * _GRID_COLUMNS + _grid_col(lng)
+
+
+def locate(text):
+    """ค่าของ (geo_lat, geo_lng, geo_cell) สำหรับ Course.location นี้ (None ทั้งหมดถ้าหาไม่พบ)"""
+    place = geocode(text)
+    if place is None:
+        return None, None, None
+    return place.lat, place.lng, grid_cell(place.lat, place.lng)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+# ===== ค้นตามรัศมี =====
+def cell_ranges(lat, lng, radius_km):
+    """ช่วงของ geo_cell (ต่ำสุด, สูงสุด) หนึ่งช่วงต่อแถว ที่ครอบกรอบสี่เหลี่ยมรอบวงกลม (ไม่ข้ามเส้น 180°)"""
+    dlat = radius_km / KM_PER_DEGREE
+    dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    west, east = _grid_col(lng - dlng), _grid_col(lng + dlng)
+    return [
+        (row * _GRID_COLUMNS + west, row * _GRID_COLUMNS + east)
+        for row in range(_grid_row(max(lat - dlat, -90.0)), _grid_row(min(lat + dlat, 89.999)) + 1)
+    ]
+
+
+def catalogue_points_query():
+    """(geo_cell, lat, lng, จำนวนคอร์ส) ต่อพิกัดของคอร์สที่คนทั่วไปเห็น — รวมกลุ่มใน SQL ไม่ดึงทีละคอร์ส"""
+    from .models import Course  # course.models ใช้ locate จาก module นี้
+    return (
+        Course.objects.public().exclude(geo_cell=None).order_by()
+        .values_list("geo_cell", "geo_lat", "geo_lng").annotate(courses=Count("pk"))
+    )
+
+
+def _points_key(version):
+    return f"geo:points:{version}"
+
+
+def catalogue_points():
+    """
+    list ของ (geo_cell, lat, lng, จำนวนคอร์ส) เรียงตาม geo_cell (ใช้ bisect หาช่วงของแต่ละแถวได้)
+    แคชตาม version ของหน้ารายการ (page_version ใน trainmydog/cache.py) ที่เปลี่ยนตอนบันทึก/ลบคอร์สหรือ
+    เปลี่ยน role ครูฝึก อ่านจากแคชกลางอย่างเดียว ไม่ query ทั้งแคตตาล็อก — คอร์สนับซ้ำกันที่จุดกลางอำเภอ
+    ทั้งแคตตาล็อกจึงเหลือไม่กี่ร้อยพิกัด
+    """
+    key = _points_key(page_version())
+    points = cache.get(key)
+    if points is None:
+        with use_primary():
+            points = sorted(catalogue_points_query())
+        cache.set(key, points, POINTS_CACHE_TIMEOUT)
+    return points
+
+
+async def acatalogue_points():
+    key = _points_key(await apage_version())
+    points = await cache.aget(key)
+    if points is None:
+        with use_primary():
+            points = sorted([row async for row in catalogue_points_query()])
+        await cache.aset(key, points, POINTS_CACHE_TIMEOUT)
+    return points
+
+
+def points_within(points, lat, lng, radius_km):
+    """
+    points (เรียงตาม geo_cell) -> list ของ (ระยะ กม., lat, lng, จำนวนคอร์ส) ในรัศมี ใกล้สุดก่อน
+    กรอบสี่เหลี่ยม = ช่วงของ geo_cell ต่อแถว (bisect) แล้วคิด haversine ทั้งคอลัมน์ในรอบเดียว
+    """
+    cell = itemgetter(0)
+    box = []
+    for low, high in cell_ranges(lat, lng, radius_km):
+        box += points[bisect.bisect_left(points, low, key=cell):bisect.bisect_right(points, high, key=cell)]
+    if not box:
+        return []
+    _, lats, lngs, counts = zip(*box)
+    distances = map(haversine_km, repeat(lat), repeat(lng), lats, lngs)
+    ranked = [row for row in zip(distances, lats, lngs, counts) if row[0] <= radius_km]
+    ranked.sort()
+    return ranked
+
+
+def encode_distance_cursor(distance, pk):
+    raw = f"{distance!r}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_distance_cursor(token):
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode((token + "=" * (-len(token) % 4)).encode()).decode()
+        distance, pk = raw.rsplit("|", 1)
+        return float(distance), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _point_batches(ranked, position, per_page):
+    """
+    พิกัดถัดจาก position แบ่งเป็นชุด ชุดละพอให้ได้คอร์สเกิน per_page ตามจำนวนที่นับไว้ (ไม่ตัดกลางระยะที่เท่ากัน)
+    yield list ของ (ระยะ, lat, lng, ต่อจาก id) — ต่อจาก id ใช้กับพิกัดที่ระยะเท่ากับแถวสุดท้ายของหน้าก่อน
+    """
+    after_distance, after_pk = position or (-1.0, None)
+    batch, expected = [], 0
+    for distance, plat, plng, count in ranked[bisect.bisect_left(ranked, after_distance, key=itemgetter(0)):]:
+        if expected > per_page and distance != batch[-1][0]:
+            yield batch
+            batch, expected = [], 0
+        tie = distance == after_distance
+        batch.append((distance, plat, plng, after_pk if tie else None))
+        expected += 0 if tie else count
+    if batch:
+        yield batch
+
+
+def _batch_queryset(queryset, batch):
+    """คอร์สของพิกัดในชุด เรียง (ระยะ, -id) ใน SQL: ลำดับของระยะด้วย CASE ตามด้วย -id"""
+    q, whens, rank, last = Q(), [], -1, None
+    for distance, plat, plng, after_pk in batch:
+        point = Q(geo_cell=grid_cell(plat, plng), geo_lat=plat, geo_lng=plng)
+        q |= point if after_pk is None else point & Q(pk__lt=after_pk)
+        if distance != last:  # พิกัดที่ระยะเท่ากันได้ลำดับเดียวกัน -> เรียงรวมกันด้วย -id
+            rank, last = rank + 1, distance
+        whens.append(When(point, then=Value(rank)))
+    if rank == 0:  # ระยะเดียวทั้งชุด (มักเป็นพิกัดเดียว): เรียงด้วย -id อย่างเดียว เดินตาม index ได้
+        return queryset.filter(q).order_by("-pk")
+    return queryset.filter(q).annotate(geo_rank=Case(*whens, output_field=IntegerField())).order_by("geo_rank", "-pk")
+
+
+def _cut_nearby_page(rows, distances, per_page, cursor, position):
+    for obj in rows:
+        obj.distance_km = distances[(obj.geo_lat, obj.geo_lng)]
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_distance_cursor(rows[-1].distance_km, rows[-1].pk)
+    return CursorPage(rows, next_cursor=next_cursor, cursor=cursor if position else None)
+
+
+def nearby_page(queryset, lat, lng, radius_km, cursor=None, per_page=DEFAULT_PER_PAGE):
+    """
+    หนึ่งหน้าของคอร์สใน queryset ที่อยู่ในรัศมี เรียงใกล้สุดก่อน (ระยะเท่ากัน: ใหม่กว่าก่อน)
+    ปกติเป็น query เดียว; ถ้าตัวกรองของ queryset (วัน/เวลา, ครูฝึก) ตัดคอร์สจนหน้ายังไม่เต็ม
+    จะดึงชุดพิกัดที่ไกลถัดไปต่อ แต่ละ object มี distance_km
+    """
+    per_page = max(1, min(int(per_page), MAX_PER_PAGE))
+    position = decode_distance_cursor(cursor)
+    ranked = points_within(catalogue_points(), lat, lng, radius_km)
+    rows, distances = [], {}
+    for batch in _point_batches(ranked, position, per_page):
+        distances.update(((plat, plng), distance) for distance, plat, plng, _ in batch)
+        rows += _batch_queryset(queryset, batch)[:per_page + 1 - len(rows)]
+        if len(rows) > per_page:
+            break
+    return _cut_nearby_page(rows, distances, per_page, cursor, position)
+
+
+async def anearby_page(queryset, lat, lng, radius_km, cursor=None, per_page=DEFAULT_PER_PAGE):
+    """nearby_page สำหรับ async view (async ORM)"""
+    per_page = max(1, min(int(per_page), MAX_PER_PAGE))
+    position = decode_distance_cursor(cursor)
+    ranked = points_within(await acatalogue_points(), lat, lng, radius_km)
+    rows, distances = [], {}
+    for batch in _point_batches(ranked, position, per_page):
+        distances.update(((plat, plng), distance) for distance, plat, plng, _ in batch)
+        rows += [obj async for obj in _batch_queryset(queryset, batch)[:per_page + 1 - len(rows)]]
+        if len(rows) > per_page:
+            break
+    return _cut_nearby_page(rows, distances, per_page, cursor, position)
@@ -0,0 +1,184 @@
+# course/management/commands/bench_course_api.py
+"""
+วัด throughput ของการ serialize รายการคอร์สของ JSON API (course/api.py)
+
+    python manage.py bench_course_api
+    python manage.py bench_course_api --courses 10000 --limit 50 --fields id,title,price,rounds
+
+ไล่ทุกหน้าของ /api/v1/courses/ (cursor) แล้วเทียบสองแบบบนข้อมูลชุดเดียวกัน
+- values:    .values() + rounds_by_course (แบบที่ API ใช้จริง)
+- instances: model instance + select_related / prefetch_related("rounds")
+รายงานคอร์สต่อวินาที และจำนวน query ต่อหน้า (ผลลัพธ์ของทั้งสองแบบต้องตรงกัน)
+ข้อมูลตัวอย่างสร้างใน transaction ที่ rollback ตอนจบ ไม่เหลือในฐานข้อมูล
+"""
+import datetime
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from base.models import Profile
+from course.api import (
+    COURSE_FIELDS, FieldError, course_columns, parse_fields, serialize_courses, serialize_round,
+)
+from course.models import Course, CourseRound, days_to_mask
+from trainmydog.pagination import keyset_queryset
+
+_ROUND_DAYS = ([0, 2], [1, 3], [5, 6], [5])
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _instance_row(course):
+    """แปลง instance เป็น dict หน้าตาเดียวกับแถวของ .values() เพื่อใช้ตัวแปลงค่าชุดเดียวกัน"""
+    row = {name: getattr(course, name) for name in (
+        "id", "title", "description", "duration_hr", "price", "deposit_price", "location",
+        "max_dogs", "benefits", "weekday_mask", "trainer_id", "created_at", "updated_at",
+        "cover_image_variants",
+    )}
+    row["cover_image"] = course.cover_image.name
+    row.update({
+        "trainer__first_name": course.trainer.first_name,
+        "trainer__last_name": course.trainer.last_name,
+        "trainer__username": course.trainer.username,
+    })
+    return row
+
+
+def serialize_instances(courses, fields, request):
+    items = []
+    for course in courses:
+        row = _instance_row(course)
+        item = {}
+        for name in fields:
+            convert = COURSE_FIELDS[name][1]
+            if convert is None:
+                item[name] = [serialize_round({
+                    "id": r.pk, "weekday_mask": r.weekday_mask,
+                    "start_time": r.start_time, "end_time": r.end_time,
+                }) for r in course.rounds.all()]
+            else:
+                item[name] = convert(row, request)
+        items.append(item)
+    return items
+
+
+class Command(BaseCommand):
+    help = "เทียบ throughput ของการ serialize คอร์สใน JSON API แบบ .values() กับแบบ model instance"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=10000)
+        parser.add_argument("--limit", type=int, default=50, help="จำนวนคอร์สต่อหน้า")
+        parser.add_argument("--fields", default="", help="เหมือน ?fields= (ว่าง = ทุกฟิลด์)")
+        parser.add_argument("--repeat", type=int, default=3, help="วัดกี่รอบ (รายงานรอบที่เร็วที่สุด)")
+
+    def handle(self, *args, **opts):
+        try:
+            fields = parse_fields(opts["fields"])
+        except FieldError as exc:
+            raise CommandError(str(exc))
+        request = RequestFactory().get("/api/v1/courses/")
+
+        try:
+            with transaction.atomic():
+                self._seed(opts["courses"])
+                results = {
+                    "values": self._measure(self._values_page, fields, request, opts),
+                    "instances": self._measure(self._instances_page, fields, request, opts),
+                }
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if results["values"]["output"] != results["instances"]["output"]:
+            raise CommandError("ผลลัพธ์ของสองแบบไม่ตรงกัน")
+        self.stdout.write(f"{opts['courses']} คอร์ส, {opts['limit']} ต่อหน้า, ฟิลด์: {','.join(fields)}")
+        for name, res in results.items():
+            self.stdout.write(
+                f"{name:<10} {res['rate']:>10.0f} คอร์ส/วินาที  {res['seconds']:.3f}s  "
+                f"{res['pages']} หน้า  {res['queries'] / max(res['pages'], 1):.1f} query/หน้า"
+            )
+        speedup = results["values"]["rate"] / max(results["instances"]["rate"], 1e-9)
+        self.stdout.write(self.style.SUCCESS(f".values() เร็วกว่า {speedup:.2f} เท่า"))
+
+    # ----- แต่ละแบบคืน (รายการของหน้า, ตำแหน่ง cursor ถัดไป) -----
+    @staticmethod
+    def _values_page(position, fields, limit, request):
+        qs = keyset_queryset(Course.objects.public(), position).values(*course_columns(fields))
+        rows = list(qs[:limit + 1])
+        more = len(rows) > limit
+        rows = rows[:limit]
+        nxt = (rows[-1]["created_at"], rows[-1]["id"]) if more else None
+        return serialize_courses(rows, fields, request), nxt
+
+    @staticmethod
+    def _instances_page(position, fields, limit, request):
+        qs = keyset_queryset(
+            Course.objects.public().select_related("trainer").prefetch_related(
+                Prefetch("rounds", queryset=CourseRound.objects.order_by("start_time", "pk"))
+            ),
+            position,
+        )
+        courses = list(qs[:limit + 1])
+        more = len(courses) > limit
+        courses = courses[:limit]
+        nxt = (courses[-1].created_at, courses[-1].pk) if more else None
+        return serialize_instances(courses, fields, request), nxt
+
+    def _measure(self, page_func, fields, request, opts):
+        best = None
+        for _ in range(max(1, opts["repeat"])):
+            output, pages, position = [], 0, None
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                while True:
+                    items, position = page_func(position, fields, opts["limit"], request)
+                    output += items
+                    pages += 1
+                    if position is None:
+                        break
+                seconds = time.perf_counter() - start
+            if best is None or seconds < best["seconds"]:
+                best = {
+                    "seconds": seconds, "pages": pages, "queries": len(ctx.captured_queries),
+                    "rate": len(output) / seconds if seconds else 0.0, "output": output,
+                }
+        return best
+
+    @staticmethod
+    def _seed(count):
+        User.objects.bulk_create([
+            User(username=f"bench-api-trainer{i}@example.com", first_name="ครู", last_name=str(i))
+            for i in range(10)
+        ])
+        trainers = list(User.objects.filter(username__startswith="bench-api-trainer").order_by("pk"))
+        Profile.objects.bulk_create([Profile(user=u, role=Profile.Role.TRAINER) for u in trainers])
+        Course.objects.bulk_create([
+            Course(
+                trainer=trainers[i % len(trainers)],
+                title=f"คอร์สฝึกสุนัข รุ่น {i}",
+                description="ฝึกนั่ง รอ เดินข้าง เรียกกลับ สำหรับลูกสุนัขและสุนัขโต",
+                benefits="1. ใบประกาศ\n2. อาบน้ำฟรีหลังฝึก",
+                location="กรุงเทพ",
+                price=1500 + i % 5 * 500,
+                deposit_price=500,
+                weekday_mask=days_to_mask(_ROUND_DAYS[i % 4] + _ROUND_DAYS[(i + 1) % 4]),
+                is_published=True,
+                max_dogs=10,
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        course_ids = Course.objects.filter(trainer__in=trainers).values_list("pk", flat=True)
+        CourseRound.objects.bulk_create([
+            CourseRound(
+                course_id=pk, days=_ROUND_DAYS[(pk + k) % 4], weekday_mask=days_to_mask(_ROUND_DAYS[(pk + k) % 4]),
+                start_time=datetime.time(9 + 3 * k), end_time=datetime.time(11 + 3 * k),
+            )
+            for pk in course_ids for k in range(2)
+        ], batch_size=1000)
@@ -0,0 +1,159 @@
+# course/management/commands/bench_nearby.py
+"""
+วัดความเร็วของ "คอร์สใกล้ฉัน" (course/geo.py) บนแคตตาล็อกขนาดใหญ่
+
+    python manage.py bench_nearby
+    python manage.py bench_nearby --courses 100000 --queries 300 --radius 5 --radius 25 --radius 100
+
+สร้างคอร์สตัวอย่าง (ค่าเริ่มต้น 100,000 คอร์ส กระจายตามทำเนียบ: กรุงเทพฯ/ปริมณฑลหนาแน่นที่สุด)
+ใน transaction ที่ rollback ตอนจบ แล้วค้นจากจุดสุ่มรอบอำเภอ/จังหวัดต่างๆ เทียบสองแบบ
+- grid:      ตัดพิกัดด้วยช่วงของ geo_cell แล้วคิดระยะต่อพิกัด ดึงเฉพาะคอร์สของหน้า (nearby_page แบบที่หน้าแรกใช้)
+- full scan: ดึงพิกัดของทุกคอร์สที่เผยแพร่ แล้วคิดระยะทีละคอร์ส
+รายงาน p50/p95 ของเวลาต่อหน้า จำนวนคอร์ส/พิกัดในรัศมี และตรวจว่าผลหน้าแรกของสองแบบตรงกัน
+"""
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from base.dbpool import percentile
+from base.models import Profile
+from course.geo import catalogue_points, catalogue_points_query, haversine_km, load_gazetteer, locate, nearby_page, points_within
+from course.models import Course
+from trainmydog.cache import bump_page_cache_version
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _full_scan(queryset, lat, lng, radius_km, per_page):
+    """แบบไม่ใช้ index: คิดระยะของทุกคอร์ส -> (id ของหน้าแรก, จำนวนคอร์สในรัศมี)"""
+    ranked = []
+    for pk, plat, plng in queryset.exclude(geo_cell=None).order_by().values_list("pk", "geo_lat", "geo_lng"):
+        distance = haversine_km(lat, lng, plat, plng)
+        if distance <= radius_km:
+            ranked.append((distance, -pk))
+    ranked.sort()
+    ids = [-neg_pk for _, neg_pk in ranked[:per_page]]
+    by_id = queryset.in_bulk(ids)
+    return [pk for pk in ids if pk in by_id], len(ranked)
+
+
+def _sample_places(rng, count):
+    """ชื่อสถานที่ count ชื่อ: 45% เขตในกรุงเทพฯ, 25% อำเภอรอบเมือง, 30% จังหวัดอื่น"""
+    thai, _ = load_gazetteer()
+    bangkok = [name for name, p in thai if p.province == "กรุงเทพมหานคร" and p.district]
+    districts = [name for name, p in thai if p.province != "กรุงเทพมหานคร" and p.district]
+    provinces = [name for name, p in thai if not p.district]
+    groups = [(bangkok, 0.45), (districts, 0.25), (provinces, 0.30)]
+    names = []
+    for names_in_group, share in groups:
+        names += rng.choices(names_in_group, k=round(count * share))
+    return names[:count] + rng.choices(provinces, k=max(0, count - len(names)))
+
+
+class Command(BaseCommand):
+    help = "วัดเวลาค้นคอร์สตามรัศมีด้วย grid index เทียบกับการคิดระยะทุกคอร์ส"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=200, help="จำนวนครั้งที่ค้นต่อรัศมี")
+        parser.add_argument("--radius", type=int, action="append", help="กม. (ระบุซ้ำได้) ค่าเริ่มต้น 10 25 50")
+        parser.add_argument("--per-page", type=int, default=12)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **opts):
+        radii = opts["radius"] or [10, 25, 50]
+        try:
+            with transaction.atomic():
+                self._seed(opts["courses"], random.Random(opts["seed"]))
+                queryset = Course.objects.public()
+                bump_page_cache_version()  # bulk_create ไม่ส่ง signal
+                start = time.perf_counter()
+                points = catalogue_points()
+                self.stdout.write(
+                    f"นับคอร์สต่อพิกัด (แคชพลาด) {(time.perf_counter() - start) * 1000:.1f} ms -> {len(points)} พิกัด"
+                )
+                plan = catalogue_points_query().explain()
+                self.stdout.write("    " + plan.replace("\n", "\n    "))
+                for radius in radii:
+                    self._bench(queryset, radius, opts, random.Random(opts["seed"] + radius))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, count, rng):
+        start = time.perf_counter()
+        User.objects.bulk_create([
+            User(username=f"bench-geo-trainer{i}@example.com", first_name="ครู", last_name=str(i))
+            for i in range(max(20, count // 50))  # ครูฝึกหนึ่งคนมีราว 50 คอร์ส
+        ])
+        trainers = list(User.objects.filter(username__startswith="bench-geo-trainer").order_by("pk"))
+        Profile.objects.bulk_create([Profile(user=u, role=Profile.Role.TRAINER) for u in trainers])
+
+        names = _sample_places(rng, count)
+        geo_start = time.perf_counter()
+        located = {name: locate(f"สนามฝึกสุนัข {name}") for name in set(names)}
+        geo_seconds = time.perf_counter() - geo_start
+        if any(v[2] is None for v in located.values()):
+            raise CommandError("มีชื่อในทำเนียบที่ geocode ไม่ได้")
+
+        Course.objects.bulk_create([
+            Course(
+                trainer=trainers[i % len(trainers)],
+                title=f"คอร์สฝึกสุนัข รุ่น {i}",
+                location=f"สนามฝึกสุนัข {name}",
+                geo_lat=located[name][0], geo_lng=located[name][1], geo_cell=located[name][2],
+                price=1500, is_published=i % 10 != 0,
+            )
+            for i, name in enumerate(names)
+        ], batch_size=2000)
+        self.stdout.write(
+            f"สร้าง {count:,} คอร์สใน {time.perf_counter() - start:.1f} วินาที "
+            f"(geocode {len(located)} ข้อความ เฉลี่ย {geo_seconds / len(located) * 1e6:.0f} µs)"
+        )
+
+    def _origins(self, rng, n):
+        """จุดค้น: รอบจุดกลางของสถานที่ในทำเนียบ (สุ่มเลื่อนไม่เกิน ~5 กม.) เน้นกรุงเทพฯ แบบเดียวกับข้อมูล"""
+        thai, _ = load_gazetteer()
+        places = [p for _, p in thai]
+        bangkok = [p for p in places if p.province == "กรุงเทพมหานคร"]
+        picks = [rng.choice(bangkok if i % 2 else places) for i in range(n)]
+        return [(p.lat + rng.uniform(-0.05, 0.05), p.lng + rng.uniform(-0.05, 0.05)) for p in picks]
+
+    def _bench(self, queryset, radius, opts, rng):
+        per_page = opts["per_page"]
+        grid_times, scan_times, in_box, points, matched = [], [], [], [], []
+        for lat, lng in self._origins(rng, opts["queries"]):
+            start = time.perf_counter()
+            page = nearby_page(queryset, lat, lng, radius, per_page=per_page)
+            grid_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            expected, within = _full_scan(queryset, lat, lng, radius, per_page)
+            scan_times.append(time.perf_counter() - start)
+
+            ranked = points_within(catalogue_points(), lat, lng, radius)
+            in_box.append(sum(row[3] for row in ranked))
+            points.append(len(ranked))
+            matched.append(within)
+            if [c.pk for c in page] != expected:
+                raise CommandError(f"ผลไม่ตรงกันที่ ({lat:.4f}, {lng:.4f}) รัศมี {radius} กม.")
+
+        grid_times.sort()
+        scan_times.sort()
+        self.stdout.write(
+            f"รัศมี {radius} กม.: เฉลี่ยในรัศมี {sum(matched) / len(matched):,.0f} คอร์ส, "
+            f"(ที่เผยแพร่ {sum(in_box) / len(in_box):,.0f} คอร์ส ใน {sum(points) / len(points):,.0f} พิกัด)"
+        )
+        self.stdout.write(
+            f"    grid      p50 {percentile(grid_times, 50) * 1000:7.2f} ms  p95 {percentile(grid_times, 95) * 1000:7.2f} ms"
+        )
+        self.stdout.write(
+            f"    full scan p50 {percentile(scan_times, 50) * 1000:7.2f} ms  p95 {percentile(scan_times, 95) * 1000:7.2f} ms"
+        )
+        ratio = percentile(scan_times, 50) / max(percentile(grid_times, 50), 1e-9)
+        self.stdout.write(self.style.SUCCESS(f"    grid เร็วกว่า {ratio:.1f} เท่า (p50) ผลหน้าแรกตรงกันทุกครั้ง"))
@@ -0,0 +1,21 @@
+# course/management/commands/extend_sessions.py
+from django.core.management.base import BaseCommand
+
+from course.sessions import extend_sessions, history_days, horizon_weeks
+
+
+class Command(BaseCommand):
+    help = (
+        "สร้าง Session ล่วงหน้าของทุกรอบเรียนให้ครบขอบเขต CALENDAR_HORIZON_WEEKS "
+        "และลบ Session ที่เก่ากว่า CALENDAR_HISTORY_DAYS (ตั้ง cron วันละครั้ง)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        created, pruned = extend_sessions(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"สร้าง Session ใหม่ {created} รายการ (ล่วงหน้า {horizon_weeks()} สัปดาห์) "
+            f"ลบ Session เก่ากว่า {history_days()} วัน {pruned} รายการ"
+        ))
@@ -0,0 +1,15 @@
+# course/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from course.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "สร้างดัชนีค้นหาคอร์ส (inverted index) ใหม่ทั้งหมด"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        count = rebuild_index(chunk_size=opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"สร้างดัชนีแล้ว {count} คอร์ส"))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['trainer', 'created_at'], name='course_cour_trainer_0c3188_idx'),
+        ),
+    ]
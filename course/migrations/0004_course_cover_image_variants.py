@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='cover_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:19
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def _mask(days):
+    mask = 0
+    for d in days or []:
+        d = int(d)
+        if 0 <= d <= 6:
+            mask |= 1 << d
+    return mask
+
+
+def backfill_weekday_masks(apps, schema_editor):
+    Course = apps.get_model('course', 'Course')
+    CourseRound = apps.get_model('course', 'CourseRound')
+
+    round_ids, course_masks = defaultdict(list), defaultdict(int)
+    for pk, course_id, days in CourseRound.objects.values_list('pk', 'course_id', 'days').iterator():
+        mask = _mask(days)
+        round_ids[mask].append(pk)
+        course_masks[course_id] |= mask
+    # อัปเดตทีละค่า mask (ไม่เกิน 128 ค่า) แทนทีละแถว
+    for mask, ids in round_ids.items():
+        for i in range(0, len(ids), 1000):
+            CourseRound.objects.filter(pk__in=ids[i:i + 1000]).update(weekday_mask=mask)
+
+    course_ids = defaultdict(list)
+    for course_id, mask in course_masks.items():
+        course_ids[mask].append(course_id)
+    for mask, ids in course_ids.items():
+        for i in range(0, len(ids), 1000):
+            Course.objects.filter(pk__in=ids[i:i + 1000]).update(weekday_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0004_course_cover_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='weekday_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='courseround',
+            name='weekday_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_weekday_masks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='courseround',
+            index=models.Index(fields=['weekday_mask', 'start_time'], name='course_cour_weekday_ab2d47_idx'),
+        ),
+    ]
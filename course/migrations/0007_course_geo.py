@@ -0,0 +1,271 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:54
+
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+
+# ===== สำเนาของ course/geo.py + data/th_gazetteer.tsv ณ ตอนสร้าง migration =====
+# migration ต้องให้ผลเหมือนเดิมเสมอ จึงไม่ import โค้ดหรือไฟล์ข้อมูลของแอปที่อาจเปลี่ยนภายหลัง
+# จังหวัด<TAB>อำเภอ/เขต<TAB>lat<TAB>lng<TAB>ชื่อที่ใช้จับคู่
+GAZETTEER = """\
+กรุงเทพมหานคร		13.7563	100.5018	กรุงเทพมหานคร,กรุงเทพฯ,กรุงเทพ,กทม,bangkok,bkk
+กระบี่		8.0863	98.9063	กระบี่,krabi
+กาญจนบุรี		14.0228	99.5328	กาญจนบุรี,kanchanaburi
+กาฬสินธุ์		16.4322	103.5061	กาฬสินธุ์,kalasin
+กำแพงเพชร		16.4828	99.5227	กำแพงเพชร,kamphaeng phet
+ขอนแก่น		16.4419	102.8360	ขอนแก่น,khon kaen
+จันทบุรี		12.6113	102.1039	จันทบุรี,chanthaburi
+ฉะเชิงเทรา		13.6904	101.0779	ฉะเชิงเทรา,แปดริ้ว,chachoengsao
+ชลบุรี		13.3611	100.9847	ชลบุรี,chon buri,chonburi
+ชัยนาท		15.1852	100.1251	ชัยนาท,chai nat
+ชัยภูมิ		15.8068	102.0316	ชัยภูมิ,chaiyaphum
+ชุมพร		10.4930	99.1800	ชุมพร,chumphon
+เชียงราย		19.9105	99.8406	เชียงราย,chiang rai
+เชียงใหม่		18.7883	98.9853	เชียงใหม่,chiang mai
+ตรัง		7.5563	99.6114	ตรัง,trang
+ตราด		12.2428	102.5175	ตราด,trat
+ตาก		16.8840	99.1258	จังหวัดตาก,จ.ตาก,เมืองตาก,tak
+นครนายก		14.2069	101.2131	นครนายก,nakhon nayok
+นครปฐม		13.8199	100.0621	นครปฐม,nakhon pathom
+นครพนม		17.3920	104.7695	นครพนม,nakhon phanom
+นครราชสีมา		14.9799	102.0978	นครราชสีมา,โคราช,nakhon ratchasima,korat
+นครศรีธรรมราช		8.4304	99.9631	นครศรีธรรมราช,nakhon si thammarat
+นครสวรรค์		15.7047	100.1372	นครสวรรค์,nakhon sawan
+นนทบุรี		13.8621	100.5144	นนทบุรี,nonthaburi
+นราธิวาส		6.4255	101.8253	นราธิวาส,narathiwat
+น่าน		18.7756	100.7730	จังหวัดน่าน,จ.น่าน,เมืองน่าน,nan province
+บึงกาฬ		18.3609	103.6466	บึงกาฬ,bueng kan
+บุรีรัมย์		14.9930	103.1029	บุรีรัมย์,buri ram,buriram
+ปทุมธานี		14.0208	100.5250	ปทุมธานี,pathum thani
+ประจวบคีรีขันธ์		11.8126	99.7957	ประจวบคีรีขันธ์,prachuap khiri khan
+ปราจีนบุรี		14.0509	101.3716	ปราจีนบุรี,prachin buri
+ปัตตานี		6.8696	101.2501	ปัตตานี,pattani
+พระนครศรีอยุธยา		14.3532	100.5689	พระนครศรีอยุธยา,อยุธยา,ayutthaya
+พะเยา		19.1665	99.9019	พะเยา,phayao
+พังงา		8.4509	98.5255	พังงา,phang nga
+พัทลุง		7.6167	100.0740	พัทลุง,phatthalung
+พิจิตร		16.4418	100.3488	พิจิตร,phichit
+พิษณุโลก		16.8211	100.2659	พิษณุโลก,phitsanulok
+เพชรบุรี		13.1119	99.9398	เพชรบุรี,phetchaburi
+เพชรบูรณ์		16.4190	101.1591	เพชรบูรณ์,phetchabun
+แพร่		18.1446	100.1403	จังหวัดแพร่,จ.แพร่,เมืองแพร่,phrae
+ภูเก็ต		7.8804	98.3923	ภูเก็ต,phuket
+มหาสารคาม		16.1851	103.3029	มหาสารคาม,maha sarakham
+มุกดาหาร		16.5425	104.7235	มุกดาหาร,mukdahan
+แม่ฮ่องสอน		19.3020	97.9654	แม่ฮ่องสอน,mae hong son
+ยโสธร		15.7944	104.1451	ยโสธร,yasothon
+ยะลา		6.5411	101.2804	ยะลา,yala
+ร้อยเอ็ด		16.0538	103.6520	ร้อยเอ็ด,roi et
+ระนอง		9.9658	98.6348	ระนอง,ranong
+ระยอง		12.6814	101.2816	ระยอง,rayong
+ราชบุรี		13.5283	99.8134	ราชบุรี,ratchaburi
+ลพบุรี		14.7995	100.6534	ลพบุรี,lop buri,lopburi
+ลำปาง		18.2888	99.4908	ลำปาง,lampang
+ลำพูน		18.5745	99.0087	ลำพูน,lamphun
+เลย		17.4860	101.7223	จังหวัดเลย,จ.เลย,เมืองเลย,loei
+ศรีสะเกษ		15.1186	104.3220	ศรีสะเกษ,si sa ket,sisaket
+สกลนคร		17.1545	104.1348	สกลนคร,sakon nakhon
+สงขลา		7.1898	100.5954	สงขลา,songkhla
+สตูล		6.6238	100.0674	สตูล,satun
+สมุทรปราการ		13.5991	100.5998	สมุทรปราการ,ปากน้ำ,samut prakan
+สมุทรสงคราม		13.4098	100.0023	สมุทรสงคราม,samut songkhram
+สมุทรสาคร		13.5475	100.2744	สมุทรสาคร,มหาชัย,samut sakhon
+สระแก้ว		13.8240	102.0646	สระแก้ว,sa kaeo
+สระบุรี		14.5289	100.9101	สระบุรี,saraburi
+สิงห์บุรี		14.8936	100.3967	สิงห์บุรี,sing buri
+สุโขทัย		17.0078	99.8230	สุโขทัย,sukhothai
+สุพรรณบุรี		14.4745	100.1177	สุพรรณบุรี,suphan buri
+สุราษฎร์ธานี		9.1382	99.3217	สุราษฎร์ธานี,surat thani
+สุรินทร์		14.8818	103.4936	สุรินทร์,surin
+หนองคาย		17.8783	102.7420	หนองคาย,nong khai
+หนองบัวลำภู		17.2218	102.4260	หนองบัวลำภู,nong bua lam phu
+อ่างทอง		14.5896	100.4550	อ่างทอง,ang thong
+อำนาจเจริญ		15.8657	104.6258	อำนาจเจริญ,amnat charoen
+อุดรธานี		17.4138	102.7872	อุดรธานี,udon thani
+อุตรดิตถ์		17.6201	100.0993	อุตรดิตถ์,uttaradit
+อุทัยธานี		15.3835	100.0246	อุทัยธานี,uthai thani
+อุบลราชธานี		15.2287	104.8564	อุบลราชธานี,ubon ratchathani
+กรุงเทพมหานคร	พระนคร	13.7644	100.4990	เขตพระนคร,พระนคร,phra nakhon
+กรุงเทพมหานคร	ดุสิต	13.7766	100.5207	ดุสิต,dusit
+กรุงเทพมหานคร	หนองจอก	13.8556	100.8626	หนองจอก,nong chok
+กรุงเทพมหานคร	บางรัก	13.7306	100.5243	บางรัก,bang rak
+กรุงเทพมหานคร	บางเขน	13.8739	100.5965	บางเขน,bang khen
+กรุงเทพมหานคร	บางกะปิ	13.7659	100.6474	บางกะปิ,bang kapi
+กรุงเทพมหานคร	ปทุมวัน	13.7446	100.5227	ปทุมวัน,pathum wan,สยาม,siam
+กรุงเทพมหานคร	ป้อมปราบศัตรูพ่าย	13.7582	100.5131	ป้อมปราบศัตรูพ่าย,ป้อมปราบ,pom prap
+กรุงเทพมหานคร	พระโขนง	13.7024	100.6016	พระโขนง,phra khanong
+กรุงเทพมหานคร	มีนบุรี	13.8138	100.7481	มีนบุรี,min buri,minburi
+กรุงเทพมหานคร	ลาดกระบัง	13.7223	100.7596	ลาดกระบัง,lat krabang
+กรุงเทพมหานคร	ยานนาวา	13.6965	100.5431	ยานนาวา,yan nawa
+กรุงเทพมหานคร	สัมพันธวงศ์	13.7315	100.5135	สัมพันธวงศ์,เยาวราช,samphanthawong,yaowarat
+กรุงเทพมหานคร	พญาไท	13.7798	100.5428	พญาไท,phaya thai
+กรุงเทพมหานคร	ธนบุรี	13.7250	100.4858	ธนบุรี,thon buri,thonburi
+กรุงเทพมหานคร	บางกอกใหญ่	13.7230	100.4762	บางกอกใหญ่,bangkok yai
+กรุงเทพมหานคร	ห้วยขวาง	13.7766	100.5794	ห้วยขวาง,huai khwang
+กรุงเทพมหานคร	คลองสาน	13.7302	100.5096	คลองสาน,khlong san
+กรุงเทพมหานคร	ตลิ่งชัน	13.7769	100.4565	ตลิ่งชัน,taling chan
+กรุงเทพมหานคร	บางกอกน้อย	13.7707	100.4681	บางกอกน้อย,bangkok noi
+กรุงเทพมหานคร	บางขุนเทียน	13.6608	100.4357	บางขุนเทียน,bang khun thian
+กรุงเทพมหานคร	ภาษีเจริญ	13.7147	100.4375	ภาษีเจริญ,phasi charoen
+กรุงเทพมหานคร	หนองแขม	13.7047	100.3490	หนองแขม,nong khaem
+กรุงเทพมหานคร	ราษฎร์บูรณะ	13.6822	100.5057	ราษฎร์บูรณะ,rat burana
+กรุงเทพมหานคร	บางพลัด	13.7937	100.5050	บางพลัด,bang phlat
+กรุงเทพมหานคร	ดินแดง	13.7698	100.5527	ดินแดง,din daeng
+กรุงเทพมหานคร	บึงกุ่ม	13.7854	100.6695	บึงกุ่ม,bueng kum
+กรุงเทพมหานคร	สาทร	13.7081	100.5262	สาทร,sathon,sathorn
+กรุงเทพมหานคร	บางซื่อ	13.8094	100.5371	บางซื่อ,bang sue
+กรุงเทพมหานคร	จตุจักร	13.8285	100.5597	จตุจักร,chatuchak
+กรุงเทพมหานคร	บางคอแหลม	13.6931	100.5025	บางคอแหลม,bang kho laem
+กรุงเทพมหานคร	ประเวศ	13.7168	100.6948	ประเวศ,prawet
+กรุงเทพมหานคร	คลองเตย	13.7081	100.5837	คลองเตย,khlong toei
+กรุงเทพมหานคร	สวนหลวง	13.7302	100.6510	สวนหลวง,suan luang
+กรุงเทพมหานคร	จอมทอง	13.6776	100.4841	จอมทอง,chom thong
+กรุงเทพมหานคร	ดอนเมือง	13.9107	100.5897	ดอนเมือง,don mueang
+กรุงเทพมหานคร	ราชเทวี	13.7589	100.5344	ราชเทวี,ratchathewi
+กรุงเทพมหานคร	ลาดพร้าว	13.8036	100.6076	ลาดพร้าว,lat phrao
+กรุงเทพมหานคร	วัฒนา	13.7425	100.5859	วัฒนา,watthana,สุขุมวิท,sukhumvit
+กรุงเทพมหานคร	บางแค	13.6960	100.4090	บางแค,bang khae
+กรุงเทพมหานคร	หลักสี่	13.8875	100.5788	หลักสี่,lak si
+กรุงเทพมหานคร	สายไหม	13.8952	100.6488	สายไหม,sai mai
+กรุงเทพมหานคร	คันนายาว	13.8271	100.6784	คันนายาว,khan na yao
+กรุงเทพมหานคร	สะพานสูง	13.7688	100.6853	สะพานสูง,saphan sung
+กรุงเทพมหานคร	วังทองหลาง	13.7651	100.6054	วังทองหลาง,wang thonglang
+กรุงเทพมหานคร	คลองสามวา	13.8596	100.7042	คลองสามวา,khlong sam wa
+กรุงเทพมหานคร	บางนา	13.6680	100.6045	บางนา,bang na
+กรุงเทพมหานคร	ทวีวัฒนา	13.7729	100.3520	ทวีวัฒนา,thawi watthana
+กรุงเทพมหานคร	ทุ่งครุ	13.6468	100.4960	ทุ่งครุ,thung khru
+กรุงเทพมหานคร	บางบอน	13.6636	100.3681	บางบอน,bang bon
+นนทบุรี	ปากเกร็ด	13.9130	100.4988	ปากเกร็ด,pak kret,เมืองทองธานี,muang thong thani
+นนทบุรี	บางบัวทอง	13.9097	100.4253	บางบัวทอง,bang bua thong
+นนทบุรี	บางใหญ่	13.8760	100.3900	บางใหญ่,bang yai
+นนทบุรี	บางกรวย	13.8050	100.4730	บางกรวย,bang kruai
+ปทุมธานี	ธัญบุรี	14.0170	100.7310	ธัญบุรี,thanyaburi
+ปทุมธานี	คลองหลวง	14.0647	100.6464	คลองหลวง,khlong luang
+ปทุมธานี	ลำลูกกา	13.9326	100.7491	ลำลูกกา,lam luk ka
+ปทุมธานี	รังสิต	13.9867	100.6167	รังสิต,rangsit
+สมุทรปราการ	บางพลี	13.6056	100.7065	บางพลี,bang phli
+สมุทรปราการ	พระประแดง	13.6590	100.5330	พระประแดง,phra pradaeng
+นครปฐม	สามพราน	13.7270	100.2150	สามพราน,sam phran
+นครปฐม	พุทธมณฑล	13.8000	100.3260	พุทธมณฑล,phutthamonthon
+สมุทรสาคร	กระทุ่มแบน	13.6530	100.2590	กระทุ่มแบน,krathum baen
+ชลบุรี	ศรีราชา	13.1737	100.9311	ศรีราชา,si racha,sriracha
+ชลบุรี	บางละมุง	12.9276	100.8771	บางละมุง,bang lamung
+ชลบุรี	พัทยา	12.9236	100.8825	พัทยา,pattaya
+ชลบุรี	สัตหีบ	12.6636	100.9003	สัตหีบ,sattahip
+เชียงใหม่	หางดง	18.6866	98.9190	หางดง,hang dong
+เชียงใหม่	สันทราย	18.8457	99.0441	สันทราย,san sai
+เชียงใหม่	แม่ริม	18.9140	98.9440	แม่ริม,mae rim
+เชียงใหม่	สารภี	18.7070	99.0370	สารภี,saraphi
+ภูเก็ต	กะทู้	7.9120	98.3330	กะทู้,kathu,ป่าตอง,patong
+ภูเก็ต	ถลาง	8.0300	98.3350	ถลาง,thalang
+สงขลา	หาดใหญ่	7.0084	100.4747	หาดใหญ่,hat yai,hatyai
+ประจวบคีรีขันธ์	หัวหิน	12.5684	99.9577	หัวหิน,hua hin
+เพชรบุรี	ชะอำ	12.7997	99.9669	ชะอำ,cha am,cha-am
+สุราษฎร์ธานี	เกาะสมุย	9.5120	100.0136	เกาะสมุย,สมุย,ko samui,koh samui,samui
+นครราชสีมา	ปากช่อง	14.7080	101.4160	ปากช่อง,pak chong,เขาใหญ่,khao yai
+"""
+GRID_DEGREES = 0.1
+GRID_COLUMNS = round(360 / GRID_DEGREES)
+
+
+def _latin_key(text):
+    words = "".join(ch if ch.isascii() and ch.isalnum() else " " for ch in text.lower()).split()
+    return f" {' '.join(words)} "
+
+
+def _thai_key(text):
+    return "".join(text.split())
+
+
+def _load_gazetteer():
+    thai, latin = [], []
+    for line in GAZETTEER.splitlines():
+        province, district, lat, lng, names = line.split("\t")
+        place = (province, district, float(lat), float(lng))
+        for name in names.split(","):
+            if name.isascii():
+                latin.append((_latin_key(name), place))
+            else:
+                thai.append((_thai_key(name), place))
+    thai.sort(key=lambda item: -len(item[0]))
+    latin.sort(key=lambda item: -len(item[0]))
+    return thai, latin
+
+
+def _matches(text, needles):
+    taken, found = [], []
+    for needle, place in needles:
+        pad = len(needle) - len(needle.strip())
+        start = text.find(needle)
+        while start != -1:
+            lo, hi = start + pad // 2, start + len(needle) - pad // 2
+            if not any(s < hi and lo < e for s, e in taken):
+                taken.append((lo, hi))
+                found.append(place)
+                break
+            start = text.find(needle, start + 1)
+    return found
+
+
+def _locate(text, gazetteer):
+    """(lat, lng, cell) ของข้อความสถานที่ หรือ None (ตรรกะเดียวกับ geocode / grid_cell)"""
+    thai, latin = gazetteer
+    hits = _matches(_thai_key(text), thai) + _matches(_latin_key(text), latin)
+    if not hits:
+        return None
+    named_provinces = {p[0] for p in hits if not p[1]}
+    districts = [p for p in hits if p[1]]
+    place = next((p for p in districts if p[0] in named_provinces), districts[0] if districts else hits[0])
+    lat, lng = place[2], place[3]
+    cell = math.floor((lat + 90) / GRID_DEGREES) * GRID_COLUMNS + math.floor((lng + 180) / GRID_DEGREES) % GRID_COLUMNS
+    return lat, lng, cell
+
+
+def backfill_course_geo(apps, schema_editor):
+    Course = apps.get_model('course', 'Course')
+    gazetteer = _load_gazetteer()
+
+    # geocode ครั้งละข้อความ (คอร์สจำนวนมากใช้ location ซ้ำกัน) แล้วอัปเดตทีละกลุ่ม
+    ids_by_location = defaultdict(list)
+    for pk, location in Course.objects.exclude(location='').values_list('pk', 'location').iterator():
+        ids_by_location[location].append(pk)
+    for location, ids in ids_by_location.items():
+        found = _locate(location, gazetteer)
+        if found is None:
+            continue
+        lat, lng, cell = found
+        for i in range(0, len(ids), 1000):
+            Course.objects.filter(pk__in=ids[i:i + 1000]).update(geo_lat=lat, geo_lng=lng, geo_cell=cell)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0006_session'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='geo_cell',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='geo_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='geo_lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_course_geo, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['geo_cell', 'geo_lat', 'geo_lng'], name='course_cour_geo_cel_546a27_idx'),
+        ),
+    ]
@@ -1,5 +1,15 @@
 from django.db import models
 from django.conf import settings
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from base.images import COVER_WIDTHS, register_variant_field
+from base.storage import register_file_cleanup
+from base.models import Profile
+from trainmydog.cache import bump_catalogue_version
+from .cache import aget_cached_rounds, get_cached_rounds
+from .geo import locate
 
 
 THAI_DAYS = {
@@ -7,9 +17,52 @@ THAI_DAYS = {
     4: "ศุกร์", 5: "เสาร์", 6: "อาทิตย์",
 }
 
+# ===== วันในสัปดาห์แบบ bitmask =====
+# bit d = วัน d ของ THAI_DAYS (bit 0 = จันทร์ ... bit 6 = อาทิตย์) เก็บเป็นเลขจำนวนเต็มเล็กๆ ใส่ index ได้
+# JSON days / training_days ยังเก็บไว้เพื่อความเข้ากันได้ แต่การค้นและการแสดงผลใช้ mask
+ALL_DAYS_MASK = 0b1111111
+
+
+def days_to_mask(days):
+    mask = 0
+    for d in days or []:
+        d = int(d)
+        if 0 <= d <= 6:
+            mask |= 1 << d
+    return mask
+
+
+def mask_to_days(mask):
+    return [d for d in range(7) if mask & (1 << d)]
+
+
+# ข้อความของทุก mask คำนวณครั้งเดียว (128 ค่า) ไม่ต้อง sort/parse JSON ทุกครั้งที่ render
+_MASK_LABELS = tuple(", ".join(THAI_DAYS[d] for d in mask_to_days(m)) for m in range(ALL_DAYS_MASK + 1))
+
+
+def display_mask(mask):
+    return _MASK_LABELS[(mask or 0) & ALL_DAYS_MASK]
+
+
+def masks_with_any_day(days):
+    """
+    ทุกค่า mask ที่มีวันใดวันหนึ่งใน days
+    ใช้ WHERE weekday_mask IN (...) แทน weekday_mask & x — bitwise AND ใช้ B-tree index ไม่ได้
+    แต่ IN เป็น equality หลายค่า ต่อด้วยช่วงของ start_time บน index เดียวกันได้
+    """
+    wanted = days_to_mask(days)
+    return [m for m in range(1, ALL_DAYS_MASK + 1) if m & wanted]
+
+
 def course_cover_upload_path(instance, filename):
     return f"courses/{instance.trainer_id}/{filename}"
 
+class CourseQuerySet(models.QuerySet):
+    def public(self):
+        """คอร์สที่คนทั่วไปเห็นได้: เผยแพร่แล้ว และเจ้าของยังเป็นครูฝึก (หน้าแรก / รายละเอียด / API)"""
+        return self.filter(is_published=True, trainer__profile__role=Profile.Role.TRAINER)
+
+
 class Course(models.Model):
     class Day(models.IntegerChoices):
         MON = 0, "จันทร์"
@@ -27,8 +80,14 @@ class Course(models.Model):
     price         = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     deposit_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, help_text="ราคามัดจำ")
     cover_image   = models.ImageField(upload_to=course_cover_upload_path, null=True, blank=True)
+    cover_image_variants = models.JSONField(default=dict, blank=True, editable=False)  # base/images.py
     location      = models.CharField(max_length=255, blank=True)
+    # พิกัดจาก location ด้วยทำเนียบอำเภอ/จังหวัด (course/geo.py) — None = หาไม่พบ
+    geo_lat       = models.FloatField(null=True, blank=True, editable=False)
+    geo_lng       = models.FloatField(null=True, blank=True, editable=False)
+    geo_cell      = models.PositiveIntegerField(null=True, blank=True, editable=False)
     training_days = models.JSONField(default=list, blank=True, help_text="ลิสต์วันในสัปดาห์")
+    weekday_mask  = models.PositiveSmallIntegerField(default=0, editable=False)  # OR ของทุกรอบเรียน
     start_time    = models.TimeField(null=True, blank=True)
     end_time      = models.TimeField(null=True, blank=True)
     max_dogs      = models.PositiveIntegerField(null=True, blank=True)
@@ -37,13 +96,30 @@ class Course(models.Model):
     updated_at    = models.DateTimeField(auto_now=True)
     is_published  = models.BooleanField(default=False)
 
+    objects = CourseQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["is_published", "created_at"])]
+        indexes = [
+            models.Index(fields=["is_published", "created_at"]),
+            models.Index(fields=["trainer", "created_at"]),  # หน้า "คอร์สของฉัน" (cursor)
+            # "คอร์สใกล้ฉัน" (course/geo.py): คอร์สของพิกัดหนึ่งเรียงตาม id ใน index อยู่แล้ว -> ORDER BY -id LIMIT ไม่ต้อง sort
+            # (ไม่ขึ้นต้นด้วย is_published: Django เขียน filter(is_published=True) เป็น WHERE "is_published" ซึ่งใช้ index ไม่ได้)
+            models.Index(fields=["geo_cell", "geo_lat", "geo_lng"]),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.trainer.username}"
 
+    def save(self, *args, **kwargs):
+        self.geo_lat, self.geo_lng, self.geo_cell = locate(self.location)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # updated_at เป็น version ของแคชหน้าคอร์ส (trainmydog/cache.py) ต้องเลื่อนทุกครั้งที่บันทึก
+            extra = {"updated_at", "geo_lat", "geo_lng", "geo_cell"} if "location" in update_fields else {"updated_at"}
+            kwargs["update_fields"] = {*update_fields, *extra}
+        super().save(*args, **kwargs)
+
     @property
     def benefits_list(self):
         items = []
@@ -56,24 +132,151 @@ class Course(models.Model):
             items.append(item)
         return items
 
+    def round_list(self):
+        """
+        รอบเรียนของคอร์ส (list) โหลดครั้งเดียวต่อ instance
+        ใช้ร่วมกันทั้ง template / BookingForm / การ validate
+        """
+        if not hasattr(self, "_round_list"):
+            prefetched = getattr(self, "_prefetched_objects_cache", {})
+            if "rounds" in prefetched:
+                self._round_list = list(prefetched["rounds"])
+            else:
+                self._round_list = get_cached_rounds(self)
+        return self._round_list
+
+    async def aload_round_list(self):
+        """โหลด round_list() ล่วงหน้าใน async view (template เรียก round_list() ได้โดยไม่แตะฐานข้อมูล)"""
+        if not hasattr(self, "_round_list"):
+            self._round_list = await aget_cached_rounds(self)
+        return self._round_list
+
     def display_training_days(self):
-        vals = self.training_days or []
-        days_sorted = sorted(int(d) for d in vals)
-        return ", ".join(THAI_DAYS.get(d, str(d)) for d in days_sorted)
+        return display_mask(self.weekday_mask or days_to_mask(self.training_days))
+
+register_variant_field(Course, "cover_image", COVER_WIDTHS)
+register_file_cleanup(Course, "cover_image")
+
 
 class CourseRound(models.Model):
     course     = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="rounds")
     days       = models.JSONField(default=list, blank=True)  # list[int]
     start_time = models.TimeField()
     end_time   = models.TimeField()
+    weekday_mask = models.PositiveSmallIntegerField(default=0, editable=False)  # จาก days ตอน save()
 
     class Meta:
         ordering = ["id"]
-        indexes = [models.Index(fields=["course"])]
+        indexes = [
+            models.Index(fields=["course"]),
+            # "มีรอบวันเสาร์ที่เริ่มหลัง 09:00" = weekday_mask IN (...) AND start_time >= ...
+            models.Index(fields=["weekday_mask", "start_time"]),
+        ]
 
     def __str__(self):
         return f"{self.display_days()} {self.start_time.strftime('%H:%M')}-{self.end_time.strftime('%H:%M')}"
 
+    def save(self, *args, **kwargs):
+        self.weekday_mask = days_to_mask(self.days)
+        super().save(*args, **kwargs)
+
     def display_days(self):
-        lst = sorted([int(d) for d in (self.days or [])])
-        return ", ".join(THAI_DAYS.get(d, str(d)) for d in lst)
+        return display_mask(self.weekday_mask)
+
+
+# ===== ตารางเรียนรายครั้ง (สร้างจาก CourseRound ล่วงหน้า N สัปดาห์) — ดู course/sessions.py =====
+class Session(models.Model):
+    round     = models.ForeignKey(CourseRound, on_delete=models.CASCADE, related_name="sessions")
+    course    = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="sessions")
+    date      = models.DateField()
+    starts_at = models.DateTimeField()
+    ends_at   = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["starts_at"]
+        constraints = [models.UniqueConstraint(fields=["round", "date"], name="uniq_session_round_date")]
+        indexes = [models.Index(fields=["course", "starts_at"])]
+
+    def __str__(self):
+        return f"{self.course_id}/{self.round_id} {self.starts_at:%Y-%m-%d %H:%M}"
+
+
+# ===== ดัชนีค้นหา (inverted index) — ดู course/search.py =====
+class SearchTerm(models.Model):
+    term     = models.CharField(max_length=100, unique=True)
+    doc_freq = models.PositiveIntegerField(default=0)  # จำนวนคอร์สที่มีคำนี้
+
+    def __str__(self):
+        return f"{self.term} ({self.doc_freq})"
+
+
+class SearchPosting(models.Model):
+    term   = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name="postings")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="search_postings")
+    tf     = models.PositiveIntegerField()  # ความถี่ของคำในคอร์ส (ถ่วงน้ำหนักตามฟิลด์แล้ว)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["term", "course"], name="uniq_search_posting")]
+
+
+class SearchDocument(models.Model):
+    course       = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    length       = models.PositiveIntegerField(default=0)
+    content_hash = models.CharField(max_length=64, blank=True)
+
+
+@receiver(post_save, sender=Course)
+def invalidate_public_pages(sender, instance: Course, **kwargs):
+    """คอร์สเปลี่ยน -> แคชหน้ารายการและหน้ารายละเอียดของคอร์สนี้หมดอายุ (รอบเรียน: ดู sync_course_on_round_change)"""
+    bump_catalogue_version(instance.pk, instance.updated_at)
+
+
+@receiver(post_delete, sender=Course)
+def invalidate_public_pages_on_delete(sender, instance: Course, **kwargs):
+    bump_catalogue_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=CourseRound)
+def sync_course_on_round_change(sender, instance: CourseRound, origin=None, **kwargs):
+    """
+    รอบเรียนเปลี่ยน -> Course.weekday_mask = OR ของ weekday_mask ทุกรอบในคอร์ส
+    และเลื่อน Course.updated_at (key ของแคชรอบเรียนใน course/cache.py และ version ของหน้าคอร์สเปลี่ยนตาม) ใน UPDATE เดียว
+    """
+    if isinstance(origin, Course):
+        return  # รอบถูกลบตามคอร์สที่กำลังถูกลบ
+    mask = 0
+    for value in CourseRound.objects.filter(course_id=instance.course_id).values_list("weekday_mask", flat=True):
+        mask |= value
+    now = timezone.now()
+    Course.objects.filter(pk=instance.course_id).update(weekday_mask=mask, updated_at=now)
+    bump_catalogue_version(instance.course_id, now)
+    if CourseRound.course.is_cached(instance):
+        instance.course.weekday_mask = mask
+        instance.course.updated_at = now
+
+
+@receiver(post_save, sender=CourseRound)
+def sync_sessions_on_save(sender, instance: CourseRound, **kwargs):
+    """สร้าง/ลบ Session ล่วงหน้าเฉพาะของรอบที่เปลี่ยน (รอบที่ถูกลบ Session จะถูกลบตาม CASCADE)"""
+    from .sessions import sync_round_sessions
+    sync_round_sessions(instance)
+
+
+@receiver(post_save, sender=Course)
+def index_course_on_save(sender, instance: Course, update_fields=None, **kwargs):
+    """ข้อความของคอร์สอาจเปลี่ยน -> ใส่งานอัปเดตดัชนีค้นหาเข้าคิว (ตัดคำไทยช้า ไม่ทำใน request)"""
+    from trainmydog.jobs import enqueue
+    from .search import FIELD_WEIGHTS
+    from .tasks import reindex_course
+
+    if update_fields is not None and not FIELD_WEIGHTS.keys() & set(update_fields):
+        return
+    enqueue(reindex_course, course_id=instance.pk)
+
+
+@receiver(pre_delete, sender=Course)
+def unindex_course_on_delete(sender, instance: Course, **kwargs):
+    # ต้องทำก่อนลบ เพราะ posting ของคอร์สจะถูกลบตาม (CASCADE) และต้องใช้ลด doc_freq
+    from .search import remove_course
+    remove_course(instance.pk)
@@ -0,0 +1,40 @@
+# course/schedule.py
+"""
+หารอบเรียนที่เวลาชนกัน (ต่อวันในสัปดาห์) ด้วย sweep line
+
+แต่ละวันเรียงช่วงเวลาตามเวลาเริ่ม แล้วไล่ทีละช่วงโดยเก็บช่วงที่ยัง "เปิดอยู่"
+ไว้ใน heap ตามเวลาจบ ช่วงใหม่ชนกับทุกช่วงที่ยังเปิดอยู่เท่านั้น
+ต้นทุน O(n log n + จำนวนคู่ที่ชน) ต่อวัน แทนการเทียบทุกคู่ O(n²)
+ช่วงที่ต่อกันพอดี (09:00-11:00 กับ 11:00-13:00) ไม่นับว่าชน
+"""
+import heapq
+from collections import defaultdict
+from itertools import count
+
+from .models import mask_to_days
+
+
+def find_overlaps(slots):
+    """
+    slots: iterable ของ (key, weekday_mask, start_time, end_time)
+    คืน dict {(key_a, key_b): [วัน, ...]} ของทุกคู่ที่ชนกัน (key_a มาก่อนตามลำดับที่ส่งเข้ามา)
+    """
+    order = {}
+    by_day = defaultdict(list)
+    for key, mask, start, end in slots:
+        order.setdefault(key, len(order))
+        for day in mask_to_days(mask):
+            by_day[day].append((start, end, key))
+
+    conflicts = defaultdict(list)
+    tie = count()  # กัน heap เทียบ key เมื่อเวลาจบเท่ากัน
+    for day in sorted(by_day):
+        active = []  # (end, tie, key)
+        for start, end, key in sorted(by_day[day], key=lambda s: (s[0], s[1])):
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            for _, _, other in active:
+                pair = (other, key) if order[other] < order[key] else (key, other)
+                conflicts[pair].append(day)
+            heapq.heappush(active, (end, next(tie), key))
+    return dict(conflicts)
@@ -0,0 +1,165 @@
+# course/search.py
+"""
+ค้นหาคอร์สด้วย inverted index ของเราเอง + จัดอันดับแบบ BM25
+
+ดัชนีเก็บใน SearchTerm / SearchPosting / SearchDocument และอัปเดตทีละคอร์ส
+เมื่อ Course ถูกบันทึก (งานในคิว course/tasks.py) / ลบ (signal ใน course/models.py)
+ค้นหา = ดึง posting ของคำในคำค้น (index lookup ตาม term) แล้วคิดคะแนนใน Python
+ไม่ต้อง LIKE '%...%' สแกนทั้งตาราง และตัดคำไทยได้ (course/thai_tokenizer.py)
+"""
+import hashlib
+import math
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, F
+
+from base.models import Profile
+from .models import Course, SearchDocument, SearchPosting, SearchTerm
+from .thai_tokenizer import tokenize
+
+# น้ำหนักของแต่ละฟิลด์ (คำในชื่อคอร์สสำคัญกว่าคำในรายละเอียด)
+FIELD_WEIGHTS = {
+    "title": 3,
+    "location": 2,
+    "description": 1,
+    "benefits": 1,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+STATS_CACHE_KEY = "search:stats"
+MAX_TERM_LENGTH = 100
+
+
+def _course_terms(course):
+    tf = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(course, field, "")):
+            tf[term[:MAX_TERM_LENGTH]] += weight
+    return tf
+
+
+def _content_hash(course):
+    raw = "\x1f".join(getattr(course, f) or "" for f in FIELD_WEIGHTS)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _term_ids(terms, create=False):
+    """{term: id} ของคำที่มีในดัชนี (สร้างคำที่ยังไม่มีถ้า create=True)"""
+    terms = list(terms)
+    if not terms:
+        return {}
+    if create:
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=t) for t in terms], ignore_conflicts=True, batch_size=500,
+        )
+    return dict(SearchTerm.objects.filter(term__in=terms).values_list("term", "id"))
+
+
+@transaction.atomic
+def index_course(course):
+    """อัปเดตดัชนีของคอร์สเดียว (ข้ามถ้าข้อความไม่เปลี่ยน)"""
+    digest = _content_hash(course)
+    doc = SearchDocument.objects.filter(course_id=course.pk).first()
+    if doc and doc.content_hash == digest:
+        return
+
+    tf = _course_terms(course)
+    ids = _term_ids(tf.keys(), create=True)
+    new = {ids[t]: n for t, n in tf.items()}
+    old = dict(SearchPosting.objects.filter(course_id=course.pk).values_list("term_id", "tf"))
+
+    removed = old.keys() - new.keys()
+    added = new.keys() - old.keys()
+    if removed:
+        SearchTerm.objects.filter(id__in=removed).update(doc_freq=F("doc_freq") - 1)
+    if added:
+        SearchTerm.objects.filter(id__in=added).update(doc_freq=F("doc_freq") + 1)
+
+    SearchPosting.objects.filter(course_id=course.pk).delete()
+    SearchPosting.objects.bulk_create(
+        [SearchPosting(term_id=t, course_id=course.pk, tf=n) for t, n in new.items()],
+        batch_size=500,
+    )
+    SearchDocument.objects.update_or_create(
+        course_id=course.pk,
+        defaults={"length": sum(tf.values()), "content_hash": digest},
+    )
+    cache.delete(STATS_CACHE_KEY)
+
+
+@transaction.atomic
+def remove_course(course_id):
+    term_ids = SearchPosting.objects.filter(course_id=course_id).values_list("term_id", flat=True)
+    SearchTerm.objects.filter(id__in=list(term_ids)).update(doc_freq=F("doc_freq") - 1)
+    SearchPosting.objects.filter(course_id=course_id).delete()
+    SearchDocument.objects.filter(course_id=course_id).delete()
+    cache.delete(STATS_CACHE_KEY)
+
+
+def _corpus_stats():
+    """(จำนวนคอร์สในดัชนี, ความยาวเฉลี่ย) — แคชไว้ เพราะ BM25 ไม่ต้องการค่าที่เป๊ะทุกครั้ง"""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        agg = SearchDocument.objects.aggregate(n=Count("course_id"), avg=Avg("length"))
+        stats = (agg["n"] or 0, float(agg["avg"] or 0.0))
+        cache.set(STATS_CACHE_KEY, stats, 300)
+    return stats
+
+
+def search_course_ids(query, limit=50):
+    """
+    คืน list ของ course id เรียงตามคะแนน BM25 (เฉพาะคอร์สที่แสดงในหน้าแรกได้:
+    เผยแพร่แล้ว และเจ้าของเป็นครูฝึก)
+    """
+    q_terms = set(t[:MAX_TERM_LENGTH] for t in tokenize(query))
+    if not q_terms:
+        return []
+
+    terms = dict(
+        SearchTerm.objects
+        .filter(term__in=q_terms, doc_freq__gt=0)
+        .values_list("id", "doc_freq")
+    )
+    if not terms:
+        return []
+
+    n_docs, avg_len = _corpus_stats()
+    avg_len = avg_len or 1.0
+    idf = {
+        tid: math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        for tid, df in terms.items()
+    }
+
+    postings = (
+        SearchPosting.objects
+        .filter(
+            term_id__in=terms.keys(),
+            course__is_published=True,
+            course__trainer__profile__role=Profile.Role.TRAINER,
+        )
+        .values_list("course_id", "term_id", "tf", "course__search_document__length")
+    )
+
+    scores = defaultdict(float)
+    for course_id, term_id, tf, length in postings.iterator(chunk_size=2000):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * (length or 0) / avg_len)
+        scores[course_id] += idf[term_id] * tf * (BM25_K1 + 1) / (tf + norm)
+
+    ranked = sorted(scores.items(), key=lambda kv: (-kv[1], -kv[0]))
+    return [course_id for course_id, _ in ranked[:limit]]
+
+
+def rebuild_index(chunk_size=500):
+    """ล้างแล้วสร้างดัชนีใหม่ทั้งหมด (ใช้ใน manage.py rebuild_search_index) คืนจำนวนคอร์ส"""
+    with transaction.atomic():
+        SearchPosting.objects.all().delete()
+        SearchDocument.objects.all().delete()
+        SearchTerm.objects.all().delete()
+
+    count = 0
+    for course in Course.objects.only(*FIELD_WEIGHTS).iterator(chunk_size=chunk_size):
+        index_course(course)
+        count += 1
+    return count
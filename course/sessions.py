@@ -0,0 +1,111 @@
+# course/sessions.py
+"""
+ตารางเรียนรายครั้ง (Session) ที่กางออกจากรอบเรียนรายสัปดาห์ (CourseRound)
+
+- เก็บล่วงหน้า CALENDAR_HORIZON_WEEKS สัปดาห์ ปฏิทิน / feed .ics อ่านจากตารางนี้ตรงๆ
+  ไม่ต้องกางรูปแบบรายสัปดาห์ใหม่ทุกครั้ง
+- รอบที่ถูกบันทึก -> sync_round_sessions() ปรับเฉพาะ Session ของรอบนั้น (ตั้งแต่วันนี้เป็นต้นไป)
+  Session ที่ยังตรงกับรูปแบบเดิมไม่ถูกแตะ (pk คงเดิม = UID ในปฏิทินของผู้ใช้คงเดิม)
+- ขอบเขตล่วงหน้าเลื่อนไปทุกวัน -> manage.py extend_sessions (ตั้ง cron วันละครั้ง)
+  สร้างเฉพาะวันที่ต่อจาก Session สุดท้ายของแต่ละรอบ
+- Session ในอดีตเก็บไว้เป็นประวัติ CALENDAR_HISTORY_DAYS วัน (feed .ics แสดงย้อนหลังเท่านี้)
+  เก่ากว่านั้น extend_sessions ลบทิ้ง ตารางจึงไม่โตไปเรื่อยๆ
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import CourseRound, Session, mask_to_days
+
+
+def horizon_weeks():
+    return getattr(settings, "CALENDAR_HORIZON_WEEKS", 8)
+
+
+def history_days():
+    return getattr(settings, "CALENDAR_HISTORY_DAYS", 30)
+
+
+def _aware(day, at):
+    return timezone.make_aware(datetime.combine(day, at))
+
+
+def occurrences(round_obj, first_day, last_day):
+    """Session (ยังไม่บันทึก) ของรอบนี้ทุกวันใน [first_day, last_day]"""
+    weekdays = set(mask_to_days(round_obj.weekday_mask))
+    if not weekdays or first_day > last_day:
+        return []
+    sessions = []
+    day = first_day
+    while day <= last_day:
+        if day.weekday() in weekdays:  # date.weekday(): จันทร์ = 0 ตรงกับ bit ของ weekday_mask
+            sessions.append(Session(
+                round_id=round_obj.pk,
+                course_id=round_obj.course_id,
+                date=day,
+                starts_at=_aware(day, round_obj.start_time),
+                ends_at=_aware(day, round_obj.end_time),
+            ))
+        day += timedelta(days=1)
+    return sessions
+
+
+@transaction.atomic
+def sync_round_sessions(round_obj, today=None):
+    """ทำให้ Session ของรอบนี้ตั้งแต่วันนี้ถึงขอบเขตล่วงหน้าตรงกับรูปแบบปัจจุบัน คืน (สร้าง, ลบ)"""
+    today = today or timezone.localdate()
+    wanted = {
+        s.date: s
+        for s in occurrences(round_obj, today, today + timedelta(weeks=horizon_weeks()))
+    }
+    stale = []
+    for pk, day, starts_at, ends_at in (
+        Session.objects.filter(round_id=round_obj.pk, date__gte=today)
+        .values_list("pk", "date", "starts_at", "ends_at")
+    ):
+        new = wanted.get(day)
+        if new is not None and (new.starts_at, new.ends_at) == (starts_at, ends_at):
+            del wanted[day]  # ยังตรงรูปแบบเดิม
+        else:
+            stale.append(pk)
+    if stale:
+        Session.objects.filter(pk__in=stale).delete()
+    if wanted:
+        Session.objects.bulk_create(wanted.values())
+    return len(wanted), len(stale)
+
+
+def extend_sessions(today=None, batch_size=500):
+    """
+    เลื่อนขอบเขตล่วงหน้าของทุกรอบ: สร้าง Session ที่ยังขาดจนถึงขอบเขตใหม่
+    และลบ Session ที่เก่ากว่า history_days() วัน คืน (จำนวนที่สร้าง, จำนวนที่ลบ)
+    """
+    today = today or timezone.localdate()
+    until = today + timedelta(weeks=horizon_weeks())
+    expired = today - timedelta(days=history_days())
+    created = pruned = 0
+    rounds = CourseRound.objects.exclude(weekday_mask=0).order_by("pk").only(
+        "pk", "course_id", "weekday_mask", "start_time", "end_time"
+    )
+    last_pk = 0
+    while True:
+        chunk = list(rounds.filter(pk__gt=last_pk)[:batch_size])
+        if not chunk:
+            return created, pruned
+        last_pk = chunk[-1].pk
+        # ลบทีละชุดของรอบ: ใช้ unique index (round, date) ไม่ต้องสแกนทั้งตาราง
+        pruned += Session.objects.filter(round__in=chunk, date__lt=expired).delete()[0]
+        last_dates = dict(
+            Session.objects.filter(round__in=chunk)
+            .values("round").annotate(last=Max("date")).values_list("round", "last")
+        )
+        new = []
+        for r in chunk:
+            last = last_dates.get(r.pk)
+            new += occurrences(r, max(today, last + timedelta(days=1)) if last else today, until)
+        # ignore_conflicts: กันกรณีรอบถูกบันทึกพร้อมกัน (ชน UniqueConstraint ของ round + date)
+        Session.objects.bulk_create(new, batch_size=1000, ignore_conflicts=True)
+        created += len(new)
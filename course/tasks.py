@@ -0,0 +1,14 @@
+# course/tasks.py
+"""งานเบื้องหลังของแอป course (ใส่คิวด้วย trainmydog.jobs.enqueue)"""
+from trainmydog.jobs import task
+
+from .models import Course
+from .search import FIELD_WEIGHTS, index_course
+
+
+@task
+def reindex_course(course_id):
+    """อัปเดตดัชนีค้นหาของคอร์ส (คอร์สที่ถูกลบแล้วถูกเอาออกจากดัชนีไปตอนลบ)"""
+    course = Course.objects.only(*FIELD_WEIGHTS).filter(pk=course_id).first()
+    if course is not None:
+        index_course(course)
@@ -1,3 +1,250 @@
+import datetime
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from base.models import Profile
+from trainmydog.jobs import work
+from trainmydog.models import Job
+
+from .forms import CourseRoundFormSet, ScheduleFilterForm
+from .geo import catalogue_points
+from .models import Course, CourseRound, Session, days_to_mask, mask_to_days, masks_with_any_day
+from .schedule import find_overlaps
+from .search import rebuild_index, search_course_ids
+from .sessions import extend_sessions, history_days, horizon_weeks
+from .tasks import reindex_course
+
+
+def make_trainer(username="trainer@example.com"):
+    user = User.objects.create_user(username, username, "x")
+    Profile.objects.filter(user=user).update(role=Profile.Role.TRAINER)
+    return user
+
+
+# ===== ดัชนีค้นหา (course/search.py) =====
+class SearchIndexTests(TestCase):
+
+    def test_rebuild_reads_courses_once(self):
+        trainer = make_trainer()
+        for i in range(10):
+            Course.objects.create(trainer=trainer, title=f"ฝึกสุนัขเชื่อฟัง {i}", location="กรุงเทพ", is_published=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(rebuild_index(), 10)
+
+        # Course.objects.only(...) ครั้งเดียว ไม่มี SELECT ฟิลด์ที่ถูก defer (เช่น cover_image) ทีละคอร์ส
+        course_reads = [q["sql"] for q in ctx.captured_queries if 'FROM "course_course"' in q["sql"]]
+        self.assertEqual(len(course_reads), 1, course_reads)
+        self.assertEqual(len(search_course_ids("เชื่อฟัง")), 10)
+
+    def test_save_indexes_course_in_job_queue(self):
+        course = Course.objects.create(
+            trainer=make_trainer(), title="คลาสลูกสุนัข", location="เชียงใหม่", is_published=True,
+        )
+        self.assertEqual(Job.objects.get().task, reindex_course.task_name)
+        self.assertEqual(search_course_ids("เชียงใหม่"), [])
+
+        work(burst=True)
+        self.assertEqual(search_course_ids("เชียงใหม่"), [course.pk])
+
+        # บันทึกเฉพาะฟิลด์ที่ไม่ได้อยู่ในดัชนี ไม่ต้องใส่งาน
+        course.save(update_fields=["max_dogs"])
+        self.assertFalse(Job.objects.filter(status=Job.Status.QUEUED).exists())
+
+
+# ===== Session รายครั้ง (course/sessions.py) =====
+class ExtendSessionsTests(TestCase):
+
+    def test_extends_horizon_and_prunes_old_history(self):
+        course = Course.objects.create(trainer=make_trainer(), title="คอร์สทุกวัน", is_published=True)
+        start = datetime.date(2026, 1, 1)
+        with self.settings(CALENDAR_HORIZON_WEEKS=1):
+            CourseRound.objects.create(
+                course=course, days=list(range(7)), start_time=datetime.time(9), end_time=datetime.time(10),
+            )
+            Session.objects.all().delete()
+            extend_sessions(today=start)
+
+            later = start + datetime.timedelta(days=history_days() + 3)
+            created, pruned = extend_sessions(today=later)
+
+        self.assertEqual(pruned, 3)
+        dates = list(Session.objects.order_by("date").values_list("date", flat=True))
+        self.assertEqual(dates[0], later - datetime.timedelta(days=history_days()))
+        self.assertEqual(dates[-1], later + datetime.timedelta(weeks=1))
+        self.assertGreater(created, 0)
+
+
+# ===== รอบเรียนเวลาชน (course/schedule.py, BaseCourseRoundFormSet) =====
+class RoundConflictTests(TestCase):
+
+    def setUp(self):
+        self.trainer = make_trainer()
+
+    def formset(self, rows, instance=None):
+        data = {"rounds-TOTAL_FORMS": len(rows), "rounds-INITIAL_FORMS": 0}
+        for i, (days, start, end) in enumerate(rows):
+            data.update({f"rounds-{i}-days": [str(d) for d in days], f"rounds-{i}-start_time": start, f"rounds-{i}-end_time": end})
+        return CourseRoundFormSet(data, instance=instance or Course(), prefix="rounds", trainer=self.trainer)
+
+    def test_find_overlaps_reports_days_of_each_pair(self):
+        t = datetime.time
+        slots = [("a", 0b101, t(9), t(11)), ("b", 0b100, t(10), t(12)), ("c", 0b001, t(11), t(12))]
+        self.assertEqual(find_overlaps(slots), {("a", "b"): [2]})
+
+    def test_overlapping_rows_in_same_formset(self):
+        formset = self.formset([([0, 2], "09:00", "11:00"), ([2], "10:00", "12:00")])
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(formset.forms[0].non_field_errors(), ["เวลาชนกับรอบที่ 2 ของคอร์สนี้ (วันพุธ)"])
+        self.assertEqual(formset.forms[1].non_field_errors(), ["เวลาชนกับรอบที่ 1 ของคอร์สนี้ (วันพุธ)"])
+
+    def test_back_to_back_rounds_do_not_conflict(self):
+        self.assertTrue(self.formset([([0], "09:00", "11:00"), ([0], "11:00", "13:00")]).is_valid())
+
+    def test_conflict_with_trainers_other_course(self):
+        morning = Course.objects.create(trainer=self.trainer, title="คอร์สเช้า")
+        CourseRound.objects.create(course=morning, days=[0, 1], start_time=datetime.time(9), end_time=datetime.time(11))
+        # คอร์สของครูฝึกคนอื่นเวลาเดียวกันไม่นับ
+        other = Course.objects.create(trainer=make_trainer("other@example.com"), title="คอร์สอื่น")
+        CourseRound.objects.create(course=other, days=[0], start_time=datetime.time(12), end_time=datetime.time(13))
+
+        formset = self.formset([([0], "10:00", "10:30"), ([0], "12:00", "13:00")])
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(
+            formset.forms[0].non_field_errors(), ["เวลาชนกับรอบ 09:00-11:00 ของคอร์ส “คอร์สเช้า” (วันจันทร์)"],
+        )
+        self.assertEqual(formset.forms[1].non_field_errors(), [])
+
+        # แก้คอร์สเดิม: รอบของคอร์สนี้เองในฐานข้อมูลไม่นับว่าชน
+        self.assertTrue(self.formset([([1], "09:30", "10:30")], instance=morning).is_valid())
+
+
+# ===== ตัวกรองวัน/เวลา (ScheduleFilterForm + weekday_mask) =====
+class ScheduleFilterTests(TestCase):
+
+    def setUp(self):
+        trainer = make_trainer()
+        rounds = {
+            "จันทร์พุธเช้า": [([0, 2], 9)],
+            "เสาร์บ่าย": [([5], 14)],
+            "สองรอบ": [([1], 18), ([5, 6], 8)],
+            "พุธค่ำ": [([2], 19)],
+            "ไม่มีรอบ": [],
+        }
+        for title, slots in rounds.items():
+            course = Course.objects.create(trainer=trainer, title=title, is_published=True)
+            for days, hour in slots:
+                CourseRound.objects.create(
+                    course=course, days=days, start_time=datetime.time(hour), end_time=datetime.time(hour + 1),
+                )
+
+    def filtered(self, **params):
+        form = ScheduleFilterForm(params)
+        self.assertTrue(form.is_valid(), form.errors)
+        return sorted(form.filter_courses(Course.objects.all()).values_list("title", flat=True))
+
+    def test_mask_helpers(self):
+        self.assertEqual(days_to_mask([0, 2, "2", 6, 9]), 0b1000101)
+        self.assertEqual(mask_to_days(0b1000101), [0, 2, 6])
+        masks = masks_with_any_day([1])
+        self.assertEqual(len(masks), 64)
+        self.assertTrue(all(m & 0b10 for m in masks))
+
+    def test_day_and_time_filters_match_exact_courses(self):
+        self.assertEqual(self.filtered(day=["2"]), ["จันทร์พุธเช้า", "พุธค่ำ"])
+        self.assertEqual(self.filtered(day=["5"]), ["สองรอบ", "เสาร์บ่าย"])
+        # คอร์สที่ตรงหลายวัน/หลายรอบออกมาครั้งเดียว
+        self.assertEqual(self.filtered(day=["1", "5", "6"]), ["สองรอบ", "เสาร์บ่าย"])
+        self.assertEqual(self.filtered(day=["5"], start_from="09:00"), ["เสาร์บ่าย"])
+        self.assertEqual(self.filtered(start_from="18:00"), ["พุธค่ำ", "สองรอบ"])
+        self.assertEqual(self.filtered(day=["0", "2"], start_to="10:00"), ["จันทร์พุธเช้า"])
+        self.assertEqual(self.filtered(day=["4"]), [])
+        self.assertEqual(len(self.filtered()), 5)  # ไม่กรอง = ทุกคอร์ส
+
+
+# ===== คอร์สใกล้ฉัน (course/geo.py) =====
+class CataloguePointsTests(TestCase):
+
+    def test_points_follow_public_courses(self):
+        trainer = make_trainer()
+        course = Course.objects.create(trainer=trainer, title="คอร์สบางรัก", location="เขตบางรัก", is_published=True)
+        Course.objects.create(trainer=trainer, title="คอร์สหางดง", location="หางดง เชียงใหม่", is_published=True)
+        self.assertEqual([p[3] for p in catalogue_points()], [1, 1])
+
+        course.is_published = False
+        course.save()
+        self.assertEqual(len(catalogue_points()), 1)
+
+        # ครูฝึกถูกลด role: คอร์สที่ยังเผยแพร่อยู่ก็ไม่นับ (Course.objects.public())
+        profile = Profile.objects.get(user=trainer)
+        profile.role = Profile.Role.MEMBER
+        profile.save()
+        self.assertEqual(catalogue_points(), [])
+
+
+# ===== JSON API (course/api.py) =====
+class CourseApiTests(TestCase):
+
+    def setUp(self):
+        trainer = make_trainer()
+        self.courses = []
+        for i in range(5):
+            course = Course.objects.create(trainer=trainer, title=f"คอร์ส {i}", location="กรุงเทพ", is_published=True)
+            for hour in (9, 13):
+                CourseRound.objects.create(
+                    course=course, days=[5, 6], start_time=datetime.time(hour), end_time=datetime.time(hour + 1),
+                )
+            self.courses.append(course)
+        Course.objects.create(trainer=trainer, title="ฉบับร่าง", is_published=False)
+        self.list_url = reverse("api_v1:course_list")
+
+    def get_list(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.list_url, params)
+        return response, len(ctx.captured_queries)
+
+    def test_cursor_pages_cover_public_courses_once(self):
+        ids, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            data = self.get_list(**params)[0].json()
+            ids += [item["id"] for item in data["results"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(ids, [c.pk for c in reversed(self.courses)])
+        self.assertEqual(self.get_list(cursor="เสีย")[0].status_code, 400)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        self.get_list(fields="id")  # สร้าง version ของหน้าในแคชก่อน
+        small, small_queries = self.get_list(limit=1)
+        large, large_queries = self.get_list(limit=5)
+        self.assertEqual(len(small.json()["results"]), 1)
+        self.assertEqual(len(large.json()["results"]), 5)
+        self.assertEqual(len(large.json()["results"][0]["rounds"]), 2)
+        self.assertEqual(small_queries, large_queries)
+
+    def test_fields_filter_and_hidden_courses(self):
+        response, _ = self.get_list(fields="id,title")
+        self.assertEqual(set(response.json()["results"][0]), {"id", "title"})
+        self.assertEqual(self.get_list(fields="id,secret")[0].status_code, 400)
+
+        draft = Course.objects.get(is_published=False)
+        self.assertEqual(self.client.get(reverse("api_v1:course_detail", args=[draft.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse("api_v1:course_rounds", args=[draft.pk])).status_code, 404)
+
+    def test_matching_etag_returns_not_modified(self):
+        url = reverse("api_v1:course_detail", args=[self.courses[0].pk])
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
 
-# Create your tests here.
+        CourseRound.objects.create(
+            course=self.courses[0], days=[0], start_time=datetime.time(18), end_time=datetime.time(19),
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["rounds"]), 3)
@@ -0,0 +1,93 @@
+# course/thai_tokenizer.py
+"""
+ตัดคำภาษาไทยแบบออฟไลน์ด้วยพจนานุกรม (maximal matching)
+
+ภาษาไทยไม่เว้นวรรคระหว่างคำ จึงใช้ dynamic programming เลือกการตัดที่
+1) มีตัวอักษรที่ไม่อยู่ในพจนานุกรมน้อยที่สุด 2) ได้จำนวนคำน้อยที่สุด
+ตัวอักษรที่ไม่รู้จักที่อยู่ติดกันจะถูกรวมเป็นคำเดียว
+ภาษาอังกฤษ/ตัวเลขตัดตามช่องว่างและเครื่องหมายตามปกติ
+"""
+import re
+from functools import lru_cache
+from pathlib import Path
+
+DICTIONARY_PATH = Path(__file__).resolve().parent / "data" / "thai_words.txt"
+
+# คำที่พบแทบทุกเอกสาร ไม่ช่วยจัดอันดับ -> ไม่เก็บใน index
+STOP_WORDS = frozenset({
+    "และ", "หรือ", "กับ", "ของ", "ที่", "ใน", "ให้", "ได้", "เป็น", "มี", "จะ", "ไม่",
+    "การ", "ความ", "โดย", "เพื่อ", "แล้ว", "ยัง", "ซึ่ง", "ทั้ง", "ถึง", "จาก", "นี้", "นั้น",
+    "the", "and", "or", "of", "a", "an", "to", "in", "for", "with",
+})
+
+_CHUNK_RE = re.compile("[\u0e00-\u0e7f]+|[0-9A-Za-z]+")
+_THAI_RE = re.compile("[\u0e00-\u0e7f]")
+
+
+@lru_cache(maxsize=1)
+def load_dictionary():
+    """คืน (set ของคำ, ความยาวคำที่ยาวที่สุด)"""
+    words = set()
+    with open(DICTIONARY_PATH, encoding="utf-8") as fh:
+        for line in fh:
+            word = line.strip()
+            if word and not word.startswith("#"):
+                words.add(word)
+    return frozenset(words), max((len(w) for w in words), default=1)
+
+
+def segment_thai(text):
+    """ตัดข้อความไทยที่ไม่มีช่องว่าง -> list ของคำ"""
+    words, max_len = load_dictionary()
+    n = len(text)
+    # best[i] = (จำนวนตัวอักษรที่ไม่รู้จัก, จำนวนคำ) ที่ดีที่สุดของ text[:i]
+    best = [(0, 0)] + [None] * n
+    back = [0] * (n + 1)
+    known = [False] * (n + 1)
+
+    for i in range(n):
+        if best[i] is None:
+            continue
+        unknown, count = best[i]
+        for j in range(i + 1, min(n, i + max_len) + 1):
+            if text[i:j] in words:
+                cand = (unknown, count + 1)
+                if best[j] is None or cand < best[j]:
+                    best[j], back[j], known[j] = cand, i, True
+        cand = (unknown + 1, count + 1)
+        if best[i + 1] is None or cand < best[i + 1]:
+            best[i + 1], back[i + 1], known[i + 1] = cand, i, False
+
+    pieces = []
+    j = n
+    while j > 0:
+        i = back[j]
+        pieces.append((text[i:j], known[j]))
+        j = i
+    pieces.reverse()
+
+    # รวมตัวอักษรที่ไม่รู้จักที่อยู่ติดกันเป็นคำเดียว
+    tokens = []
+    pending = ""
+    for piece, is_word in pieces:
+        if is_word:
+            if pending:
+                tokens.append(pending)
+                pending = ""
+            tokens.append(piece)
+        else:
+            pending += piece
+    if pending:
+        tokens.append(pending)
+    return tokens
+
+
+def tokenize(text, keep_stop_words=False):
+    """ข้อความ (ไทย/อังกฤษปนกัน) -> list ของ term ตัวพิมพ์เล็ก"""
+    terms = []
+    for chunk in _CHUNK_RE.findall((text or "").lower()):
+        parts = segment_thai(chunk) if _THAI_RE.match(chunk) else [chunk]
+        for term in parts:
+            if keep_stop_words or term not in STOP_WORDS:
+                terms.append(term)
+    return terms
@@ -1,40 +1,35 @@
-from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import get_object_or_404, redirect, render
 
 from .models import Course
 from .forms import CourseForm, CourseRoundFormSet
 from trainmydog.models import Profile
+from base.auth import role_required
+from trainmydog.pagination import paginate_request
+from trainmydog.counters import attach_course_counts
 
 
-# แค่ตรวจสิทธิ์ครูฝึก
+# แค่ตรวจสิทธิ์ครูฝึก (role อ่านจาก Profile ที่โหลดมากับผู้ใช้ ดู base/auth.py)
 def trainer_required(view_func):
-    return login_required(
-        user_passes_test(
-            lambda u: hasattr(u, "profile") and u.profile.role == Profile.Role.TRAINER
-        )(view_func)
-    )
+    return role_required(Profile.Role.TRAINER)(view_func)
 
 
 # คอร์สสาธารณะ
 def course_detail(request, pk):
-    course = get_object_or_404(
-        Course,
-        pk=pk,
-        is_published=True,
-        trainer__profile__role=Profile.Role.TRAINER,
-    )
+    course = get_object_or_404(Course.objects.public(), pk=pk)
     return render(request, "courses/course_detail.html", {"course": course})
 
 
 # คอร์สของครูฝึก
 @trainer_required
 def course_trainer(request):
-    qs = (
-        Course.objects.filter(trainer=request.user)
-        .prefetch_related("rounds")
-        .order_by("-created_at")
-    )
-    return render(request, "courses/course_trainer.html", {"courses": qs})
+    qs = Course.objects.filter(trainer=request.user).prefetch_related("rounds")
+    page = paginate_request(request, qs)
+    attach_course_counts(page)
+    return render(request, "courses/course_trainer.html", {
+        "courses": page,
+        "page": page,
+        "courses_count": Course.objects.filter(trainer=request.user).count(),
+    })
 
 
 # สร้างคอร์ส
@@ -42,7 +37,7 @@ def course_trainer(request):
 def create_course(request):
     if request.method == "POST":
         form = CourseForm(request.POST, request.FILES)
-        round_formset = CourseRoundFormSet(request.POST, prefix="rounds")
+        round_formset = CourseRoundFormSet(request.POST, prefix="rounds", trainer=request.user)
 
         if form.is_valid() and round_formset.is_valid():
             obj = form.save(commit=False)
@@ -73,7 +68,7 @@ def update_course(request, pk):
 
     if request.method == "POST":
         form = CourseForm(request.POST, request.FILES, instance=course)
-        round_formset = CourseRoundFormSet(request.POST, instance=course, prefix="rounds")
+        round_formset = CourseRoundFormSet(request.POST, instance=course, prefix="rounds", trainer=request.user)
 
         if form.is_valid() and round_formset.is_valid():
             form.save()
@@ -24,7 +24,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'base.dbrouter.ReadYourWritesMiddleware',  # ก่อน SessionMiddleware (base/dbrouter.py)
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'base.auth.SessionBackendMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -35,6 +37,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'tmdproject.urls'
 
+# โหลด User พร้อม Profile ในคำสั่งเดียว (base/auth.py)
+AUTHENTICATION_BACKENDS = ['base.auth.ProfileModelBackend']
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -58,18 +63,49 @@ WSGI_APPLICATION = 'tmdproject.wsgi.application'
 # ---- Database ----
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        # MySQL + connection pool ต่อ process (base/db/mysql_pool) ต้องใช้คู่กับ CONN_MAX_AGE = 0
+        'ENGINE': 'base.db.mysql_pool',
         'NAME': 'trainmydog_db',
         'USER': 'root',
         'PASSWORD': 'mysql.1234',
         'HOST': '127.0.0.1',
         'PORT': '3306',
+        'CONN_MAX_AGE': 0,
         'OPTIONS': {
             'charset': 'utf8mb4',
+            # size: เปิดค้างไว้ต่อ process, max_overflow: เปิดเพิ่มชั่วคราวได้อีก (ปิดเมื่อคืน)
+            # timeout: วินาทีที่รอ connection ว่าง, recycle: ปิดตัวที่ idle นานกว่านี้ (< wait_timeout ของ MySQL)
+            'pool': {'size': 5, 'max_overflow': 5, 'timeout': 10, 'recycle': 300, 'max_lifetime': 3600},
         }
     }
 }
 
+# ---- Read replica (base/dbrouter.py) ----
+# อ่านจาก replica / เขียนที่ default เพิ่ม alias ลงใน DATABASES แล้วใส่ชื่อใน DATABASE_REPLICAS เช่น
+# DATABASES['replica'] = {**DATABASES['default'], 'HOST': '10.0.0.12'}
+# DATABASE_REPLICAS = ['replica']
+DATABASE_ROUTERS = ['base.dbrouter.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS = 5  # หลังเขียน ผู้ใช้นั้นอ่านจาก primary ต่อกี่วินาที (> replication lag ปกติ)
+
+# ---- Cache ----
+# แคชหน้า public / รอบเรียน / พิกัดคอร์ส (trainmydog/cache.py, course/cache.py, course/geo.py)
+# ต้องเป็นแคชที่ทุก worker เห็นร่วมกัน: version stamp ถูกเพิ่มใน worker ที่บันทึกข้อมูล
+# ถ้าแต่ละ process มีแคชของตัวเอง (LocMemCache) worker อื่นจะเสิร์ฟหน้าเก่าต่อไป
+# ค่าเริ่มต้นใช้ตารางในฐานข้อมูล (สร้างด้วย python manage.py createcachetable)
+# มี Redis ใช้ 'django.core.cache.backends.redis.RedisCache' แทนได้เลย
+# (manage.py check เตือน trainmydog.W001 ถ้าตั้งเป็นแคชต่อ process)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
+ANONYMOUS_PAGE_CACHE_TIMEOUT = 300  # วินาที
+CALENDAR_HORIZON_WEEKS = 8  # สร้าง Session ล่วงหน้ากี่สัปดาห์ (ดู course/sessions.py)
+CALENDAR_HISTORY_DAYS = 30  # เก็บ Session ย้อนหลัง (และแสดงใน feed .ics) กี่วัน
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -92,6 +128,12 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# ไฟล์ที่อัปโหลดเก็บตาม SHA-256 ของเนื้อหา ไฟล์ซ้ำเก็บครั้งเดียว (base/storage.py)
+STORAGES = {
+    'default': {'BACKEND': 'base.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # ---- Tailwind ----
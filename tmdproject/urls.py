@@ -11,6 +11,9 @@ urlpatterns = [
 
     path('', include(('trainmydog.urls', 'trainmydog'), namespace='trainmydog')),
     path('courses/', include(('course.urls', 'course'), namespace='courses')),
+
+    # JSON API (อ่านอย่างเดียว) สำหรับแอปมือถือ
+    path('api/v1/', include(('course.api_urls', 'api_v1'), namespace='api_v1')),
 ]
 
 if settings.DEBUG:
@@ -5,7 +5,8 @@ from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 
 from base.models import Profile  
-from .models import TrainerApplication, TrainerCertificate
+from . import review
+from .models import TrainerApplication, TrainerCertificate, Job
 
 
 # ===== แนบ Profile ในหน้า User (ไว้ดู/แก้ role ได้สะดวก) =====
@@ -54,6 +55,8 @@ class TrainerApplicationAdmin(admin.ModelAdmin):
     search_fields = ("user__username", "user__email", "full_name", "phone", "email_snapshot")
     ordering = ("-created_at",)
     list_per_page = 25
+    # reviewed_by เป็น FK ที่ null ได้ select_related() อัตโนมัติของ admin ไม่ตามไปให้
+    list_select_related = ("user", "reviewed_by")
     inlines = [TrainerCertificateInline]
 
     readonly_fields = ("created_at", "reviewed_by", "reviewed_at")
@@ -73,31 +76,14 @@ class TrainerApplicationAdmin(admin.ModelAdmin):
                 profile.role = Profile.Role.TRAINER
                 profile.save(update_fields=["role"])
 
-    # ------- Bulk actions -------
+    # ------- Bulk actions (set-based: จำนวน query คงที่ ดู trainmydog/review.py) -------
     def approve_applications(self, request, queryset):
-        count = 0
-        for app in queryset.exclude(status=TrainerApplication.Status.APPROVED):
-            app.status = TrainerApplication.Status.APPROVED
-            app.reviewed_by = request.user
-            app.reviewed_at = timezone.now()
-            app.save()
-
-            profile, _ = Profile.objects.get_or_create(user=app.user)
-            if profile.role != Profile.Role.TRAINER:
-                profile.role = Profile.Role.TRAINER
-                profile.save(update_fields=["role"])
-            count += 1
+        count = review.approve_applications(queryset, request.user)
         self.message_user(request, f"อนุมัติคำร้องและอัปเกรดเป็นผู้ฝึกแล้ว {count} รายการ")
     approve_applications.short_description = "อนุมัติคำร้อง"
 
     def reject_applications(self, request, queryset):
-        updated = 0
-        for app in queryset.exclude(status=TrainerApplication.Status.REJECTED):
-            app.status = TrainerApplication.Status.REJECTED
-            app.reviewed_by = request.user
-            app.reviewed_at = timezone.now()
-            app.save()
-            updated += 1
+        updated = review.reject_applications(queryset, request.user)
         self.message_user(request, f"ปฏิเสธคำร้องแล้ว {updated} รายการ")
     reject_applications.short_description = "ปฏิเสธคำร้อง"
 
@@ -110,3 +96,22 @@ class TrainerCertificateAdmin(admin.ModelAdmin):
     readonly_fields = ("uploaded_at",)
     ordering = ("-uploaded_at",)
     list_per_page = 25
+
+
+# ===== คิวงานเบื้องหลัง (ดูงานที่ล้มเหลว / สั่งทำใหม่) =====
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "task", "status", "attempts", "max_attempts", "run_at", "locked_by", "updated_at")
+    list_filter = ("status", "task")
+    search_fields = ("task", "last_error")
+    ordering = ("-id",)
+    list_per_page = 50
+    readonly_fields = ("created_at", "updated_at", "locked_by", "locked_at", "last_error")
+    actions = ["requeue_jobs"]
+
+    def requeue_jobs(self, request, queryset):
+        updated = queryset.exclude(status=Job.Status.RUNNING).update(
+            status=Job.Status.QUEUED, attempts=0, run_at=timezone.now(), last_error="",
+        )
+        self.message_user(request, f"ใส่งานกลับเข้าคิวแล้ว {updated} รายการ")
+    requeue_jobs.short_description = "ใส่งานกลับเข้าคิว (เริ่มนับครั้งใหม่)"
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TrainmydogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trainmydog'
+
+    def ready(self):
+        from . import checks  # noqa: F401 (ลงทะเบียน system check)
@@ -0,0 +1,265 @@
+# trainmydog/cache.py
+"""
+แคชทั้งหน้าสำหรับผู้เข้าชมที่ยังไม่ล็อกอิน (หน้าแรก / รายละเอียดคอร์ส)
+
+- ส่วนที่ขึ้นกับผู้ใช้ (navbar, messages) ถูกแยกไปโหลดจาก user_fragment
+  ทำให้ HTML ของหน้าเหมือนกันทุกคน จึงเก็บไว้ใน cache ได้
+- version ของหน้า = สองส่วน อยู่ในแคชกลาง (settings.CACHES) ทุก worker เห็นค่าเดียวกัน
+  (แคชต่อ process เช่น LocMemCache ใช้ได้เฉพาะตอนรัน worker เดียว ดู trainmydog/checks.py)
+    - version ของเว็บ (PAGE_CACHE_VERSION_KEY): Profile.role / รูปย่อเปลี่ยน -> ทุกหน้าหมดอายุ
+    - หน้ารายการ (หน้าแรก, feed, API list): version ของแคตตาล็อก เปลี่ยนเมื่อคอร์ส/รอบเรียนใดๆ ถูกบันทึก/ลบ
+    - หน้าของคอร์สเดียว (course_kwarg=): Course.updated_at ของคอร์สนั้น ตั้งตอนบันทึก
+      แก้คอร์สหนึ่งจึงไม่ทำให้หน้ารายละเอียดของคอร์สอื่นหมดอายุ
+- ETag (public_page_condition) ให้ browser / reverse proxy ได้ 304 ก่อนถึงแคชหรือการ render
+- ใช้กับ async view ได้ (ASGI): ตอน hit ไม่ render และไม่ query ตารางของแอปเลย (อ่านแคชอย่างเดียว)
+- ตอน miss render จาก primary (base/dbrouter.py): replica ที่ตามไม่ทันหลัง version เปลี่ยน
+  จะไม่ถูกแช่ไว้ในแคชตลอด ANONYMOUS_PAGE_CACHE_TIMEOUT
+"""
+import hashlib
+import time
+from functools import partial, wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+
+from base.dbrouter import use_primary
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+PAGE_CACHE_VERSION_KEY = "pagecache:version"
+CATALOGUE_VERSION_KEY = "pagecache:catalogue"
+
+
+# version เป็นเวลา (ns) ที่เปลี่ยนครั้งล่าสุด ไม่ใช่ตัวนับ: ถ้า key ถูก evict ค่าใหม่จะไม่ย้อนไปชน
+# หน้าที่แคชไว้ใต้ version เก่า และไม่ต้องพึ่ง incr (DatabaseCache ทำ incr แบบอ่านแล้วเขียน ไม่ atomic)
+def page_cache_version():
+    version = cache.get(PAGE_CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(PAGE_CACHE_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(PAGE_CACHE_VERSION_KEY)
+    return version
+
+
+async def apage_cache_version():
+    version = await cache.aget(PAGE_CACHE_VERSION_KEY)
+    if version is None:
+        await cache.aadd(PAGE_CACHE_VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(PAGE_CACHE_VERSION_KEY)
+    return version
+
+
+def _course_version_key(course_pk):
+    return f"pagecache:course:{course_pk}"
+
+
+def _stamp(updated_at):
+    return f"{updated_at.timestamp():.6f}" if updated_at else "0"
+
+
+def _updated_at_query(course_pk):
+    from course.models import Course  # course.models import โมดูลนี้ตอนโหลด
+    return Course.objects.filter(pk=course_pk).values_list("updated_at", flat=True)
+
+
+def _version_keys(course_pk):
+    second = CATALOGUE_VERSION_KEY if course_pk is None else _course_version_key(course_pk)
+    return PAGE_CACHE_VERSION_KEY, second
+
+
+def page_version(course_pk=None):
+    """
+    version ของหน้า public: version ของเว็บ + (version ของแคตตาล็อก หรือ updated_at ของคอร์ส course_pk)
+    อ่านจากแคชรอบเดียว ตอน key ของคอร์สยังไม่มีในแคชเท่านั้นที่อ่าน updated_at จาก primary หนึ่งแถว
+    """
+    site_key, key = _version_keys(course_pk)
+    found = cache.get_many([site_key, key])
+    site = found.get(site_key) or page_cache_version()
+    part = found.get(key)
+    if part is None and course_pk is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        part = cache.get(key)
+    elif part is None:
+        with use_primary():
+            part = _stamp(_updated_at_query(course_pk).first())
+        if part != "0":  # ไม่เก็บ key ของ pk ที่ไม่มีอยู่
+            cache.add(key, part, timeout=None)
+    return f"{site}:{part}"
+
+
+async def apage_version(course_pk=None):
+    site_key, key = _version_keys(course_pk)
+    found = await cache.aget_many([site_key, key])
+    site = found.get(site_key) or await apage_cache_version()
+    part = found.get(key)
+    if part is None and course_pk is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        part = await cache.aget(key)
+    elif part is None:
+        with use_primary():
+            part = _stamp(await _updated_at_query(course_pk).afirst())
+        if part != "0":
+            await cache.aadd(key, part, timeout=None)
+    return f"{site}:{part}"
+
+
+def _request_version(request, course_pk):
+    """version ของหน้า อ่านครั้งเดียวต่อ request (ETag และแคชหน้าใช้ค่าเดียวกัน)"""
+    if not hasattr(request, "_page_cache_version"):
+        request._page_cache_version = page_version(course_pk)
+    return request._page_cache_version
+
+
+async def _arequest_version(request, course_pk):
+    if not hasattr(request, "_page_cache_version"):
+        request._page_cache_version = await apage_version(course_pk)
+    return request._page_cache_version
+
+
+def bump_page_cache_version(**kwargs):
+    """เรียกเมื่อข้อมูลที่แสดงในทุกหน้า public เปลี่ยน เช่น role ครูฝึก (ใช้เป็น signal receiver ได้)"""
+    cache.set(PAGE_CACHE_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_catalogue_version(course_pk, updated_at=None):
+    """
+    คอร์ส/รอบเรียนถูกบันทึก/ลบ: หน้ารายการหมดอายุ และหน้าของคอร์สนั้นใช้ updated_at ใหม่
+    (updated_at=None = คอร์สถูกลบ)
+    """
+    cache.set(CATALOGUE_VERSION_KEY, time.time_ns(), timeout=None)
+    if updated_at is None:
+        cache.delete(_course_version_key(course_pk))
+    else:
+        cache.set(_course_version_key(course_pk), _stamp(updated_at), timeout=None)
+
+
+def _is_cacheable_request(request):
+    """
+    เสิร์ฟจาก cache ได้เฉพาะ GET ที่ไม่มี session/messages cookie
+    (ไม่ต้องแตะ session table หรือ auth_user เลย)
+    """
+    if request.method not in ("GET", "HEAD"):
+        return False
+    cookies = request.COOKIES
+    return (
+        settings.SESSION_COOKIE_NAME not in cookies
+        and getattr(settings, "MESSAGE_COOKIE_NAME", "messages") not in cookies
+    )
+
+
+def _page_cache_key(request, version):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"pagecache:{version}:{path}"
+
+
+def _public_page_etag(request, version):
+    """
+    ETag ของหน้าที่แคชได้ (cache_shell): HTML ของหน้าเหมือนกันทุกผู้ใช้
+    และเปลี่ยนเมื่อ version ของหน้า (_request_version) เปลี่ยนเท่านั้น จึงไม่ต้อง render
+    (+ ปีปัจจุบัน เพราะ footer แสดงปี)
+    """
+    raw = f"{version}:{timezone.localdate().year}:{request.get_full_path()}"
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def _with_etag(request, response, etag):
+    if request.method in ("GET", "HEAD"):
+        response.headers.setdefault("ETag", etag)
+    return response
+
+
+def public_page_condition(view_func=None, *, course_kwarg=None):
+    """
+    decorator แบบ condition(etag_func=...) สำหรับหน้า public: If-None-Match ตรง -> 304 ก่อนถึงแคช/การ render
+    (condition() ของ Django เรียก etag_func แบบ sync แม้ view เป็น async จึงอ่าน version จากแคชกลางไม่ได้)
+    course_kwarg: ชื่อ URL kwarg ของ pk คอร์ส สำหรับหน้าของคอร์สเดียว (ไม่ระบุ = หน้ารายการ)
+    """
+    if view_func is None:
+        return partial(public_page_condition, course_kwarg=course_kwarg)
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapped(request, *args, **kwargs):
+            etag = _public_page_etag(request, await _arequest_version(request, kwargs.get(course_kwarg)))
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            return _with_etag(request, response, etag)
+
+        return _async_wrapped
+
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        etag = _public_page_etag(request, _request_version(request, kwargs.get(course_kwarg)))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = view_func(request, *args, **kwargs)
+        return _with_etag(request, response, etag)
+
+    return _wrapped
+
+
+def _cached_response(cached):
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    response["X-Page-Cache"] = "hit"
+    return response
+
+
+def _should_store(response):
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+def _cache_timeout():
+    return getattr(settings, "ANONYMOUS_PAGE_CACHE_TIMEOUT", 300)
+
+
+def anonymous_page_cache(view_func=None, *, course_kwarg=None):
+    """
+    decorator: แคชทั้งหน้าสำหรับผู้เข้าชมที่ยังไม่ล็อกอิน
+    ตอน hit จะคืน HttpResponse จาก cache โดยไม่เรียก view (course_kwarg เหมือน public_page_condition)
+    """
+    if view_func is None:
+        return partial(anonymous_page_cache, course_kwarg=course_kwarg)
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapped(request, *args, **kwargs):
+            if not _is_cacheable_request(request):
+                return await view_func(request, *args, **kwargs)
+
+            key = _page_cache_key(request, await _arequest_version(request, kwargs.get(course_kwarg)))
+            cached = await cache.aget(key)
+            if cached is not None:
+                return _cached_response(cached)
+
+            with use_primary():
+                response = await view_func(request, *args, **kwargs)
+            if _should_store(response):
+                await cache.aset(key, (response.content, response["Content-Type"]), _cache_timeout())
+                response["X-Page-Cache"] = "miss"
+            return response
+
+        return _async_wrapped
+
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if not _is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+
+        key = _page_cache_key(request, _request_version(request, kwargs.get(course_kwarg)))
+        cached = cache.get(key)
+        if cached is not None:
+            return _cached_response(cached)
+
+        with use_primary():
+            response = view_func(request, *args, **kwargs)
+        if _should_store(response):
+            cache.set(key, (response.content, response["Content-Type"]), _cache_timeout())
+            response["X-Page-Cache"] = "miss"
+        return response
+
+    return _wrapped
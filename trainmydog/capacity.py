@@ -0,0 +1,136 @@
+# trainmydog/capacity.py
+"""
+ระบบนับที่นั่งต่อรอบเรียน (กันการจองเกิน Course.max_dogs)
+
+แต่ละ CourseRound มี RoundSeatCounter 1 แถว การจองคือ UPDATE แบบมีเงื่อนไข
+
+    UPDATE ... SET reserved_dogs = reserved_dogs + n
+    WHERE round_id = ? AND reserved_dogs + n <= max_dogs
+
+ฐานข้อมูลล็อกแถวนี้ระหว่าง UPDATE จึงถูกต้องแม้มีคำขอจองพร้อมกันหลายร้อยรายการ
+(ถ้าไม่มีแถวไหนถูกอัปเดต = เต็มแล้ว) และไม่ต้อง SUM() ตาราง Booking ทุกครั้ง
+ถ้าตัวนับเพี้ยน (คืนที่นั่งมากกว่าที่นับไว้) จะ log แล้วนับใหม่จาก Booking ของรอบนั้น
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import Booking, RoundSeatCounter
+
+logger = logging.getLogger(__name__)
+
+
+class RoundFull(Exception):
+    """รอบนี้ไม่เหลือที่พอสำหรับจำนวนสุนัขที่ขอจอง"""
+
+    def __init__(self, remaining):
+        self.remaining = remaining
+        super().__init__(f"round is full (remaining={remaining})")
+
+
+def _held_dogs(round_id):
+    """จำนวนสุนัขของรายการที่นับที่นั่งในรอบนี้ (SUM จาก Booking — ใช้ตอนสร้าง/แก้ตัวนับเท่านั้น)"""
+    return (
+        Booking.objects
+        .filter(round_id=round_id, status__in=[Booking.Status.PENDING, Booking.Status.APPROVED])
+        .aggregate(total=Sum("dog_count"))["total"]
+    ) or 0
+
+
+def _ensure_counter(round_id):
+    """สร้างแถวตัวนับถ้ายังไม่มี (รอบที่สร้างหลัง migrate) โดยนับจาก Booking ครั้งเดียว"""
+    RoundSeatCounter.objects.get_or_create(round_id=round_id, defaults={"reserved_dogs": _held_dogs(round_id)})
+
+
+@transaction.atomic
+def resync_seat_counter(round_id):
+    """นับที่นั่งของรอบใหม่จาก Booking (ล็อกแถวตัวนับไว้ระหว่างนับ กันการจองแทรก) คืนค่าที่นับได้"""
+    list(RoundSeatCounter.objects.select_for_update().filter(round_id=round_id))
+    reserved = _held_dogs(round_id)
+    RoundSeatCounter.objects.update_or_create(round_id=round_id, defaults={"reserved_dogs": reserved})
+    return reserved
+
+
+def reserve_seats(course_round, dog_count):
+    """
+    จองที่ให้สุนัข dog_count ตัวในรอบนี้ (ต้องเรียกภายใน transaction เดียวกับการบันทึก Booking)
+    เต็ม -> raise RoundFull
+    """
+    capacity = course_round.course.max_dogs
+    qs = RoundSeatCounter.objects.filter(round_id=course_round.pk)
+    if capacity:
+        qs = qs.filter(reserved_dogs__lte=capacity - dog_count)
+
+    if qs.update(reserved_dogs=F("reserved_dogs") + dog_count):
+        return
+
+    if not RoundSeatCounter.objects.filter(round_id=course_round.pk).exists():
+        _ensure_counter(course_round.pk)
+        return reserve_seats(course_round, dog_count)
+
+    raise RoundFull(remaining_seats(course_round))
+
+
+def release_seats(round_id, dog_count):
+    """
+    คืนที่นั่ง (ปฏิเสธ/ยกเลิก/ลบรายการที่เคยนับที่นั่งไว้)
+    ต้องเรียกหลังบันทึกสถานะใหม่/ลบ Booking แล้ว: ถ้าตัวนับเพี้ยนจะนับใหม่จาก Booking ที่เหลือ
+    """
+    if not round_id:
+        return
+    if RoundSeatCounter.objects.filter(
+        round_id=round_id, reserved_dogs__gte=dog_count
+    ).update(reserved_dogs=F("reserved_dogs") - dog_count):
+        return
+    # ตัวนับน้อยกว่าที่ต้องคืน (หรือไม่มีแถว): มีการแก้ Booking ที่ไม่ผ่าน capacity.py
+    reserved = resync_seat_counter(round_id)
+    logger.warning(
+        "RoundSeatCounter ของรอบ %s เพี้ยน (คืน %s ตัวแต่นับไว้ไม่พอ) นับใหม่จาก Booking ได้ %s",
+        round_id, dog_count, reserved,
+    )
+
+
+def remaining_seats(course_round):
+    """ที่ว่างคงเหลือของรอบ (None = ไม่จำกัด)"""
+    capacity = course_round.course.max_dogs
+    if not capacity:
+        return None
+    reserved = (
+        RoundSeatCounter.objects
+        .filter(round_id=course_round.pk)
+        .values_list("reserved_dogs", flat=True)
+        .first()
+    ) or 0
+    return max(capacity - reserved, 0)
+
+
+@transaction.atomic
+def create_booking(booking):
+    """บันทึก Booking ใหม่พร้อมจองที่นั่งในรอบ (ทั้งคู่สำเร็จหรือไม่สำเร็จพร้อมกัน)"""
+    if booking.round_id and booking.holds_seat:
+        reserve_seats(booking.round, booking.dog_count)
+    booking.save()
+    return booking
+
+
+@transaction.atomic
+def change_booking_status(booking, new_status):
+    """เปลี่ยนสถานะ และคืนที่นั่งถ้าสถานะใหม่ไม่นับที่นั่งแล้ว"""
+    held = booking.holds_seat
+    booking.status = new_status
+    if not held and booking.holds_seat and booking.round_id:
+        reserve_seats(booking.round, booking.dog_count)
+    booking.save(update_fields=["status", "updated_at"])
+    if held and not booking.holds_seat:
+        release_seats(booking.round_id, booking.dog_count)
+    return booking
+
+
+@transaction.atomic
+def delete_booking(booking):
+    """ลบ Booking และคืนที่นั่งที่เคยจองไว้"""
+    held, round_id, dog_count = booking.holds_seat, booking.round_id, booking.dog_count
+    booking.delete()
+    if held:
+        release_seats(round_id, dog_count)
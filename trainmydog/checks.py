@@ -0,0 +1,22 @@
+# trainmydog/checks.py
+"""system check (manage.py check / runserver / test): แคชที่ version stamp ใช้ต้องแชร์กันทุก worker"""
+from django.conf import settings
+from django.core import checks
+
+# backend ที่แต่ละ process มีแคชของตัวเอง
+PROCESS_LOCAL_CACHES = {"django.core.cache.backends.locmem.LocMemCache"}
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        checks.Warning(
+            "CACHES['default'] เป็นแคชต่อ process: การบันทึกคอร์ส/รอบเรียนเพิ่ม version ของแคช"
+            "เฉพาะใน worker ที่บันทึก worker อื่นจะเสิร์ฟหน้า/รอบเรียน/พิกัดเก่าต่อไป",
+            hint="ใช้ได้เฉพาะเมื่อรัน worker เดียว (runserver) ไม่งั้นเปลี่ยนเป็น DatabaseCache หรือ RedisCache",
+            id="trainmydog.W001",
+        )
+    ]
@@ -0,0 +1,77 @@
+# trainmydog/counters.py
+"""
+อ่าน/สร้างใหม่ตัวนับจำนวนการจองต่อสถานะ (TrainerBookingCount, CourseBookingCount)
+ฝั่งเขียนทำใน signal ของ Booking (trainmydog/models.py)
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Booking, TrainerBookingCount, CourseBookingCount
+
+
+def trainer_status_counts(trainer):
+    """{status: count} ของครูฝึก (1 query บน unique index)"""
+    return dict(
+        TrainerBookingCount.objects
+        .filter(trainer=trainer)
+        .values_list("status", "count")
+    )
+
+
+def trainer_pending_count(trainer):
+    # จำไว้บน user ของ request: view และ badge ใน navbar ใช้ค่าเดียวกันโดย query ครั้งเดียว
+    if not hasattr(trainer, "_pending_booking_count"):
+        trainer._pending_booking_count = (
+            TrainerBookingCount.objects
+            .filter(trainer=trainer, status=Booking.Status.PENDING)
+            .values_list("count", flat=True)
+            .first()
+        ) or 0
+    return trainer._pending_booking_count
+
+
+def attach_course_counts(courses):
+    """ใส่ c.booking_status_counts = {status: count} ให้คอร์สทั้งหน้าใน query เดียว"""
+    courses = list(courses)
+    by_course = {c.pk: {} for c in courses}
+    rows = (
+        CourseBookingCount.objects
+        .filter(course_id__in=by_course.keys())
+        .values_list("course_id", "status", "count")
+    )
+    for course_id, status, count in rows:
+        by_course[course_id][status] = count
+    for c in courses:
+        c.booking_status_counts = by_course[c.pk]
+    return courses
+
+
+@transaction.atomic
+def rebuild_booking_counters(batch_size=1000):
+    """
+    สร้างตัวนับใหม่ทั้งหมดจากตาราง Booking (GROUP BY ครั้งเดียว + bulk insert)
+    คืนค่า (จำนวนแถว trainer, จำนวนแถว course)
+    """
+    rows = (
+        Booking.objects
+        .values("course_id", "trainer_id", "status")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    per_trainer, per_course = {}, {}
+    for row in rows.iterator(chunk_size=batch_size):
+        t_key = (row["trainer_id"], row["status"])
+        per_trainer[t_key] = per_trainer.get(t_key, 0) + row["n"]
+        per_course[(row["course_id"], row["status"])] = row["n"]
+
+    TrainerBookingCount.objects.all().delete()
+    CourseBookingCount.objects.all().delete()
+    TrainerBookingCount.objects.bulk_create(
+        [TrainerBookingCount(trainer_id=t, status=s, count=n) for (t, s), n in per_trainer.items()],
+        batch_size=batch_size,
+    )
+    CourseBookingCount.objects.bulk_create(
+        [CourseBookingCount(course_id=c, status=s, count=n) for (c, s), n in per_course.items()],
+        batch_size=batch_size,
+    )
+    return len(per_trainer), len(per_course)
@@ -0,0 +1,209 @@
+# trainmydog/exports.py
+"""
+ส่งออกรายการจองของครูฝึกเป็น CSV / XLSX แบบ streaming
+
+- อ่าน Booking เป็นชุดๆ ละ EXPORT_CHUNK_SIZE แถวด้วย keyset (created_at, id)
+  + values_list เฉพาะคอลัมน์ที่ใช้ (ไม่สร้าง model instance)
+  แต่ละชุดเป็น query ใหม่ จึงไม่ค้าง result ก้อนใหญ่ไว้ใน driver (mysqlclient buffer ทั้ง result)
+- XLSX เขียนเป็น zip แบบ stream (ไม่ต้อง seek) ทีละแถวลง sheet1.xml
+  ใช้ inline string จึงไม่ต้องเก็บ sharedStrings ทั้งไฟล์ไว้ในหน่วยความจำ
+  (inline string ไม่ถูกตีความเป็นสูตร ส่วน CSV ต้อง escape เอง ดู _csv_cell)
+หน่วยความจำของ worker จึงคงที่ไม่ว่าจะมีกี่แสนแถว
+"""
+import csv
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.utils import timezone
+
+from course.models import THAI_DAYS
+from .models import Booking
+from .pagination import keyset_queryset
+
+EXPORT_CHUNK_SIZE = 2000
+FLUSH_EVERY = 500  # แถว ต่อการส่ง chunk ออกไปหา client หนึ่งครั้ง
+
+EXPORT_FIELDS = (
+    "id", "created_at", "status", "course__title",
+    "round__days", "round__start_time", "round__end_time",
+    "owner_full_name", "owner_nickname", "owner_phone", "user__email",
+    "dog_name", "dog_count", "dog_gender", "dog_age_year", "dog_breed",
+    "message", "updated_at",
+)
+EXPORT_HEADERS = (
+    "เลขที่การจอง", "วันที่จอง", "สถานะ", "คอร์ส", "รอบเรียน",
+    "ชื่อ-นามสกุลเจ้าของ", "ชื่อเล่น", "เบอร์โทร", "อีเมล",
+    "ชื่อสุนัข", "จำนวนสุนัข", "เพศสุนัข", "อายุสุนัข (ปี)", "สายพันธุ์",
+    "ข้อความถึงครูฝึก", "อัปเดตล่าสุด",
+)
+
+_STATUS_LABELS = dict(Booking.Status.choices)
+_GENDER_LABELS = dict(Booking.DogGender.choices)
+
+
+def _fmt_datetime(value):
+    return timezone.localtime(value).strftime("%Y-%m-%d %H:%M") if value else ""
+
+
+def format_round(days, start, end):
+    """วัน + เวลาของรอบเรียนเป็นข้อความ (เช่น เสาร์, อาทิตย์ 09:00-11:00)"""
+    if start is None:
+        return ""
+    day_text = ", ".join(THAI_DAYS.get(int(d), str(d)) for d in sorted(days or []))
+    return f"{day_text} {start:%H:%M}-{end:%H:%M}".strip()
+
+
+def _format_row(row):
+    (pk, created_at, status, course_title, days, start, end, full_name, nickname, phone, email,
+     dog_name, dog_count, dog_gender, dog_age, dog_breed, message, updated_at) = row
+    return (
+        pk, _fmt_datetime(created_at), _STATUS_LABELS.get(status, status), course_title,
+        format_round(days, start, end), full_name, nickname, phone, email,
+        dog_name, dog_count, _GENDER_LABELS.get(dog_gender, dog_gender), dog_age, dog_breed,
+        message, _fmt_datetime(updated_at),
+    )
+
+
+def iter_export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE, descending=True):
+    """แถวที่จัดรูปแล้ว (tuple ตาม EXPORT_HEADERS) เรียงตาม (created_at, id) อ่านทีละชุดด้วย keyset"""
+    rows = queryset.values_list(*EXPORT_FIELDS)
+    position = None
+    while True:
+        count = 0
+        batch = keyset_queryset(rows, position, descending)[:chunk_size]
+        for row in batch.iterator(chunk_size=chunk_size):
+            count += 1
+            position = (row[1], row[0])
+            yield _format_row(row)
+        if count < chunk_size:
+            return
+
+
+# ===== CSV =====
+# ข้อความจากผู้จอง (ชื่อ / ข้อความถึงครูฝึก) ที่ขึ้นต้นด้วยตัวเหล่านี้ Excel/Sheets จะตีความเป็นสูตร
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    """กัน CSV/formula injection: เติม ' หน้าข้อความที่จะกลายเป็นสูตร (ตัวเลขไม่แตะ)"""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """file-like ที่คืนค่าที่เขียนกลับมา (ให้ csv.writer สร้าง string ทีละแถว)"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(headers, rows):
+    writer = csv.writer(_Echo())
+    # BOM: ให้ Excel เปิดไฟล์ UTF-8 ภาษาไทยได้ถูกต้อง
+    yield "\ufeff" + writer.writerow(headers)
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow([_csv_cell(value) for value in row]))
+        if len(buffer) >= FLUSH_EVERY:
+            yield "".join(buffer)
+            buffer.clear()
+    if buffer:
+        yield "".join(buffer)
+
+
+# ===== XLSX =====
+_XML_HEAD = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        _XML_HEAD
+        + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        _XML_HEAD
+        + f'<Relationships xmlns="{_NS_PKG_REL}">'
+        f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        _XML_HEAD
+        + f'<Relationships xmlns="{_NS_PKG_REL}">'
+        f'<Relationship Id="rId1" Type="{_NS_REL}/worksheet" Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class _ChunkSink:
+    """ปลายทางของ ZipFile ที่ไม่รองรับ seek: เก็บ bytes ไว้จนกว่าจะถูก drain() ส่งออก"""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _cell(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_ILLEGAL_XML.sub("", "" if value is None else str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(values):
+    return ("<row>" + "".join(_cell(v) for v in values) + "</row>").encode()
+
+
+def stream_xlsx(headers, rows, sheet_name="Bookings"):
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, xml in _XLSX_PARTS.items():
+            zf.writestr(name, xml)
+        zf.writestr("xl/workbook.xml", (
+            _XML_HEAD
+            + f'<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}"><sheets>'
+            f'<sheet name="{escape(sheet_name)}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ))
+        yield sink.drain()
+
+        # force_zip64: ขนาดไฟล์ไม่รู้ล่วงหน้า (stream) อาจเกิน 4GB สำหรับครูฝึกที่มีการจองมาก
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write((_XML_HEAD + f'<worksheet xmlns="{_NS_MAIN}"><sheetData>').encode())
+            sheet.write(_row(headers))
+            for i, row in enumerate(rows, start=1):
+                sheet.write(_row(row))
+                if i % FLUSH_EVERY == 0:
+                    data = sink.drain()
+                    if data:
+                        yield data
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
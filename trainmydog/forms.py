@@ -1,7 +1,12 @@
+from datetime import datetime, timedelta
+
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
 
 from .models import TrainerApplication, Booking
+from course.models import CourseRound
 
 
 class TrainerApplicationForm(forms.ModelForm):
@@ -40,6 +45,46 @@ class TrainerApplicationForm(forms.ModelForm):
 
 
 # ===== Booking =====
+class RoundChoiceIterator(forms.models.ModelChoiceIterator):
+    """วนจาก list ของรอบที่โหลดไว้แล้ว แทนการ query ใหม่ทุกครั้งที่ render"""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.rounds:
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.rounds) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.rounds)
+
+
+class RoundChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField สำหรับเลือกรอบเรียนจาก course.round_list()
+    ทั้งการ render และการ validate ใช้ list เดียวกัน (ไม่ query ซ้ำ)
+    """
+    iterator = RoundChoiceIterator
+
+    def __init__(self, rounds, **kwargs):
+        self.rounds = list(rounds)
+        super().__init__(queryset=CourseRound.objects.none(), **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        for obj in self.rounds:
+            if str(obj.pk) == str(value):
+                return obj
+        raise ValidationError(
+            self.error_messages["invalid_choice"],
+            code="invalid_choice",
+            params={"value": value},
+        )
+
+
 class BookingForm(forms.ModelForm):
     class Meta:
         model = Booking
@@ -103,11 +148,17 @@ class BookingForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         course = kwargs.pop("course", None)
         super().__init__(*args, **kwargs)
-        # จำกัด round ให้เลือกเฉพาะของคอร์สนั้น
+        # จำกัด round ให้เลือกเฉพาะของคอร์สนั้น (ใช้ list ที่โหลดครั้งเดียวต่อ request)
         if course:
-            self.fields["round"].queryset = course.rounds.all()
-            if not course.rounds.exists():
-                self.fields["round"].widget = forms.HiddenInput()
+            rounds = course.round_list()
+            field = self.fields["round"]
+            self.fields["round"] = RoundChoiceField(
+                rounds,
+                required=field.required,
+                label=field.label,
+                widget=field.widget if rounds else forms.HiddenInput(),
+            )
+            if not rounds:
                 self.fields["round"].required = False
 
 
@@ -121,3 +172,76 @@ class TrainerBookingActionForm(forms.ModelForm):
         if status not in [Booking.Status.APPROVED, Booking.Status.REJECTED]:
             raise ValidationError("สถานะไม่ถูกต้อง")
         return status
+
+
+class BookingFilterForm(forms.Form):
+    """
+    ตัวกรองกล่องคำขอการจองของครูฝึก (GET) — ใช้ร่วมกับการส่งออก
+    ทุกชุดตัวกรองลงที่ index ของ Booking: (trainer|course|round [, status], created_at)
+    ค้นชื่อ/เบอร์เป็นเงื่อนไขกรองระหว่างไล่ index ตามลำดับ (ไม่ต้อง filesort)
+    """
+    SORT_NEWEST = "newest"
+    SORT_OLDEST = "oldest"
+    SORT_CHOICES = [(SORT_NEWEST, "ใหม่สุดก่อน"), (SORT_OLDEST, "เก่าสุดก่อน")]
+
+    course = forms.TypedChoiceField(coerce=int, required=False, empty_value=None)
+    round = forms.TypedChoiceField(coerce=int, required=False, empty_value=None)
+    status = forms.ChoiceField(choices=[("", "ทุกสถานะ")] + Booking.Status.choices, required=False)
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    q = forms.CharField(required=False, max_length=100, strip=True)
+    sort = forms.ChoiceField(choices=SORT_CHOICES, required=False)
+
+    def __init__(self, *args, courses=(), rounds=(), **kwargs):
+        """courses = [(pk, title), ...], rounds = [(pk, label), ...] ของครูฝึกคนนี้"""
+        super().__init__(*args, **kwargs)
+        self.fields["course"].choices = [("", "ทุกคอร์ส")] + list(courses)
+        self.fields["round"].choices = [("", "ทุกรอบ")] + list(rounds)
+
+    def clean(self):
+        cleaned = super().clean()
+        start, end = cleaned.get("date_from"), cleaned.get("date_to")
+        if start and end and start > end:
+            raise ValidationError("วันที่เริ่มต้องไม่อยู่หลังวันที่สิ้นสุด")
+        return cleaned
+
+    @property
+    def descending(self):
+        return self.cleaned_data.get("sort") != self.SORT_OLDEST
+
+    def filter_queryset(self, queryset):
+        """
+        ใช้ตัวกรองที่ผ่านการตรวจแล้วกับ queryset (ช่องที่ไม่ผ่านจะถูกข้าม)
+        เรียก is_valid() ก่อน
+        """
+        data = self.cleaned_data
+        if data.get("round"):
+            queryset = queryset.filter(round_id=data["round"])
+        if data.get("course"):
+            queryset = queryset.filter(course_id=data["course"])
+        if data.get("status"):
+            queryset = queryset.filter(status=data["status"])
+        # ช่วงวันที่เป็นช่วงเวลา (ไม่ใช้ __date) เพื่อให้เป็น range บน created_at ท้าย index
+        if data.get("date_from"):
+            queryset = queryset.filter(created_at__gte=_start_of_day(data["date_from"]))
+        if data.get("date_to"):
+            queryset = queryset.filter(created_at__lt=_start_of_day(data["date_to"] + timedelta(days=1)))
+        if data.get("q"):
+            q = data["q"]
+            queryset = queryset.filter(
+                Q(owner_full_name__icontains=q)
+                | Q(owner_nickname__icontains=q)
+                | Q(owner_phone__contains=q)
+            )
+        return queryset
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+class BookingExportForm(BookingFilterForm):
+    """ตัวกรองเดียวกับกล่องคำขอ + รูปแบบไฟล์ที่ส่งออก"""
+    FORMAT_CHOICES = [("csv", "CSV"), ("xlsx", "Excel (XLSX)")]
+
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, initial="csv")
@@ -0,0 +1,129 @@
+# trainmydog/ical.py
+"""
+feed ปฏิทิน (.ics) ของครูฝึก (ทุกรอบที่สอน) และสมาชิก (รอบที่การจองได้รับอนุมัติ)
+
+- อ่านจากตาราง Session (course/sessions.py) ตั้งแต่ history_days() วันก่อนถึงขอบเขตล่วงหน้า
+- URL มี token ที่ลงลายมือชื่อ (signing) แทนการล็อกอิน เพราะแอปปฏิทินส่ง cookie ไม่ได้
+  token ผูกกับ Profile.calendar_key: ผู้ใช้กด "สร้างลิงก์ใหม่" แล้วลิงก์เดิมใช้ไม่ได้ทันที
+- feed_state() สรุป (จำนวน, เวลาแก้ไขล่าสุด) ด้วย aggregate query เดียวบน index
+  view ใช้ค่านี้เป็น ETag / Last-Modified: แอปปฏิทินที่ดึงทุกไม่กี่นาทีได้ 304 โดยไม่ต้อง render feed
+"""
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.db.models import Count, Max
+from django.urls import reverse
+from django.utils import timezone
+
+from base.models import Profile
+from course.models import Session, display_mask
+from course.sessions import history_days
+from .models import Booking
+
+
+# ===== token ใน URL =====
+def feed_token(profile, kind):
+    return signing.Signer(salt=f"calendar:{kind}").sign(f"{profile.user_id}.{profile.calendar_key}")
+
+
+def user_id_from_token(token, kind):
+    """token -> user id หรือ None ถ้าไม่ถูกต้อง / ลิงก์ถูกสร้างใหม่ไปแล้ว"""
+    try:
+        user_id, key = signing.Signer(salt=f"calendar:{kind}").unsign(token).split(".", 1)
+        user_id = int(user_id)
+    except (signing.BadSignature, ValueError):
+        return None
+    if not Profile.objects.filter(user_id=user_id, calendar_key=key).exists():
+        return None
+    return user_id
+
+
+# ===== ข้อมูลของ feed =====
+def feed_sessions(user_id, kind):
+    since = timezone.now() - timedelta(days=history_days())
+    qs = Session.objects.filter(starts_at__gte=since)
+    if kind == "trainer":
+        return qs.filter(course__trainer_id=user_id)
+    return qs.filter(
+        round__bookings__user_id=user_id,
+        round__bookings__status=Booking.Status.APPROVED,
+    )
+
+
+def feed_state(user_id, kind):
+    """(etag, last_modified) ของ feed — query เดียว ไม่โหลดแถว"""
+    marks = {"sessions": Max("updated_at"), "courses": Max("course__updated_at")}
+    if kind == "member":
+        marks["bookings"] = Max("round__bookings__updated_at")
+    state = feed_sessions(user_id, kind).aggregate(count=Count("id", distinct=True), **marks)
+    stamps = [state[key] for key in marks if state[key] is not None]
+    last_modified = max(stamps) if stamps else None
+    raw = f"{kind}:{user_id}:{timezone.localdate()}:" + ":".join(str(state[k]) for k in sorted(state))
+    return hashlib.md5(raw.encode()).hexdigest(), last_modified
+
+
+# ===== iCalendar (RFC 5545) =====
+def _escape(value):
+    return (
+        str(value or "")
+        .replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    """ตัดบรรทัดยาวเกิน 75 octet (ไม่ตัดกลางตัวอักษร UTF-8) ต่อด้วยบรรทัดที่ขึ้นต้นด้วยช่องว่าง"""
+    parts, current, size = [], "", 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > 75:
+            parts.append(current)
+            current, size = " ", 1
+        current += char
+        size += width
+    parts.append(current)
+    return "\r\n".join(parts)
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_feed(user_id, kind, name, build_url):
+    """
+    ข้อความ .ics ของ feed; build_url(path) -> URL เต็ม (เช่น request.build_absolute_uri)
+    """
+    sessions = (
+        feed_sessions(user_id, kind)
+        .select_related("course", "round")
+        .order_by("starts_at", "pk")
+        .distinct()
+    )
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Train My Dog//Course Calendar//TH",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+        "X-WR-TIMEZONE:Asia/Bangkok",
+    ]
+    now = _utc(timezone.now())
+    for s in sessions.iterator(chunk_size=500):
+        course, rnd = s.course, s.round
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:session-{s.pk}@trainmydog",
+            f"DTSTAMP:{now}",
+            f"LAST-MODIFIED:{_utc(s.updated_at)}",
+            f"DTSTART:{_utc(s.starts_at)}",
+            f"DTEND:{_utc(s.ends_at)}",
+            f"SUMMARY:{_escape(course.title)}",
+            f"LOCATION:{_escape(course.location)}",
+            f"DESCRIPTION:{_escape(f'รอบ {display_mask(rnd.weekday_mask)} {rnd.start_time:%H:%M}-{rnd.end_time:%H:%M}')}",
+            f"URL:{build_url(reverse('trainmydog:course_detail', args=[course.pk]))}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(_fold(line) for line in lines) + "\r\n"
@@ -0,0 +1,173 @@
+# trainmydog/jobs.py
+"""
+คิวงานเบื้องหลังบนตาราง Job ของเราเอง (ไม่ต้องใช้ Redis/broker)
+
+- ประกาศงานด้วย @task ใน <app>/tasks.py แล้วใส่คิวด้วย enqueue(func, **kwargs)
+  (kwargs ต้องแปลงเป็น JSON ได้ และถูกบันทึกใน transaction เดียวกับผู้เรียก)
+- manage.py run_workers --processes N ดึงงานด้วย SELECT ... FOR UPDATE SKIP LOCKED
+  (ฐานข้อมูลที่ไม่รองรับ เช่น SQLite ใช้ UPDATE แบบมีเงื่อนไขแทน จึงไม่มีงานถูกทำซ้ำ)
+- งานที่ error จะถูกลองใหม่แบบ exponential backoff ครบ max_attempts แล้วเป็น DEAD
+  (ดู/สั่งทำใหม่ได้จากหน้า admin)
+- worker ลบงาน DONE ที่เก่ากว่า DONE_RETENTION_DAYS วันเป็นระยะ (ตาราง Job ไม่โตเรื่อย ๆ)
+"""
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from base.dbrouter import use_primary
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 10          # วินาที (ครั้งที่ 1 รอ ~10s, ครั้งที่ 2 ~20s, ...)
+BACKOFF_MAX = 60 * 60
+LEASE_TIMEOUT = 15 * 60    # งาน running นานกว่านี้ถือว่า worker ตาย -> คืนเข้าคิว
+DONE_RETENTION_DAYS = 7
+PRUNE_INTERVAL = 10 * 60   # worker แต่ละตัวลบงานเก่าอย่างมากทุก 10 นาที
+PRUNE_BATCH = 1000
+
+TASKS = {}
+_stopping = False
+
+
+def task(func):
+    """decorator: ลงทะเบียนฟังก์ชันเป็นงานที่ใส่คิวได้"""
+    func.task_name = f"{func.__module__}.{func.__name__}"
+    TASKS[func.task_name] = func
+    return func
+
+
+def enqueue(func, *, delay=0, max_attempts=5, **kwargs):
+    """ใส่งานเข้าคิว คืน Job ที่สร้าง (func = ฟังก์ชันที่มี @task หรือชื่อเต็มของงาน)"""
+    name = getattr(func, "task_name", func)
+    if not isinstance(name, str):
+        raise ValueError(f"{func!r} ไม่ได้ประกาศด้วย @task")
+    return Job.objects.create(
+        task=name,
+        payload=kwargs,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def backoff_delay(attempts):
+    """เวลารอก่อนลองใหม่ (วินาที) หลังล้มเหลวมาแล้ว attempts ครั้ง (มี jitter กันงานชนกันเป็นก้อน)"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.75, 1.25)
+
+
+def claim_jobs(worker_id, limit=1):
+    """จองงานที่ถึงเวลาแล้วให้ worker นี้ (สูงสุด limit งาน)"""
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            qs = Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=now).order_by("run_at", "id")
+            if connection.features.has_select_for_update_skip_locked:
+                qs = qs.select_for_update(skip_locked=True)
+            ids = list(qs.values_list("pk", flat=True)[:limit])
+            if not ids:
+                return []
+            # status=QUEUED ซ้ำอีกครั้ง: ถ้าไม่มี SKIP LOCKED งานที่ worker อื่นเพิ่งจองไปจะไม่ถูกอัปเดต
+            Job.objects.filter(pk__in=ids, status=Job.Status.QUEUED).update(
+                status=Job.Status.RUNNING,
+                locked_by=worker_id,
+                locked_at=now,
+                attempts=F("attempts") + 1,
+                updated_at=now,
+            )
+    except OperationalError:
+        # SQLite: worker อื่นกำลังเขียนอยู่ (database is locked) -> รอบหน้าค่อยลองใหม่
+        return []
+    return list(Job.objects.filter(pk__in=ids, locked_by=worker_id, locked_at=now, status=Job.Status.RUNNING))
+
+
+def requeue_stale_jobs():
+    """คืนงานที่ค้าง running เกิน LEASE_TIMEOUT (worker ถูก kill) เข้าคิว หรือ DEAD ถ้าครบจำนวนครั้งแล้ว"""
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.Status.RUNNING, locked_at__lt=now - timedelta(seconds=LEASE_TIMEOUT))
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.DEAD, last_error="worker หยุดทำงานระหว่างทำงานนี้", locked_by="", locked_at=None, updated_at=now,
+    )
+    stale.update(status=Job.Status.QUEUED, run_at=now, locked_by="", locked_at=None, updated_at=now)
+
+
+def prune_done_jobs(keep_days=DONE_RETENTION_DAYS):
+    """ลบงาน DONE ที่เสร็จมาเกิน keep_days วัน (ทีละ PRUNE_BATCH แถว ไม่ล็อกตารางนาน) คืนจำนวนที่ลบ"""
+    done = Job.objects.filter(status=Job.Status.DONE, updated_at__lt=timezone.now() - timedelta(days=keep_days))
+    deleted = 0
+    try:
+        while ids := list(done.values_list("pk", flat=True)[:PRUNE_BATCH]):
+            deleted += Job.objects.filter(pk__in=ids).delete()[0]
+    except OperationalError:
+        # SQLite: worker อื่นกำลังเขียนอยู่ -> รอบหน้าค่อยลบต่อ
+        pass
+    return deleted
+
+
+def run_job(job):
+    """ทำงาน 1 งาน แล้วบันทึกผล (DONE / คิวใหม่พร้อม backoff / DEAD) คืน True ถ้าสำเร็จ"""
+    func = TASKS.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f"ไม่พบงานชื่อ {job.task}")
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        logger.warning("งาน %s ล้มเหลว (ครั้งที่ %s/%s)", job, job.attempts, job.max_attempts)
+        if job.attempts >= job.max_attempts:
+            changes = {"status": Job.Status.DEAD}
+        else:
+            changes = {"status": Job.Status.QUEUED, "run_at": now + timedelta(seconds=backoff_delay(job.attempts))}
+        Job.objects.filter(pk=job.pk).update(last_error=error, locked_by="", locked_at=None, updated_at=now, **changes)
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.Status.DONE, last_error="", locked_by="", locked_at=None, updated_at=timezone.now(),
+    )
+    return True
+
+
+def request_stop(*args):
+    """(signal handler) ให้ worker หยุดหลังทำงานที่ถืออยู่เสร็จ"""
+    global _stopping
+    _stopping = True
+
+
+def work(batch=1, poll_interval=1.0, burst=False, worker_id=None, keep_done_days=DONE_RETENTION_DAYS):
+    """
+    วนดึงงานมาทำจนกว่าจะถูกสั่งหยุด
+    burst=True: หยุดเมื่อคิวว่าง (ใช้กับ cron / ทดสอบ)  คืนจำนวนงานที่ทำ
+    keep_done_days=0: ไม่ลบงาน DONE
+    """
+    autodiscover_modules("tasks")
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    pruned_at = None
+    # worker อ่านจาก primary ทั้งหมด: งานที่เพิ่งจอง / ข้อมูลที่เพิ่งถูกเขียนอาจยังไม่ถึง replica
+    with use_primary():
+        while not _stopping:
+            requeue_stale_jobs()
+            if keep_done_days and (pruned_at is None or time.monotonic() - pruned_at >= PRUNE_INTERVAL):
+                prune_done_jobs(keep_done_days)
+                pruned_at = time.monotonic()
+            jobs = claim_jobs(worker_id, batch)
+            for job in jobs:
+                run_job(job)
+                processed += 1
+            if not jobs:
+                due = Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=timezone.now())
+                if burst and not due.exists():
+                    break
+                time.sleep(poll_interval)
+    return processed
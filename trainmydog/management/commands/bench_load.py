@@ -0,0 +1,444 @@
+# trainmydog/management/commands/bench_load.py
+"""
+Load test: จำลองผู้ใช้พร้อมกันหลายคน วัด throughput และ latency p50/p95/p99 ต่อ URL name
+
+    python manage.py bench_load --anon 20 --members 10 --trainers 2 --duration 30
+    python manage.py bench_load --base-url http://127.0.0.1:8000 --output bench.json
+    python manage.py bench_load --compare bench-main.json --output bench-branch.json
+
+- ไม่ใส่ --base-url: เรียก tmdproject.wsgi.application ตรงๆ ใน process นี้ (ไม่ต้องเปิด server)
+- ใส่ --base-url: ยิง HTTP ไปที่ server ที่รันอยู่ (runserver / gunicorn / uvicorn)
+ผู้ใช้ 3 แบบ: ผู้เข้าชม (หน้าแรก/feed/ค้นหา/รายละเอียดคอร์ส), สมาชิก (ล็อกอินแล้วจองผ่าน
+booking_create) และครูฝึก (trainer_booking_list + อนุมัติคำขอ)
+ข้อมูลตัวอย่างถูกสร้างก่อนเริ่มและลบทิ้งตอนจบ (ยกเว้นใส่ --keep)
+ผลลัพธ์ JSON เรียง key คงที่ เอาไป diff ระหว่าง commit ได้
+"""
+import datetime
+import io
+import json
+import random
+import re
+import subprocess
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urlsplit
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.urls import Resolver404, resolve, reverse
+
+from base.models import Profile
+from course.models import Course, CourseRound, days_to_mask
+from course.search import rebuild_index
+from course.sessions import extend_sessions
+from trainmydog.counters import rebuild_booking_counters
+from trainmydog.models import Booking
+
+PASSWORD = "bench-password"
+_CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+SEARCH_WORDS = ("ฝึกสุนัข", "ลูกสุนัข", "เชื่อฟัง", "กรุงเทพ", "พื้นฐาน")
+
+
+def percentile(sorted_values, pct):
+    """nearest-rank percentile ของ list ที่เรียงแล้ว"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def url_name(path):
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return "unresolved"
+    return match.view_name or match.func.__name__
+
+
+# ===== ตัวส่ง request (ใน process / ผ่าน HTTP) =====
+class WsgiSession:
+    """เรียก WSGI application ตรงๆ พร้อมจำ cookie เหมือน browser"""
+
+    def __init__(self, app):
+        self.app = app
+        self.cookies = {}
+
+    def request(self, method, path, data=None):
+        body = urlencode(data or {}).encode()
+        split = urlsplit(path)
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": split.path,
+            "QUERY_STRING": split.query,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "HTTP_HOST": "localhost",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "REMOTE_ADDR": "127.0.0.1",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": io.StringIO(),
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        if method == "POST":
+            environ["CONTENT_TYPE"] = "application/x-www-form-urlencoded"
+            environ["CONTENT_LENGTH"] = str(len(body))
+        if self.cookies:
+            environ["HTTP_COOKIE"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+
+        captured = {}
+
+        def start_response(status, headers, exc_info=None):
+            captured["status"] = int(status.split(" ", 1)[0])
+            captured["headers"] = headers
+
+        result = self.app(environ, start_response)
+        try:
+            content = b"".join(result)
+        finally:
+            getattr(result, "close", lambda: None)()
+
+        for name, value in captured["headers"]:
+            if name.lower() == "set-cookie":
+                key, _, rest = value.partition("=")
+                val = rest.split(";", 1)[0]
+                if val in ('""', ""):
+                    self.cookies.pop(key, None)
+                else:
+                    self.cookies[key] = val
+        return captured["status"], content
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """ยิง HTTP จริงไปยัง server (ไม่ตาม redirect เอง เพื่อวัดทีละ URL)"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.jar = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.jar), _NoRedirect)
+
+    def request(self, method, path, data=None):
+        body = urlencode(data).encode() if method == "POST" else None
+        req = Request(self.base_url + path, data=body, method=method)
+        req.add_header("Referer", self.base_url + path)  # CSRF ตรวจ Referer เมื่อเป็น https
+        try:
+            with self.opener.open(req, timeout=30) as resp:
+                return resp.status, resp.read()
+        except HTTPError as exc:
+            return exc.code, exc.read()
+
+
+# ===== ผู้ใช้จำลอง =====
+class VirtualUser(threading.Thread):
+
+    def __init__(self, kind, session, data, recorder, deadline, think, account=None):
+        super().__init__(daemon=True)
+        self.kind, self.session, self.data = kind, session, data
+        self.recorder, self.deadline, self.think = recorder, deadline, think
+        self.account = account
+
+    def hit(self, method, path, form=None):
+        start = time.perf_counter()
+        try:
+            status, content = self.session.request(method, path, form)
+        except Exception as exc:  # timeout / connection reset ฯลฯ
+            status, content = 0, str(exc).encode()
+        self.recorder.add(url_name(path), time.perf_counter() - start, status)
+        return status, content
+
+    def form_post(self, form_path, post_path, fields):
+        """GET ฟอร์มเพื่อเอา csrf token แล้ว POST (เหมือน browser)"""
+        _, content = self.hit("GET", form_path)
+        match = _CSRF_INPUT.search(content.decode("utf-8", "ignore"))
+        if match:
+            fields = {**fields, "csrfmiddlewaretoken": match.group(1)}
+        return self.hit("POST", post_path, fields)
+
+    def login(self):
+        path = reverse("Authen:login")
+        status, _ = self.form_post(path, path, {"username": self.account, "password": PASSWORD})
+        if status != 302:
+            raise CommandError(f"ล็อกอิน {self.account} ไม่สำเร็จ (HTTP {status})")
+
+    # ----- สถานการณ์ของผู้ใช้แต่ละแบบ -----
+    def anon_step(self):
+        course_pk = random.choice(self.data["course_ids"])
+        self.hit("GET", reverse("trainmydog:home"))
+        self.hit("GET", reverse("trainmydog:course_feed"))
+        self.hit("GET", reverse("trainmydog:course_detail", args=[course_pk]))
+        self.hit("GET", reverse("trainmydog:course_search") + "?" + urlencode({"q": random.choice(SEARCH_WORDS)}))
+
+    def member_step(self):
+        course_pk = random.choice(self.data["course_ids"])
+        self.hit("GET", reverse("trainmydog:course_detail", args=[course_pk]))
+        book = reverse("trainmydog:booking_create", args=[course_pk])
+        self.form_post(book, book, {
+            "owner_full_name": "ผู้ทดสอบ โหลด",
+            "owner_phone": "0800000000",
+            "dog_name": "บราวนี่",
+            "dog_count": 1,
+            "dog_age_year": 2,
+            "round": self.data["round_by_course"][course_pk],
+        })
+        self.hit("GET", reverse("trainmydog:booking_history"))
+
+    def trainer_step(self):
+        listing = reverse("trainmydog:trainer_booking_list")
+        _, content = self.hit("GET", listing)
+        pending = self.data["pending_by_trainer"][self.account]
+        with self.data["lock"]:
+            booking_pk = pending.pop() if pending else None
+        if booking_pk is not None:
+            match = _CSRF_INPUT.search(content.decode("utf-8", "ignore"))
+            self.hit("POST", reverse("trainmydog:trainer_booking_update_status", args=[booking_pk]), {
+                "status": random.choice(["approved", "rejected"]),
+                "csrfmiddlewaretoken": match.group(1) if match else "",
+            })
+
+    def run(self):
+        try:
+            if self.account:
+                self.login()
+            step = getattr(self, f"{self.kind}_step")
+            while time.monotonic() < self.deadline:
+                step()
+                if self.think:
+                    time.sleep(random.uniform(0, 2 * self.think))
+        finally:
+            close_old_connections()
+            connection.close()
+
+
+class Recorder:
+    """เก็บ latency ต่อ URL name (thread-safe)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, name, seconds, status):
+        with self.lock:
+            self.samples[name].append(seconds)
+            if status == 0 or status >= 400:
+                self.errors[name] += 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        total = 0
+        for name in sorted(self.samples):
+            values = sorted(self.samples[name])
+            total += len(values)
+            endpoints[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "rps": round(len(values) / elapsed, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        return {
+            "total_requests": total,
+            "total_errors": sum(self.errors.values()),
+            "throughput_rps": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+class Command(BaseCommand):
+    help = "จำลองผู้ใช้พร้อมกัน (ผู้เข้าชม/สมาชิก/ครูฝึก) แล้ววัด latency p50/p95/p99 ต่อ URL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--anon", type=int, default=10, help="จำนวนผู้เข้าชมที่ไม่ล็อกอิน")
+        parser.add_argument("--members", type=int, default=5, help="จำนวนสมาชิกที่จองคอร์ส")
+        parser.add_argument("--trainers", type=int, default=2, help="จำนวนครูฝึกที่จัดการคำขอ")
+        parser.add_argument("--duration", type=float, default=20.0, help="วินาที")
+        parser.add_argument("--think", type=float, default=0.0, help="เวลาคิดเฉลี่ยระหว่างรอบ (วินาที)")
+        parser.add_argument("--courses", type=int, default=200)
+        parser.add_argument("--bookings", type=int, default=2000, help="การจองที่มีอยู่ก่อนเริ่ม")
+        parser.add_argument("--base-url", help="ยิงไปที่ server นี้แทนการเรียก WSGI app ใน process")
+        parser.add_argument("--output", help="เขียนผลเป็น JSON")
+        parser.add_argument("--compare", help="JSON ผลรอบก่อน เพื่อแสดงการเปลี่ยนแปลงของ p95")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--keep", action="store_true", help="ไม่ลบข้อมูลตัวอย่างหลังจบ")
+
+    # ----- ข้อมูลตัวอย่าง -----
+    def _seed(self, tag, opts):
+        rng = random.Random(opts["seed"])
+        password = make_password(PASSWORD)  # hash ครั้งเดียวใช้ทุกบัญชี
+
+        def make_users(kind, count):
+            User.objects.bulk_create([
+                User(username=f"bench-{tag}-{kind}{i}@example.com", email=f"bench-{tag}-{kind}{i}@example.com",
+                     password=password)
+                for i in range(count)
+            ])
+            users = list(User.objects.filter(username__startswith=f"bench-{tag}-{kind}").order_by("pk"))
+            Profile.objects.bulk_create([
+                Profile(user=u, role=Profile.Role.TRAINER if kind == "trainer" else Profile.Role.MEMBER)
+                for u in users
+            ])
+            return users
+
+        trainers = make_users("trainer", max(1, opts["trainers"]))
+        members = make_users("member", max(1, opts["members"]))
+
+        Course.objects.bulk_create([
+            Course(
+                trainer=trainers[i % len(trainers)],
+                title=f"คอร์สฝึกสุนัขพื้นฐาน รุ่น {i}",
+                description="ฝึกนั่ง รอ เดินข้าง เรียกกลับ สำหรับลูกสุนัขและสุนัขโต",
+                location=rng.choice(["กรุงเทพ", "เชียงใหม่", "ขอนแก่น", "ภูเก็ต"]),
+                price=rng.choice([1500, 2500, 3900]),
+                is_published=True,
+                max_dogs=100000,  # ไม่ให้เต็มระหว่างวัด
+            )
+            for i in range(opts["courses"])
+        ])
+        courses = list(Course.objects.filter(trainer__in=trainers).order_by("pk"))
+        CourseRound.objects.bulk_create([
+            CourseRound(course=c, days=[5, 6], weekday_mask=days_to_mask([5, 6]),
+                        start_time=datetime.time(9), end_time=datetime.time(12))
+            for c in courses
+        ])
+        round_by_course = dict(CourseRound.objects.filter(course__in=courses).values_list("course_id", "pk"))
+
+        Booking.objects.bulk_create([
+            Booking(
+                user=rng.choice(members), course=course, trainer_id=course.trainer_id,
+                round_id=round_by_course[course.pk],
+                owner_full_name="ลูกค้าเดิม", owner_phone="0811111111", dog_name="ถุงทอง",
+                status=rng.choice(list(Booking.Status.values)),
+            )
+            for course in (rng.choice(courses) for _ in range(opts["bookings"]))
+        ], batch_size=1000)
+        rebuild_booking_counters()
+        rebuild_index()
+        extend_sessions()
+
+        pending_by_trainer = defaultdict(list)
+        for pk, trainer_email in (
+            Booking.objects.filter(course__in=courses, status=Booking.Status.PENDING)
+            .values_list("pk", "course__trainer__username")
+        ):
+            pending_by_trainer[trainer_email].append(pk)
+
+        return {
+            "trainers": [u.username for u in trainers],
+            "members": [u.username for u in members],
+            "course_ids": [c.pk for c in courses],
+            "round_by_course": round_by_course,
+            "pending_by_trainer": pending_by_trainer,
+            "lock": threading.Lock(),
+        }
+
+    def _cleanup(self, tag):
+        # ลบผู้ใช้ -> คอร์ส/รอบ/การจองถูกลบตาม (CASCADE)
+        User.objects.filter(username__startswith=f"bench-{tag}-").delete()
+
+    def _new_session(self, opts):
+        if opts["base_url"]:
+            return HttpSession(opts["base_url"])
+        from tmdproject.wsgi import application
+
+        return WsgiSession(application)
+
+    def handle(self, *args, **opts):
+        random.seed(opts["seed"])
+        tag = uuid.uuid4().hex[:8]
+        self.stdout.write(f"สร้างข้อมูลตัวอย่าง (tag={tag}) ...")
+        data = self._seed(tag, opts)
+        try:
+            recorder = Recorder()
+            deadline = time.monotonic() + opts["duration"]
+            users = (
+                [VirtualUser("anon", self._new_session(opts), data, recorder, deadline, opts["think"])
+                 for _ in range(opts["anon"])]
+                + [VirtualUser("member", self._new_session(opts), data, recorder, deadline, opts["think"],
+                               account=data["members"][i % len(data["members"])])
+                   for i in range(opts["members"])]
+                + [VirtualUser("trainer", self._new_session(opts), data, recorder, deadline, opts["think"],
+                               account=data["trainers"][i % len(data["trainers"])])
+                   for i in range(opts["trainers"])]
+            )
+            self.stdout.write(f"เริ่มผู้ใช้จำลอง {len(users)} คน นาน {opts['duration']:.0f} วินาที ...")
+            started = time.monotonic()
+            for u in users:
+                u.start()
+            for u in users:
+                u.join()
+            elapsed = time.monotonic() - started
+        finally:
+            if not opts["keep"]:
+                self._cleanup(tag)
+
+        result = {
+            "meta": self._meta(opts, elapsed),
+            **recorder.summary(elapsed),
+        }
+        self._print(result, opts.get("compare"))
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as fh:
+                json.dump(result, fh, indent=2, ensure_ascii=False, sort_keys=True)
+                fh.write("\n")
+            self.stdout.write(f"เขียนผลลง {opts['output']} แล้ว")
+
+    def _meta(self, opts, elapsed):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=5,
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            commit = ""
+        return {
+            "commit": commit,
+            "target": opts["base_url"] or "wsgi:tmdproject.wsgi.application",
+            "database": connection.vendor,
+            "users": {"anon": opts["anon"], "members": opts["members"], "trainers": opts["trainers"]},
+            "duration_s": round(elapsed, 2),
+            "dataset": {"courses": opts["courses"], "bookings": opts["bookings"]},
+            "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        }
+
+    def _print(self, result, compare_path):
+        previous = {}
+        if compare_path:
+            with open(compare_path, encoding="utf-8") as fh:
+                previous = json.load(fh).get("endpoints", {})
+
+        self.stdout.write(
+            f"\n{'url name':<46} {'req':>6} {'err':>4} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8}"
+            + ("  p95 เทียบรอบก่อน" if previous else "")
+        )
+        for name, row in result["endpoints"].items():
+            line = (
+                f"{name:<46} {row['requests']:>6} {row['errors']:>4} {row['rps']:>7.1f} "
+                f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}"
+            )
+            if name in previous and previous[name]["p95_ms"]:
+                change = (row["p95_ms"] - previous[name]["p95_ms"]) / previous[name]["p95_ms"] * 100
+                line += f"  {change:+.0f}%"
+            self.stdout.write(self.style.ERROR(line) if row["errors"] else line)
+        self.stdout.write(
+            f"\nรวม {result['total_requests']} requests ใน {result['meta']['duration_s']} วินาที "
+            f"= {result['throughput_rps']} req/s (error {result['total_errors']})"
+        )
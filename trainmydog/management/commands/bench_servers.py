@@ -0,0 +1,133 @@
+# trainmydog/management/commands/bench_servers.py
+"""
+เทียบ WSGI (gunicorn worker แบบ sync) กับ ASGI (uvicorn) บนเครื่องเดียวกันที่ concurrency สูง
+
+    python manage.py bench_servers
+    python manage.py bench_servers --workers 4 --anon 300 --duration 30 --output-dir bench/
+
+เปิด server ทีละตัวด้วยจำนวน worker (process) เท่ากัน แล้วยิง bench_load --base-url
+ด้วยผู้เข้าชมจำนวนมาก (หน้าแรก / feed / รายละเอียดคอร์ส / ค้นหา) จากนั้นแสดงผลคู่กัน
+ต้องติดตั้ง gunicorn และ uvicorn ก่อน (pip install gunicorn uvicorn)
+
+ค่าที่ควรดูคือ req/s ต่อ worker และ p95 เมื่อผู้ใช้พร้อมกันมากกว่าจำนวน worker หลายเท่า
+worker แบบ sync รับได้ทีละ request ส่วน ASGI รอฐานข้อมูล/แคชของหลาย request พร้อมกันใน
+event loop เดียว (view ที่เป็น async: home_view, course_detail_view, course_feed, /api/v1/)
+"""
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+SERVERS = {
+    "wsgi": ("gunicorn", lambda port, workers: [
+        sys.executable, "-m", "gunicorn", "tmdproject.wsgi:application",
+        "--worker-class", "sync", "--workers", str(workers),
+        "--bind", f"127.0.0.1:{port}", "--timeout", "120",
+    ]),
+    "asgi": ("uvicorn", lambda port, workers: [
+        sys.executable, "-m", "uvicorn", "tmdproject.asgi:application",
+        "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port),
+        "--lifespan", "off", "--no-access-log",
+    ]),
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url, proc, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise CommandError(f"server หยุดทำงานก่อนพร้อม (exit {proc.returncode})")
+        try:
+            with urlopen(url, timeout=2):
+                return
+        except (URLError, OSError):
+            time.sleep(0.3)
+    raise CommandError(f"server ไม่ตอบภายใน {timeout:.0f} วินาที: {url}")
+
+
+class Command(BaseCommand):
+    help = "เทียบ throughput / latency ของ gunicorn (WSGI sync) กับ uvicorn (ASGI) ด้วย bench_load"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="จำนวน process ต่อ server")
+        parser.add_argument("--anon", type=int, default=200, help="ผู้เข้าชมพร้อมกัน")
+        parser.add_argument("--duration", type=float, default=20.0, help="วินาทีต่อ server")
+        parser.add_argument("--courses", type=int, default=200)
+        parser.add_argument("--only", choices=sorted(SERVERS), action="append", help="วัดเฉพาะ server นี้")
+        parser.add_argument("--output-dir", help="เก็บผล JSON ของแต่ละ server (wsgi.json / asgi.json)")
+
+    def handle(self, *args, **opts):
+        names = opts["only"] or list(SERVERS)
+        missing = [SERVERS[n][0] for n in names if importlib.util.find_spec(SERVERS[n][0]) is None]
+        if missing:
+            raise CommandError(f"ยังไม่ได้ติดตั้ง {', '.join(missing)} (pip install {' '.join(missing)})")
+
+        out_dir = opts["output_dir"] or tempfile.mkdtemp(prefix="bench-servers-")
+        os.makedirs(out_dir, exist_ok=True)
+        results = {}
+        for name in names:
+            results[name] = self._run(name, opts, os.path.join(out_dir, f"{name}.json"))
+        self._print(results, opts["workers"])
+
+    def _run(self, name, opts, output):
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "tmdproject.settings")}
+        self.stdout.write(f"\n== {name}: {SERVERS[name][0]} x{opts['workers']} worker ที่ {base_url} ==")
+        proc = subprocess.Popen(
+            SERVERS[name][1](port, opts["workers"]), cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_until_up(base_url + "/", proc)
+            call_command(
+                "bench_load", base_url=base_url, anon=opts["anon"], members=0, trainers=0,
+                duration=opts["duration"], courses=opts["courses"], bookings=0, output=output,
+                stdout=self.stdout,
+            )
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        with open(output, encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def _print(self, results, workers):
+        names = list(results)
+        self.stdout.write("\n" + f"{'url name':<34}" + "".join(
+            f" {name + ' rps':>10} {name + ' p95':>10}" for name in names
+        ))
+        endpoints = sorted({e for r in results.values() for e in r["endpoints"]})
+        for endpoint in endpoints:
+            line = f"{endpoint:<34}"
+            for name in names:
+                row = results[name]["endpoints"].get(endpoint)
+                line += f" {row['rps']:>10.1f} {row['p95_ms']:>10.1f}" if row else f" {'-':>10} {'-':>10}"
+            self.stdout.write(line)
+        for name in names:
+            r = results[name]
+            self.stdout.write(
+                f"{name}: {r['throughput_rps']} req/s ({r['throughput_rps'] / workers:.1f} ต่อ worker), "
+                f"error {r['total_errors']}"
+            )
+        if len(names) == 2 and results[names[0]]["throughput_rps"]:
+            ratio = results[names[1]]["throughput_rps"] / results[names[0]]["throughput_rps"]
+            self.stdout.write(self.style.SUCCESS(f"{names[1]} / {names[0]} = {ratio:.2f} เท่า"))
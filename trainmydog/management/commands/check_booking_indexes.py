@@ -0,0 +1,134 @@
+# trainmydog/management/commands/check_booking_indexes.py
+"""
+ตรวจว่าทุกชุดตัวกรองของกล่องคำขอครูฝึกอ่าน Booking ผ่าน index (ไม่มี full scan / filesort)
+
+    python manage.py check_booking_indexes
+    python manage.py check_booking_indexes --trainer 12 --verbose
+
+สร้าง SQL ด้วย BookingFilterForm + keyset_queryset ชุดเดียวกับ trainer_booking_list
+ทุกชุดของ (คอร์ส, รอบ, สถานะ, ช่วงวันที่, คำค้น) x (ใหม่สุด/เก่าสุด) x (หน้าแรก/หน้าถัดไป)
+แล้วรัน EXPLAIN (MySQL) / EXPLAIN QUERY PLAN (SQLite)
+ล้มเหลวเมื่อมีตารางใดถูกอ่านแบบ type=ALL, ไม่มี key หรือต้อง filesort / temporary
+
+แผนของ MySQL ขึ้นกับสถิติของตาราง ควรรันกับฐานข้อมูลที่มีขนาดใกล้ production
+(ถ้าไม่ระบุ --trainer จะเลือกครูฝึกที่มีการจองมากที่สุด)
+"""
+import itertools
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+from trainmydog.forms import BookingFilterForm
+from trainmydog.models import Booking
+from trainmydog.pagination import DEFAULT_PER_PAGE, keyset_queryset
+
+FACETS = ("course", "round", "status", "dates", "q")
+
+
+def _explain_mysql(cursor, sql, params):
+    """คืน (คำอธิบายแผน, ปัญหาที่พบ)"""
+    cursor.execute("EXPLAIN " + sql, params)
+    columns = [c[0].lower() for c in cursor.description]
+    plan, problems = [], []
+    for values in cursor.fetchall():
+        row = dict(zip(columns, values))
+        extra = row.get("extra") or ""
+        plan.append(f"{row['table']}:{row['type']}:{row['key']}")
+        if row["type"] == "ALL" or not row["key"]:
+            problems.append(f"{row['table']} ไม่ได้ใช้ index (type={row['type']})")
+        if "filesort" in extra or "temporary" in extra:
+            problems.append(f"{row['table']}: {extra}")
+    return " ".join(plan), problems
+
+
+def _explain_sqlite(cursor, sql, params):
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    plan, problems = [], []
+    for row in cursor.fetchall():
+        detail = row[-1]
+        plan.append(detail)
+        if detail.startswith("SCAN") and "INDEX" not in detail:
+            problems.append(detail)
+        if "TEMP B-TREE" in detail:
+            problems.append(detail)
+    return " | ".join(plan), problems
+
+
+EXPLAINERS = {"mysql": _explain_mysql, "sqlite": _explain_sqlite}
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN ทุกชุดตัวกรองของกล่องคำขอการจองของครูฝึก และตรวจว่าใช้ index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--trainer", type=int, help="user id ของครูฝึกที่ใช้สร้าง query")
+        parser.add_argument("--verbose", action="store_true", help="แสดงแผนของทุก query")
+
+    def handle(self, *args, **opts):
+        explain = EXPLAINERS.get(connection.vendor)
+        if explain is None:
+            raise CommandError(f"ยังไม่รองรับฐานข้อมูล {connection.vendor}")
+
+        trainer_id = opts["trainer"] or self._busiest("trainer") or 0
+        bookings = Booking.objects.filter(trainer_id=trainer_id)
+        course_id = self._busiest("course", bookings) or 0
+        round_id = self._busiest("round", bookings.filter(course_id=course_id)) or 0
+        today = timezone.localdate()
+        position = (timezone.now(), 2 ** 31)
+
+        failures = 0
+        self.stdout.write(f"ครูฝึก {trainer_id}, คอร์ส {course_id}, รอบ {round_id} ({connection.vendor})")
+        for enabled in itertools.product((False, True), repeat=len(FACETS)):
+            on = dict(zip(FACETS, enabled))
+            data = {
+                "course": course_id if on["course"] else "",
+                "round": round_id if on["round"] else "",
+                "status": Booking.Status.PENDING if on["status"] else "",
+                "date_from": today.replace(day=1) if on["dates"] else "",
+                "date_to": today if on["dates"] else "",
+                "q": "สมชาย" if on["q"] else "",
+            }
+            for sort, page in itertools.product(
+                (BookingFilterForm.SORT_NEWEST, BookingFilterForm.SORT_OLDEST), ("first", "next")
+            ):
+                form = BookingFilterForm(
+                    {**data, "sort": sort},
+                    courses=[(course_id, "")], rounds=[(round_id, "")],
+                )
+                if not form.is_valid():
+                    raise CommandError(form.errors.as_text())
+                qs = form.filter_queryset(
+                    Booking.objects.filter(trainer_id=trainer_id).select_related("user", "course", "round")
+                )
+                qs = keyset_queryset(qs, position if page == "next" else None, form.descending)
+                sql, params = qs[:DEFAULT_PER_PAGE + 1].query.sql_with_params()
+                with connection.cursor() as cursor:
+                    plan, problems = explain(cursor, sql, params)
+
+                label = "+".join(f for f in FACETS if on[f]) or "(ไม่มีตัวกรอง)"
+                line = f"{label:<32} {sort:<7} {page:<5} {'ok' if not problems else 'FAIL'}"
+                if problems:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(line))
+                    for problem in problems:
+                        self.stdout.write(f"    {problem}")
+                elif opts["verbose"]:
+                    self.stdout.write(line)
+                if opts["verbose"]:
+                    self.stdout.write(f"    {plan}")
+
+        if failures:
+            raise CommandError(f"{failures} query ไม่ได้ใช้ index ตามที่ควร")
+        self.stdout.write(self.style.SUCCESS("ทุกชุดตัวกรองใช้ index ของ Booking"))
+
+    @staticmethod
+    def _busiest(field, queryset=None):
+        """id ของ trainer / course / round ที่มีการจองมากที่สุด"""
+        queryset = Booking.objects.all() if queryset is None else queryset
+        row = (
+            queryset.exclude(**{f"{field}__isnull": True})
+            .values(field).annotate(n=Count("id")).order_by("-n").first()
+        )
+        return row[field] if row else None
@@ -0,0 +1,17 @@
+# trainmydog/management/commands/rebuild_booking_counters.py
+from django.core.management.base import BaseCommand
+
+from trainmydog.counters import rebuild_booking_counters
+
+
+class Command(BaseCommand):
+    help = "สร้างตัวนับจำนวนการจองต่อสถานะ (ครูฝึก / คอร์ส) ใหม่ทั้งหมดจากตาราง Booking"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        trainers, courses = rebuild_booking_counters(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"สร้างตัวนับใหม่แล้ว: ครูฝึก {trainers} แถว, คอร์ส {courses} แถว"
+        ))
@@ -0,0 +1,74 @@
+# trainmydog/management/commands/run_workers.py
+"""
+รัน worker ดึงงานจากคิว Job (trainmydog/jobs.py)
+
+    python manage.py run_workers --processes 4
+    python manage.py run_workers --burst          # ทำงานที่ค้างให้หมดแล้วจบ (cron)
+    python manage.py run_workers --keep-done-days 30
+
+Ctrl+C / SIGTERM: แต่ละ worker ทำงานที่ถืออยู่ให้เสร็จก่อนแล้วค่อยหยุด
+"""
+import signal
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+
+
+def _worker_main(options):
+    """(process ลูก) setup Django ใหม่แล้ววนทำงาน"""
+    import django
+
+    django.setup()
+    _run(options)
+
+
+def _run(options):
+    from trainmydog import jobs
+
+    signal.signal(signal.SIGTERM, jobs.request_stop)
+    signal.signal(signal.SIGINT, jobs.request_stop)
+    return jobs.work(**options)
+
+
+class Command(BaseCommand):
+    help = "รัน worker (หลาย process) ดึงงานเบื้องหลังจากตาราง Job"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--batch", type=int, default=1, help="จำนวนงานที่จองต่อรอบต่อ worker")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="วินาทีที่รอเมื่อคิวว่าง")
+        parser.add_argument("--burst", action="store_true", help="หยุดเมื่อไม่มีงานค้างในคิว")
+        parser.add_argument(
+            "--keep-done-days", type=int, default=7, help="ลบงานที่เสร็จแล้วเก่ากว่ากี่วัน (0 = ไม่ลบ)"
+        )
+
+    def handle(self, *args, **opts):
+        options = {
+            "batch": opts["batch"],
+            "poll_interval": opts["poll_interval"],
+            "burst": opts["burst"],
+            "keep_done_days": opts["keep_done_days"],
+        }
+
+        if opts["processes"] <= 1:
+            processed = _run(options)
+            self.stdout.write(self.style.SUCCESS(f"worker หยุดแล้ว (ทำไป {processed} งาน)"))
+            return
+
+        # spawn: process ลูกไม่สืบทอด connection ฐานข้อมูลของ process แม่
+        ctx = get_context("spawn")
+        workers = [ctx.Process(target=_worker_main, args=(options,)) for _ in range(opts["processes"])]
+        for p in workers:
+            p.start()
+        self.stdout.write(f"เริ่ม worker {len(workers)} process: {', '.join(str(p.pid) for p in workers)}")
+
+        def stop(*args):
+            for p in workers:
+                if p.is_alive():
+                    p.terminate()  # ส่ง SIGTERM -> worker หยุดหลังทำงานปัจจุบันเสร็จ
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C ส่งถึง process ลูกเองอยู่แล้ว
+        for p in workers:
+            p.join()
+        self.stdout.write(self.style.SUCCESS("worker หยุดครบทุก process แล้ว"))
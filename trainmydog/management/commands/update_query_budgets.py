@@ -0,0 +1,56 @@
+# trainmydog/management/commands/update_query_budgets.py
+"""
+เขียน query_budgets.json ใหม่จากจำนวน query ที่วัดได้ของทุก route (trainmydog/query_budgets.py)
+
+    python manage.py update_query_budgets
+    python manage.py update_query_budgets --sizes 10 1000
+
+วัดในฐานข้อมูลทดสอบที่สร้างใหม่แล้วลบทิ้ง (เหมือน manage.py test) ไม่แตะข้อมูลจริง
+ไม่เขียนไฟล์ถ้ามี route ที่ query โตตามขนาดข้อมูล หรือตอบ error: ต้องแก้ก่อน ไม่ใช่เพิ่มงบ
+ตรวจ diff ของ query_budgets.json ก่อน commit
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from trainmydog import query_budgets
+
+
+class Command(BaseCommand):
+    help = "วัดจำนวน SQL query ต่อ route ที่ข้อมูล 2 ขนาด แล้วเขียน query_budgets.json ใหม่"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs=2, default=list(query_budgets.SIZES), metavar=("SMALL", "LARGE"),
+        )
+
+    def handle(self, *args, **opts):
+        missing = query_budgets.unlisted_routes()
+        if missing:
+            raise CommandError(f"route ที่ยังไม่มีวิธีเรียกใน ROUTES: {', '.join(missing)}")
+
+        small, large = opts["sizes"]
+        old_name = connection.settings_dict["NAME"]
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(CACHES=query_budgets.MEASURE_CACHES):
+                runs = query_budgets.measure(small), query_budgets.measure(large)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        budgets = query_budgets.load_budgets()
+        found = query_budgets.problems(*runs)
+        self.stdout.write(f"{'route':<48} {small:>6} {large:>6} {'เดิม':>6}")
+        for name in query_budgets.ROUTES:
+            a, b = runs[0][name], runs[1][name]
+            line = f"{name:<48} {a.count:>6} {b.count:>6} {budgets.get(name, '-'):>6}"
+            self.stdout.write(self.style.ERROR(line) if name in found else line)
+            if name in found:
+                self.stdout.write(query_budgets.describe(b))
+
+        if found:
+            raise CommandError("\n".join(f"{name}: {', '.join(issues)}" for name, issues in found.items()))
+        query_budgets.write_budgets(*runs)
+        self.stdout.write(self.style.SUCCESS(f"เขียน {query_budgets.BUDGET_FILE.name} แล้ว"))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0001_initial'),
+        ('trainmydog', '0003_booking'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'created_at'], name='trainmydog__user_id_386e5a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['course', 'created_at'], name='trainmydog__course__5dbf81_idx'),
+        ),
+    ]
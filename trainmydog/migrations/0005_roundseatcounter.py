@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_seat_counters(apps, schema_editor):
+    """นับจำนวนสุนัขที่จองไว้แล้ว (pending + approved) ของแต่ละรอบ ครั้งเดียวตอน migrate"""
+    CourseRound = apps.get_model('course', 'CourseRound')
+    Booking = apps.get_model('trainmydog', 'Booking')
+    RoundSeatCounter = apps.get_model('trainmydog', 'RoundSeatCounter')
+
+    reserved = dict(
+        Booking.objects
+        .filter(round__isnull=False, status__in=['pending', 'approved'])
+        .values('round_id')
+        .annotate(total=Sum('dog_count'))
+        .values_list('round_id', 'total')
+    )
+    RoundSeatCounter.objects.bulk_create(
+        [
+            RoundSeatCounter(round_id=pk, reserved_dogs=reserved.get(pk) or 0)
+            for pk in CourseRound.objects.values_list('pk', flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0002_course_trainer_created_index'),
+        ('trainmydog', '0004_booking_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoundSeatCounter',
+            fields=[
+                ('round', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='seat_counter', serialize=False, to='course.courseround')),
+                ('reserved_dogs', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_seat_counters, migrations.RunPython.noop),
+    ]
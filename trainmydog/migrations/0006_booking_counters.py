@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_booking_counters(apps, schema_editor):
+    Booking = apps.get_model('trainmydog', 'Booking')
+    TrainerBookingCount = apps.get_model('trainmydog', 'TrainerBookingCount')
+    CourseBookingCount = apps.get_model('trainmydog', 'CourseBookingCount')
+
+    per_trainer, per_course = {}, {}
+    rows = (
+        Booking.objects
+        .values('course_id', 'course__trainer_id', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        t_key = (row['course__trainer_id'], row['status'])
+        per_trainer[t_key] = per_trainer.get(t_key, 0) + row['n']
+        per_course[(row['course_id'], row['status'])] = row['n']
+
+    TrainerBookingCount.objects.bulk_create(
+        [TrainerBookingCount(trainer_id=t, status=s, count=n) for (t, s), n in per_trainer.items()],
+        batch_size=1000,
+    )
+    CourseBookingCount.objects.bulk_create(
+        [CourseBookingCount(course_id=c, status=s, count=n) for (c, s), n in per_course.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0002_course_trainer_created_index'),
+        ('trainmydog', '0005_roundseatcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseBookingCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'รอดำเนินการ'), ('approved', 'อนุมัติ'), ('rejected', 'ปฏิเสธ'), ('canceled', 'ยกเลิกโดยผู้ใช้')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_counts', to='course.course')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('course', 'status'), name='uniq_course_booking_count')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TrainerBookingCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'รอดำเนินการ'), ('approved', 'อนุมัติ'), ('rejected', 'ปฏิเสธ'), ('canceled', 'ยกเลิกโดยผู้ใช้')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('trainer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('trainer', 'status'), name='uniq_trainer_booking_count')],
+            },
+        ),
+        migrations.RunPython(backfill_booking_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_booking_trainer(apps, schema_editor):
+    Booking = apps.get_model('trainmydog', 'Booking')
+    Course = apps.get_model('course', 'Course')
+    Booking.objects.filter(trainer__isnull=True).update(
+        trainer_id=Subquery(Course.objects.filter(pk=OuterRef('course_id')).values('trainer_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0004_course_cover_image_variants'),
+        ('trainmydog', '0007_job_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='trainer',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='trainer_bookings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_booking_trainer, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='booking',
+            name='trainer',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='trainer_bookings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['trainer', 'created_at'], name='trainmydog__trainer_d6386e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['trainer', 'status', 'created_at'], name='trainmydog__trainer_bfff0f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['course', 'status', 'created_at'], name='trainmydog__course__348a42_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['round', 'created_at'], name='trainmydog__round_i_15bc18_idx'),
+        ),
+    ]
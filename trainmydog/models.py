@@ -1,9 +1,14 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction, IntegrityError
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_save, post_init, post_delete
 from django.dispatch import receiver
 
 from base.models import Profile  # ใช้ Profile.Role สำหรับ role TRAINER
+from base.storage import register_file_cleanup
+from .cache import bump_page_cache_version
 
 
 def certificate_upload_path(instance, filename):
@@ -64,6 +69,9 @@ class TrainerCertificate(models.Model):
         return f"Certificate(app={self.application.id})"
 
 
+register_file_cleanup(TrainerCertificate, "file")
+
+
 @receiver(post_save, sender=TrainerApplication)
 def promote_user_on_approval(sender, instance: TrainerApplication, **kwargs):
     """อนุมัติคำร้อง -> อัพเดท role เป็น TRAINER อัตโนมัติ"""
@@ -74,6 +82,19 @@ def promote_user_on_approval(sender, instance: TrainerApplication, **kwargs):
             profile.save(update_fields=["role"])
 
 
+@receiver(post_init, sender=Profile)
+def remember_profile_role(sender, instance: Profile, **kwargs):
+    instance._loaded_role = instance.role
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_pages_on_role_change(sender, instance: Profile, created, **kwargs):
+    """role เปลี่ยน (เช่น ได้เป็น/ถูกถอดจากครูฝึก) -> คอร์สที่แสดงในหน้า public เปลี่ยน"""
+    if not created and instance.role != getattr(instance, "_loaded_role", instance.role):
+        bump_page_cache_version()
+    instance._loaded_role = instance.role
+
+
 
 # ===== ระบบจองคอร์ส =====
 class Booking(models.Model):
@@ -106,6 +127,14 @@ class Booking(models.Model):
         blank=True,
         related_name="bookings"
     )
+    # สำเนา course.trainer (denormalized) ให้กล่องคำขอของครูฝึกกรอง + เรียงบน index ของ Booking เอง
+    # ไม่ต้อง JOIN course แล้ว filesort ทุกการจองของครูฝึก — ตั้งให้อัตโนมัติใน save()
+    trainer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="trainer_bookings",
+        editable=False,
+    )
 
     owner_full_name = models.CharField(max_length=120, default="")
     owner_nickname = models.CharField(max_length=80, blank=True, default="")
@@ -134,6 +163,175 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        # รองรับ cursor pagination (created_at, id) — InnoDB ต่อ PK ท้าย index ให้เอง
+        indexes = [
+            models.Index(fields=["user", "created_at"]),
+            models.Index(fields=["course", "created_at"]),
+            # กล่องคำขอของครูฝึก: ทุกชุดตัวกรอง = equality นำหน้า + ช่วง created_at ท้าย index
+            # (ดู BookingFilterForm และ manage.py check_booking_indexes)
+            models.Index(fields=["trainer", "created_at"]),
+            models.Index(fields=["trainer", "status", "created_at"]),
+            models.Index(fields=["course", "status", "created_at"]),
+            models.Index(fields=["round", "created_at"]),
+        ]
 
     def __str__(self):
         return f"Booking({self.user_id} -> {self.course_id} / {self.status})"
+
+    def save(self, *args, **kwargs):
+        if self.trainer_id is None and self.course_id is not None:
+            self.trainer_id = self.course.trainer_id
+        super().save(*args, **kwargs)
+
+    @property
+    def holds_seat(self):
+        """สถานะที่นับเป็นที่นั่งในรอบ (รอดำเนินการ + อนุมัติ)"""
+        return self.status in (self.Status.PENDING, self.Status.APPROVED)
+
+
+class RoundSeatCounter(models.Model):
+    """
+    ตัวนับจำนวนสุนัขที่จองไว้ต่อรอบ (1 แถวต่อ CourseRound)
+    จองด้วย UPDATE แบบมีเงื่อนไขบนแถวนี้แถวเดียว แทนการ SUM() Booking ทุกครั้ง
+    ดู trainmydog/capacity.py
+    """
+    round = models.OneToOneField(
+        "course.CourseRound",
+        on_delete=models.CASCADE,
+        related_name="seat_counter",
+        primary_key=True,
+    )
+    reserved_dogs = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"RoundSeatCounter(round={self.round_id}, reserved={self.reserved_dogs})"
+
+
+# ===== ตัวนับจำนวนการจองต่อสถานะ (denormalized) =====
+# อัปเดตด้วย F() ทุกครั้งที่ Booking ถูกสร้าง / เปลี่ยนสถานะ / ถูกลบ (ดู signal ด้านล่าง)
+# อ่านได้ O(1) สำหรับ badge ใน navbar และการ์ดคอร์ส
+# ถ้าตัวเลขเพี้ยน (เช่น แก้ข้อมูลด้วย queryset.update) ให้รัน manage.py rebuild_booking_counters
+class TrainerBookingCount(models.Model):
+    trainer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="booking_counts"
+    )
+    status = models.CharField(max_length=20, choices=Booking.Status.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["trainer", "status"], name="uniq_trainer_booking_count"),
+        ]
+
+    def __str__(self):
+        return f"TrainerBookingCount({self.trainer_id}, {self.status}={self.count})"
+
+
+class CourseBookingCount(models.Model):
+    course = models.ForeignKey(
+        "course.Course",
+        on_delete=models.CASCADE,
+        related_name="booking_counts"
+    )
+    status = models.CharField(max_length=20, choices=Booking.Status.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["course", "status"], name="uniq_course_booking_count"),
+        ]
+
+    def __str__(self):
+        return f"CourseBookingCount({self.course_id}, {self.status}={self.count})"
+
+
+def _add_count(model, delta, **key):
+    """count += delta ของแถว key (สร้างแถวใหม่ถ้ายังไม่มี เฉพาะตอนเพิ่ม)"""
+    if model.objects.filter(**key).update(count=F("count") + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **key)
+    except IntegrityError:
+        # มีคนสร้างแถวเดียวกันไปก่อนแล้ว
+        model.objects.filter(**key).update(count=F("count") + delta)
+
+
+def _add_booking_count(booking, status, delta):
+    _add_count(TrainerBookingCount, delta, trainer_id=booking.trainer_id, status=status)
+    _add_count(CourseBookingCount, delta, course_id=booking.course_id, status=status)
+
+
+@receiver(post_save, sender="course.Course")
+def sync_booking_trainer(sender, instance, created, update_fields=None, **kwargs):
+    """
+    คอร์สเปลี่ยนครูฝึก -> ย้าย Booking.trainer ตาม พร้อมย้าย TrainerBookingCount ต่อสถานะ
+    (queryset.update ไม่ยิง signal ของ Booking จึงต้องย้ายตัวนับเองใน transaction เดียวกัน)
+    """
+    if created or (update_fields is not None and "trainer" not in update_fields):
+        return
+    with transaction.atomic():
+        moving = Booking.objects.filter(course=instance).exclude(trainer_id=instance.trainer_id)
+        # ล็อกแถวที่ย้าย กันสถานะเปลี่ยนระหว่างนับกับ UPDATE
+        moved = Counter(moving.select_for_update().values_list("trainer_id", "status"))
+        if not moved:
+            return
+        moving.update(trainer_id=instance.trainer_id)
+        for (old_trainer_id, status), n in moved.items():
+            _add_count(TrainerBookingCount, -n, trainer_id=old_trainer_id, status=status)
+            _add_count(TrainerBookingCount, n, trainer_id=instance.trainer_id, status=status)
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_status(sender, instance: Booking, **kwargs):
+    instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=Booking)
+def count_booking_on_save(sender, instance: Booking, created, **kwargs):
+    with transaction.atomic():
+        if created:
+            _add_booking_count(instance, instance.status, 1)
+        elif instance.status != instance._loaded_status:
+            _add_booking_count(instance, instance._loaded_status, -1)
+            _add_booking_count(instance, instance.status, 1)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Booking)
+def count_booking_on_delete(sender, instance: Booking, **kwargs):
+    _add_booking_count(instance, instance._loaded_status, -1)
+
+
+# ===== คิวงานเบื้องหลัง (ดู trainmydog/jobs.py) =====
+class Job(models.Model):
+    """งานที่รอทำนอก request: ใส่คิวด้วย jobs.enqueue() แล้วให้ manage.py run_workers ดึงไปทำ"""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "รอทำ"
+        RUNNING = "running", "กำลังทำ"
+        DONE = "done", "เสร็จแล้ว"
+        DEAD = "dead", "ล้มเหลว (เกินจำนวนครั้ง)"
+
+    task = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # worker ดึงงานด้วย WHERE status='queued' AND run_at <= now ORDER BY run_at
+            models.Index(fields=["status", "run_at"], name="job_status_run_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"Job#{self.pk} {self.task} ({self.status}, attempts={self.attempts})"
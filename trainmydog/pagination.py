@@ -0,0 +1,117 @@
+# trainmydog/pagination.py
+"""
+แบ่งหน้าแบบ keyset (cursor) ตาม (created_at, id)
+
+แทนการใช้ OFFSET ที่ต้องสแกนแถวทิ้งทั้งหมดก่อนถึงหน้าที่ต้องการ
+cursor จะเก็บ (created_at, id) ของแถวสุดท้ายในหน้าก่อน แล้วใช้ WHERE
+ต่อจากตำแหน่งนั้นบน index เดิม ทำให้ต้นทุนต่อหน้าคงที่ไม่ว่าจะมีกี่แถว
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+DEFAULT_PER_PAGE = 12
+MAX_PER_PAGE = 50
+
+
+def encode_cursor(obj):
+    """(created_at, id) ของแถว -> token สำหรับใส่ใน ?cursor="""
+    return encode_position(obj.created_at, obj.pk)
+
+
+def encode_position(created_at, pk):
+    """เหมือน encode_cursor แต่รับค่าตรงๆ (แถวจาก .values())"""
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """token -> (created_at, id) หรือ None ถ้า token เสีย/ถูกแก้ไข"""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        ts, pk = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class CursorPage:
+    """ผลลัพธ์หนึ่งหน้า: รายการ + cursor ของหน้าถัดไป (ถ้ามี)"""
+
+    def __init__(self, object_list, next_cursor=None, cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return not self.cursor
+
+
+def keyset_queryset(queryset, position=None, descending=True):
+    """เรียง queryset ตาม (created_at, id) และตัดเฉพาะแถวที่อยู่ถัดจาก position"""
+    if descending:
+        qs = queryset.order_by("-created_at", "-id")
+    else:
+        qs = queryset.order_by("created_at", "id")
+    if position:
+        created_at, pk = position
+        if descending:
+            qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        else:
+            qs = qs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+    return qs
+
+
+def _cut_page(rows, per_page, cursor, position):
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1])
+    return CursorPage(rows, next_cursor=next_cursor, cursor=cursor if position else None)
+
+
+def cursor_paginate(queryset, cursor=None, per_page=DEFAULT_PER_PAGE, descending=True):
+    """
+    ตัด queryset เป็นหน้า เรียงใหม่สุดก่อน (-created_at, -id) หรือเก่าสุดก่อนถ้า descending=False
+    ดึงเกินมา 1 แถวเพื่อรู้ว่ามีหน้าถัดไปหรือไม่ โดยไม่ต้อง COUNT(*)
+    """
+    per_page = max(1, min(int(per_page), MAX_PER_PAGE))
+    position = decode_cursor(cursor)
+    qs = keyset_queryset(queryset, position, descending)
+    return _cut_page(list(qs[:per_page + 1]), per_page, cursor, position)
+
+
+async def acursor_paginate(queryset, cursor=None, per_page=DEFAULT_PER_PAGE, descending=True):
+    """cursor_paginate สำหรับ async view (async ORM)"""
+    per_page = max(1, min(int(per_page), MAX_PER_PAGE))
+    position = decode_cursor(cursor)
+    qs = keyset_queryset(queryset, position, descending)
+    return _cut_page([row async for row in qs[:per_page + 1]], per_page, cursor, position)
+
+
+def paginate_request(request, queryset, per_page=DEFAULT_PER_PAGE, descending=True):
+    """อ่าน ?cursor= จาก request แล้วแบ่งหน้า"""
+    return cursor_paginate(queryset, request.GET.get("cursor"), per_page, descending)
+
+
+async def apaginate_request(request, queryset, per_page=DEFAULT_PER_PAGE, descending=True):
+    return await acursor_paginate(queryset, request.GET.get("cursor"), per_page, descending)
@@ -0,0 +1,313 @@
+# trainmydog/query_budgets.py
+"""
+วัดจำนวน SQL query ต่อ route เทียบกับงบใน query_budgets.json (กัน N+1 ย้อนกลับมา)
+รันเป็นส่วนหนึ่งของ manage.py test (QueryBudgetTests ใน trainmydog/tests.py)
+
+    python manage.py test trainmydog.tests.QueryBudgetTests
+    python manage.py update_query_budgets   # เขียนงบใหม่ (ตรวจ diff ก่อน commit)
+
+ทุก route ที่มีชื่อใน trainmydog.urls / course.urls / base.urls (+ หน้า list ของ admin)
+ถูกเรียกด้วยข้อมูลตัวอย่าง 2 ขนาด (SIZES: 1000 ทำให้ N+1 เห็นชัด) แต่ละขนาดอยู่ใน savepoint ที่ rollback ทิ้งตอนจบ
+ไม่ผ่านเมื่อ
+  - จำนวน query โตตามขนาดข้อมูล (N+1)
+  - เกินงบที่ commit ไว้ใน query_budgets.json
+  - มี route ใหม่ที่ยังไม่ได้ใส่ไว้ใน ROUTES ด้านล่าง
+query ที่ซ้ำกัน (SQL เดียวกันต่างแค่ค่า) แสดงพร้อมตำแหน่งในโค้ด/template ที่เรียก
+"""
+import datetime
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import Client
+from django.urls import get_resolver, reverse
+
+from base.models import Profile
+from course.models import Course, CourseRound, days_to_mask
+from course.search import rebuild_index
+from course.sessions import extend_sessions
+from .counters import rebuild_booking_counters
+from .ical import feed_token
+from .models import Booking, Job, RoundSeatCounter, TrainerApplication, TrainerCertificate
+
+BUDGET_FILE = settings.BASE_DIR / "query_budgets.json"
+# วัดกับแคชในหน่วยความจำ: นับเฉพาะ query ของแอป (ไม่รวม SQL ของ DatabaseCache)
+MEASURE_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "query-budgets"}}
+CHECKED_NAMESPACES = ("trainmydog", "courses", "Authen", "api_v1")
+SIZES = (10, 1000)
+
+
+class Route:
+    """วิธีเรียก route หนึ่ง: ใช้ client ไหน, method, kwargs ของ URL (จากข้อมูลตัวอย่าง)"""
+
+    def __init__(self, client, method="get", kwargs=None, data=None):
+        self.client = client
+        self.method = method
+        self.kwargs = kwargs or (lambda d: {})
+        self.data = data or {}
+
+
+# route ที่ไม่วัด (พร้อมเหตุผล)
+SKIP = {
+    "Authen:logout": "ออกจากระบบ ทำให้ session ของ client ใช้ต่อไม่ได้",
+}
+
+ROUTES = {
+    "trainmydog:home": Route("anon"),
+    "trainmydog:course_feed": Route("anon"),
+    "trainmydog:course_search": Route("anon", data={"q": "ฝึกสุนัข"}),
+    "trainmydog:user_fragment": Route("trainer"),
+    "trainmydog:course_detail": Route("anon", kwargs=lambda d: {"pk": d.course.pk}),
+    "trainmydog:apply_trainer": Route("member"),
+    "trainmydog:booking_create": Route("member", kwargs=lambda d: {"course_pk": d.course.pk}),
+    "trainmydog:booking_history": Route("member"),
+    "trainmydog:booking_detail": Route("member", kwargs=lambda d: {"pk": d.booking.pk}),
+    "trainmydog:trainer_booking_list": Route("trainer"),
+    "trainmydog:trainer_booking_export": Route("trainer", data={"format": "xlsx"}),
+    "trainmydog:trainer_booking_update_status": Route(
+        "trainer", "post", kwargs=lambda d: {"pk": d.booking.pk}, data={"status": "approved"}
+    ),
+    "trainmydog:trainer_booking_delete": Route("trainer", "post", kwargs=lambda d: {"pk": d.spare_booking.pk}),
+    "trainmydog:trainer_calendar": Route("anon", kwargs=lambda d: {"token": feed_token(d.trainer.profile, "trainer")}),
+    "trainmydog:member_calendar": Route("anon", kwargs=lambda d: {"token": feed_token(d.member.profile, "member")}),
+    "trainmydog:calendar_reset": Route("member", "post"),
+    "courses:course_trainer": Route("trainer"),
+    "courses:create_course": Route("trainer"),
+    "courses:update_course": Route("trainer", kwargs=lambda d: {"pk": d.course.pk}),
+    "courses:delete_course": Route("trainer", "post", kwargs=lambda d: {"pk": d.spare_course.pk}),
+    "courses:course_detail": Route("anon", kwargs=lambda d: {"pk": d.course.pk}),
+    "api_v1:course_list": Route("anon"),
+    "api_v1:course_detail": Route("anon", kwargs=lambda d: {"pk": d.course.pk}),
+    "api_v1:course_rounds": Route("anon", kwargs=lambda d: {"pk": d.course.pk}),
+    "Authen:login": Route("anon"),
+    "Authen:register": Route("anon"),
+    "Authen:profile": Route("member"),
+    "Authen:profile_edit": Route("member"),
+    "Authen:db_pool_metrics": Route("admin"),
+    # หน้า list ของ admin (list_display ที่แตะ FK มักเป็น N+1)
+    "admin:auth_user_changelist": Route("admin"),
+    "admin:trainmydog_trainerapplication_changelist": Route("admin"),
+    "admin:trainmydog_trainercertificate_changelist": Route("admin"),
+    "admin:trainmydog_job_changelist": Route("admin"),
+}
+
+_IGNORED_SQL = re.compile(r"^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b", re.I)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize_sql(sql):
+    """ตัดค่าคงที่ออก: query เดียวกันที่ต่างแค่ค่า (N+1) จะได้ key เดียวกัน"""
+    return re.sub(r"\(\?(?:, \?)*\)", "(?)", _LITERALS.sub("?", sql))
+
+
+def _query_origin():
+    """ตำแหน่งที่สั่ง query: tag ใน template (ถ้ามี) <- บรรทัดในโค้ดโปรเจกต์"""
+    root = str(settings.BASE_DIR)
+    template_at = code_at = None
+    frame = sys._getframe(2)
+    while frame is not None and not (template_at and code_at):
+        filename = frame.f_code.co_filename
+        if template_at is None and frame.f_code.co_name == "render_annotated" and "django" in filename:
+            node = frame.f_locals.get("self")
+            origin, token = getattr(node, "origin", None), getattr(node, "token", None)
+            if origin is not None and token is not None:
+                template_at = f"{origin.template_name}:{token.lineno}"
+        elif (
+            code_at is None
+            and filename.startswith(root)
+            and "site-packages" not in filename
+            and filename != __file__
+            and frame.f_code.co_name != "__call__"  # middleware ที่แค่ส่งต่อ request
+        ):
+            code_at = f"{os.path.relpath(filename, root)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return " <- ".join(filter(None, (template_at, code_at))) or "?"
+
+
+class QueryRecorder:
+    """execute_wrapper: เก็บ SQL, เวลา และตำแหน่งที่เรียกของทุก query"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not _IGNORED_SQL.match(sql):
+                self.queries.append((sql, time.perf_counter() - start, _query_origin()))
+
+    def duplicates(self):
+        groups = defaultdict(list)
+        for sql, _, origin in self.queries:
+            groups[normalize_sql(sql)].append(origin)
+        return sorted(
+            ((sql, origins) for sql, origins in groups.items() if len(origins) > 1),
+            key=lambda item: -len(item[1]),
+        )
+
+
+class _Rollback(Exception):
+    pass
+
+
+# ===== ข้อมูลตัวอย่าง =====
+def seed(n):
+    """ข้อมูลตัวอย่างขนาด n (คอร์ส / การจอง / คำขอครูฝึก / งานในคิว ราว n แถวต่อชนิด)"""
+    tag = f"qb{n}"
+    admin = User.objects.create_superuser(f"{tag}-admin", f"{tag}-admin@example.com", "x")
+    trainer = User.objects.create_user(f"{tag}-trainer", f"{tag}-trainer@example.com", "x")
+    member = User.objects.create_user(f"{tag}-member", f"{tag}-member@example.com", "x")
+    Profile.objects.filter(user=trainer).update(role=Profile.Role.TRAINER)
+
+    Course.objects.bulk_create([
+        Course(
+            trainer=trainer, title=f"คอร์สฝึกสุนัขพื้นฐาน {i}", description="ฝึกนั่ง รอ เดินข้าง",
+            location="กรุงเทพ", is_published=True, max_dogs=n * 10,
+        )
+        for i in range(n + 1)
+    ])
+    courses = list(Course.objects.filter(trainer=trainer).order_by("pk"))
+    CourseRound.objects.bulk_create([
+        CourseRound(course=c, days=days, weekday_mask=days_to_mask(days),
+                    start_time=datetime.time(9), end_time=datetime.time(11))
+        for c in courses
+        for days in ([5, 6], [0, 2])
+    ])
+    rounds = {r.course_id: r for r in CourseRound.objects.filter(course__in=courses)}
+
+    statuses = [Booking.Status.PENDING, Booking.Status.APPROVED, Booking.Status.REJECTED]
+    Booking.objects.bulk_create([
+        Booking(
+            user=member, course=courses[i % n], trainer=trainer, round=rounds[courses[i % n].pk],
+            owner_full_name=f"เจ้าของ {i}", owner_phone="0800000000", dog_name=f"ด็อก {i}",
+            status=statuses[i % len(statuses)],
+        )
+        for i in range(n + 1)
+    ])
+    bookings = list(Booking.objects.filter(user=member).order_by("pk"))
+
+    User.objects.bulk_create([User(username=f"{tag}-applicant-{i}") for i in range(n)])
+    applicants = User.objects.filter(username__startswith=f"{tag}-applicant-")
+    TrainerApplication.objects.bulk_create([
+        TrainerApplication(user=u, full_name=u.username, reviewed_by=admin) for u in applicants
+    ])
+    TrainerCertificate.objects.bulk_create([
+        TrainerCertificate(application=app, file=f"certificates/{app.pk}.pdf")
+        for app in TrainerApplication.objects.filter(user__in=applicants)
+    ])
+    Job.objects.bulk_create([
+        Job(task="trainmydog.tasks.notify_new_trainer_application", run_at=datetime.datetime.now(datetime.timezone.utc))
+        for _ in range(n)
+    ])
+
+    # bulk_create ไม่ผ่าน capacity.py: ตั้งตัวนับที่นั่งให้ตรงกับ Booking (ไม่งั้นลบ/ปฏิเสธจะเจอตัวนับเพี้ยน)
+    held = (
+        Booking.objects
+        .filter(round__in=rounds.values(), status__in=[Booking.Status.PENDING, Booking.Status.APPROVED])
+        .values("round_id").annotate(total=Sum("dog_count")).order_by()
+    )
+    RoundSeatCounter.objects.bulk_create(
+        [RoundSeatCounter(round_id=row["round_id"], reserved_dogs=row["total"]) for row in held]
+    )
+    rebuild_booking_counters()
+    rebuild_index()
+    extend_sessions()
+    return SimpleNamespace(
+        admin=admin, trainer=trainer, member=member,
+        course=courses[0], spare_course=courses[-1],
+        booking=bookings[0], spare_booking=bookings[-1],
+    )
+
+
+# ===== วัด =====
+def measure(n):
+    """{ชื่อ route: ผลวัด} ของทุก route ใน ROUTES กับข้อมูลขนาด n (rollback ข้อมูลทิ้งตอนจบ)"""
+    results = {}
+    try:
+        with transaction.atomic():
+            data = seed(n)
+            clients = {"anon": Client()}
+            for role in ("admin", "trainer", "member"):
+                clients[role] = Client()
+                clients[role].force_login(getattr(data, role))
+
+            for name, route in ROUTES.items():
+                url = reverse(name, kwargs=route.kwargs(data))
+                client = clients[route.client]
+                cache.clear()  # วัดแบบไม่มี cache (กรณีแย่สุด)
+                recorder = QueryRecorder()
+                with transaction.atomic(), connection.execute_wrapper(recorder):
+                    response = getattr(client, route.method)(url, route.data)
+                    if response.streaming:
+                        b"".join(response.streaming_content)  # query ของ streaming เกิดตอนอ่าน
+                results[name] = SimpleNamespace(
+                    status=response.status_code,
+                    count=len(recorder.queries),
+                    seconds=sum(t for _, t, _ in recorder.queries),
+                    duplicates=recorder.duplicates(),
+                )
+            raise _Rollback
+    except _Rollback:
+        pass
+    cache.clear()
+    return results
+
+
+def unlisted_routes():
+    """route ที่มีชื่อแต่ยังไม่มีทั้งใน ROUTES และ SKIP"""
+    missing = []
+    resolver = get_resolver()
+    for namespace in CHECKED_NAMESPACES:
+        _, sub_resolver = resolver.namespace_dict[namespace]
+        for pattern in sub_resolver.url_patterns:
+            name = getattr(pattern, "name", None)
+            full = f"{namespace}:{name}"
+            if name and full not in ROUTES and full not in SKIP:
+                missing.append(full)
+    return missing
+
+
+def load_budgets():
+    return json.loads(BUDGET_FILE.read_text()) if BUDGET_FILE.exists() else {}
+
+
+def problems(small, large, budgets=None):
+    """{ชื่อ route: [ปัญหา, ...]} จากผลวัดสองขนาด (budgets=None = ไม่เทียบงบ)"""
+    found = defaultdict(list)
+    for name in ROUTES:
+        a, b = small[name], large[name]
+        if max(a.status, b.status) >= 400:
+            found[name].append(f"HTTP {a.status}/{b.status}")
+        if b.count > a.count:
+            found[name].append(f"query โตตามข้อมูล ({a.count} -> {b.count})")
+        if budgets is not None and name not in budgets:
+            found[name].append("ไม่มีงบใน query_budgets.json")
+        elif budgets is not None and max(a.count, b.count) > budgets[name]:
+            found[name].append(f"เกินงบ ({max(a.count, b.count)} > {budgets[name]})")
+    return dict(found)
+
+
+def write_budgets(*runs):
+    """เขียน query_budgets.json จากค่ามากสุดที่วัดได้ของแต่ละ route"""
+    budgets = {name: max(run[name].count for run in runs) for name in ROUTES}
+    BUDGET_FILE.write_text(json.dumps(budgets, indent=2, ensure_ascii=False) + "\n")
+
+
+def describe(result):
+    """query ที่ซ้ำ (SQL เดียวกันต่างแค่ค่า) พร้อมตำแหน่งที่เรียก สำหรับข้อความตอนไม่ผ่าน"""
+    lines = []
+    for sql, origins in result.duplicates[:5]:
+        lines.append(f"    x{len(origins)} {sql[:140]}")
+        lines.extend(f"        at {origin}" for origin in sorted(set(origins))[:3])
+    return "\n".join(lines)
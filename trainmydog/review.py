@@ -0,0 +1,63 @@
+# trainmydog/review.py
+"""
+อนุมัติ / ปฏิเสธคำขอเป็นครูฝึกทีละหลายรายการแบบ set-based
+
+จำนวน query คงที่ไม่ว่าจะเลือกกี่รายการ (UPDATE คำขอครั้งเดียว + เลื่อน role ของ Profile ครั้งเดียว)
+queryset.update() ไม่ยิง signal จึงทำงานแทน promote_user_on_approval /
+invalidate_pages_on_role_change ให้ครบในนี้ ผลลัพธ์จึงเหมือนการ save() ทีละแถว
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from base.models import Profile
+from .cache import bump_page_cache_version
+from .models import TrainerApplication
+
+
+def promote_to_trainer(user_ids):
+    """ตั้ง role = TRAINER ให้ผู้ใช้ทั้งหมด (สร้าง Profile ให้คนที่ยังไม่มี) คืนจำนวนที่ role เปลี่ยน"""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0
+    existing = set(Profile.objects.filter(user_id__in=user_ids).values_list("user_id", flat=True))
+    missing = user_ids - existing
+    if missing:
+        Profile.objects.bulk_create(
+            [Profile(user_id=uid, role=Profile.Role.TRAINER) for uid in missing],
+            ignore_conflicts=True,
+        )
+    promoted = (
+        Profile.objects
+        .filter(user_id__in=existing)
+        .exclude(role=Profile.Role.TRAINER)
+        .update(role=Profile.Role.TRAINER)
+    )
+    if promoted or missing:
+        bump_page_cache_version()
+    return promoted + len(missing)
+
+
+def _set_status(queryset, status, reviewer):
+    """เปลี่ยนสถานะคำขอที่ยังไม่ใช่ status -> คืน list ของ user_id ที่ถูกเปลี่ยน"""
+    rows = list(queryset.exclude(status=status).values_list("pk", "user_id"))
+    if rows:
+        TrainerApplication.objects.filter(pk__in=[pk for pk, _ in rows]).update(
+            status=status,
+            reviewed_by=reviewer,
+            reviewed_at=timezone.now(),
+        )
+    return [user_id for _, user_id in rows]
+
+
+@transaction.atomic
+def approve_applications(queryset, reviewer):
+    """อนุมัติคำขอใน queryset และอัปเกรดผู้สมัครเป็นครูฝึก คืนจำนวนคำขอที่อนุมัติ"""
+    user_ids = _set_status(queryset, TrainerApplication.Status.APPROVED, reviewer)
+    promote_to_trainer(user_ids)
+    return len(user_ids)
+
+
+@transaction.atomic
+def reject_applications(queryset, reviewer):
+    """ปฏิเสธคำขอใน queryset (ไม่แตะ role เหมือนการ save() ทีละแถว) คืนจำนวนคำขอที่ปฏิเสธ"""
+    return len(_set_status(queryset, TrainerApplication.Status.REJECTED, reviewer))
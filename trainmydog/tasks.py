@@ -0,0 +1,35 @@
+# trainmydog/tasks.py
+"""งานเบื้องหลังของแอป trainmydog (ใส่คิวด้วย trainmydog.jobs.enqueue)"""
+from django.contrib.auth.models import User
+from django.core.mail import send_mail
+
+from .jobs import task
+from .models import TrainerApplication
+
+
+@task
+def notify_new_trainer_application(application_id):
+    """แจ้งอีเมลผู้ดูแล (staff ที่ตรวจคำขอในหน้า admin) ว่ามีคำขอเป็นครูฝึกใหม่รอตรวจ"""
+    recipients = list(
+        User.objects.filter(is_staff=True, is_active=True).exclude(email="").values_list("email", flat=True)
+    )
+    if not recipients:
+        return
+    app = (
+        TrainerApplication.objects
+        .select_related("user")
+        .prefetch_related("certificates")
+        .filter(pk=application_id)
+        .first()
+    )
+    if app is None:
+        return
+    send_mail(
+        f"คำขอเป็นครูฝึกใหม่: {app.full_name}",
+        f"ผู้สมัคร: {app.full_name} ({app.email_snapshot or app.user.email})\n"
+        f"โทร: {app.phone}\n"
+        f"ไฟล์เกียรติบัตร: {len(app.certificates.all())} ไฟล์\n",
+        None,
+        recipients,
+        fail_silently=False,
+    )
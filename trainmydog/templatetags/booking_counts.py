@@ -0,0 +1,12 @@
+# trainmydog/templatetags/booking_counts.py
+from django import template
+
+from trainmydog.counters import trainer_pending_count
+
+register = template.Library()
+
+
+@register.simple_tag
+def pending_booking_count(user):
+    """จำนวนคำขอจองที่รอดำเนินการของครูฝึก (อ่านจากตัวนับ ไม่ COUNT ตาราง Booking)"""
+    return trainer_pending_count(user)
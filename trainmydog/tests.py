@@ -1,3 +1,497 @@
-from django.test import TestCase
+import base64
+import datetime
+import io
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import OperationalError, close_old_connections, connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from base.models import Profile, StoredBlob
+from course.models import Course, CourseRound
+
+from . import query_budgets, review
+from .capacity import RoundFull, change_booking_status, create_booking, delete_booking, remaining_seats
+from .counters import rebuild_booking_counters, trainer_status_counts
+from .exports import stream_csv
+from .ical import feed_token
+from .jobs import DONE_RETENTION_DAYS, enqueue, prune_done_jobs, task, work
+from .models import Booking, Job, RoundSeatCounter, TrainerApplication, TrainerCertificate
+from .pagination import DEFAULT_PER_PAGE, cursor_paginate, decode_cursor, encode_position
+from .tasks import notify_new_trainer_application
+
+
+def make_trainer(username="trainer@example.com"):
+    user = User.objects.create_user(username, username, "x")
+    Profile.objects.filter(user=user).update(role=Profile.Role.TRAINER)
+    return user
+
+
+def make_course(trainer, max_dogs=None, **kwargs):
+    course = Course.objects.create(trainer=trainer, title="คอร์สฝึกสุนัข", is_published=True, max_dogs=max_dogs, **kwargs)
+    course_round = CourseRound.objects.create(
+        course=course, days=[5], start_time=datetime.time(9), end_time=datetime.time(10),
+    )
+    return course, course_round
+
+
+def make_booking(member, course, course_round, dog_count=1, **kwargs):
+    return Booking(
+        user=member, course=course, round=course_round,
+        owner_full_name="เจ้าของ", owner_phone="0800000000", dog_count=dog_count, **kwargs
+    )
+
+
+def held_dogs(course_round):
+    return Booking.objects.filter(
+        round=course_round, status__in=[Booking.Status.PENDING, Booking.Status.APPROVED]
+    ).aggregate(total=Sum("dog_count"))["total"] or 0
+
+
+# ===== ที่นั่งต่อรอบ (trainmydog/capacity.py) =====
+class SeatCapacityTests(TestCase):
+
+    def setUp(self):
+        self.trainer = make_trainer()
+        self.member = User.objects.create_user("member@example.com")
+        self.course, self.round = make_course(self.trainer, max_dogs=4)
+
+    def counter(self):
+        return RoundSeatCounter.objects.get(round=self.round).reserved_dogs
+
+    def test_rejects_booking_that_would_overflow(self):
+        create_booking(make_booking(self.member, self.course, self.round, dog_count=3))
+        with self.assertRaises(RoundFull) as raised:
+            create_booking(make_booking(self.member, self.course, self.round, dog_count=2))
+        self.assertEqual(raised.exception.remaining, 1)
+        self.assertEqual(self.counter(), 3)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_reject_and_delete_release_seats(self):
+        first = create_booking(make_booking(self.member, self.course, self.round, dog_count=2))
+        second = create_booking(make_booking(self.member, self.course, self.round, dog_count=2))
+        change_booking_status(first, Booking.Status.REJECTED)
+        self.assertEqual(self.counter(), 2)
+        delete_booking(second)
+        self.assertEqual(self.counter(), 0)
+        self.assertEqual(remaining_seats(self.round), 4)
+
+    def test_release_resyncs_drifted_counter(self):
+        kept = create_booking(make_booking(self.member, self.course, self.round, dog_count=1))
+        dropped = create_booking(make_booking(self.member, self.course, self.round, dog_count=2))
+        # ตัวนับเพี้ยน (เช่น แก้ข้อมูลด้วย queryset.update) ต่ำกว่าที่ต้องคืน
+        RoundSeatCounter.objects.filter(round=self.round).update(reserved_dogs=1)
+
+        with self.assertLogs("trainmydog.capacity", "WARNING"):
+            delete_booking(dropped)
+
+        self.assertEqual(self.counter(), kept.dog_count)
+        self.assertEqual(self.counter(), held_dogs(self.round))
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """ยิงคำขอจองพร้อมกันหลายเธรดกับรอบเดียว (ปล่อยพร้อมกันด้วย Barrier) ต้องไม่มีการจองเกิน"""
+
+    THREADS = 200
+    CAPACITY = 25
+    MAX_DOGS_PER_BOOKING = 3
+
+    def test_no_oversell_under_concurrent_submissions(self):
+        trainer = make_trainer()
+        member = User.objects.create_user("member@example.com")
+        course, course_round = make_course(trainer, max_dogs=self.CAPACITY)
+
+        results = {"booked": 0, "full": 0, "error": 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.THREADS)
+
+        def submit():
+            close_old_connections()
+            dogs = random.randint(1, self.MAX_DOGS_PER_BOOKING)
+            outcome = "error"
+            try:
+                barrier.wait()
+                for attempt in range(50):
+                    try:
+                        create_booking(make_booking(member, course, course_round, dog_count=dogs))
+                        outcome = "booked"
+                        break
+                    except RoundFull:
+                        outcome = "full"
+                        break
+                    except OperationalError:
+                        # SQLite ล็อกทั้งตารางตอนเขียน: รอแล้วลองใหม่
+                        time.sleep(0.01 * (attempt + 1))
+            finally:
+                with lock:
+                    results[outcome] += 1
+                connection.close()
+
+        workers = [threading.Thread(target=submit) for _ in range(self.THREADS)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        held = held_dogs(course_round)
+        self.assertEqual(results["error"], 0, results)
+        self.assertGreater(results["full"], 0, results)
+        self.assertLessEqual(held, self.CAPACITY)
+        self.assertEqual(RoundSeatCounter.objects.get(round=course_round).reserved_dogs, held)
+
+
+# ===== ไฟล์ใบรับรอง (register_file_cleanup ใน base/storage.py) =====
+class CertificateFileTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.app = TrainerApplication.objects.create(user=User.objects.create_user("applicant@example.com"))
+
+    def upload(self, content, cert=None):
+        # แบบเดียวกับ ModelForm: ตั้งไฟล์ใหม่ให้ฟิลด์แล้ว save()
+        cert = cert or TrainerCertificate(application=self.app)
+        cert.file = ContentFile(content, name="cert.pdf")
+        with self.captureOnCommitCallbacks(execute=True):
+            cert.save()
+        return cert
+
+    def refs(self, name):
+        return StoredBlob.objects.filter(name=name).values_list("ref_count", flat=True).first()
+
+    def test_replacing_file_releases_old_blob(self):
+        cert = self.upload(b"first")
+        old_name, old_path = cert.file.name, cert.file.path
+        self.upload(b"second", cert)
+
+        self.assertNotEqual(cert.file.name, old_name)
+        self.assertIsNone(self.refs(old_name))
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(self.refs(cert.file.name), 1)
+
+    def test_reuploading_same_content_keeps_one_reference(self):
+        cert = self.upload(b"same")
+        self.upload(b"same", cert)
+        self.assertEqual(self.refs(cert.file.name), 1)
+
+    def test_shared_blob_is_deleted_with_last_row(self):
+        first = self.upload(b"shared")
+        second = self.upload(b"shared")
+        name, path = first.file.name, first.file.path
+        self.assertEqual(self.refs(name), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.refs(name), 1)
+        self.assertTrue(os.path.exists(path))
+
+        # ลบผ่าน cascade (โหลดแถวมาเต็มเพราะมี signal) ก็คืนไฟล์เช่นกัน
+        with self.captureOnCommitCallbacks(execute=True):
+            second.application.delete()
+        self.assertIsNone(self.refs(name))
+        self.assertFalse(os.path.exists(path))
+
+
+# ===== คิวงาน (trainmydog/jobs.py) =====
+@task
+def failing_task():
+    raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+
+    def test_notification_reaches_staff(self):
+        User.objects.create_user("staff@example.com", "staff@example.com", is_staff=True)
+        app = TrainerApplication.objects.create(
+            user=User.objects.create_user("applicant@example.com"), full_name="ผู้สมัคร",
+        )
+        enqueue(notify_new_trainer_application, application_id=app.pk)
+
+        self.assertEqual(work(burst=True), 1)
+        self.assertEqual(Job.objects.get().status, Job.Status.DONE)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["staff@example.com"])
+
+    def test_failed_job_backs_off_then_dies(self):
+        job = enqueue(failing_task, max_attempts=2)
+        with self.assertLogs("trainmydog.jobs", "WARNING"):
+            work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn("boom", job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs("trainmydog.jobs", "WARNING"):
+            work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.DEAD, 2))
+
+    def test_prune_keeps_recent_and_unfinished_jobs(self):
+        old = timezone.now() - datetime.timedelta(days=DONE_RETENTION_DAYS + 1)
+        for status in (Job.Status.DONE, Job.Status.DEAD):
+            enqueue(failing_task)
+            Job.objects.filter(status=Job.Status.QUEUED).update(status=status)
+        Job.objects.update(updated_at=old)
+        recent = enqueue(failing_task)
+        Job.objects.filter(pk=recent.pk).update(status=Job.Status.DONE)
+
+        self.assertEqual(prune_done_jobs(), 1)
+        self.assertEqual(
+            sorted(Job.objects.values_list("status", flat=True)), [Job.Status.DEAD, Job.Status.DONE]
+        )
+
+
+# ===== อนุมัติ/ปฏิเสธคำขอครูฝึกทีละหลายรายการ (trainmydog/review.py) =====
+class BulkReviewTests(TestCase):
+
+    def review(self, size):
+        """สร้างคำขอ size รายการ อนุมัติครึ่งแรก ปฏิเสธครึ่งหลัง -> (query ตอน approve, query ตอน reject)"""
+        tag = f"review-{size}"
+        reviewer = User.objects.create_user(f"{tag}-admin", is_staff=True)
+        User.objects.bulk_create([User(username=f"{tag}-{i}") for i in range(size)])
+        users = list(User.objects.filter(username__startswith=f"{tag}-").exclude(pk=reviewer.pk).order_by("pk"))
+        # ครึ่งหนึ่งมี Profile อยู่แล้ว อีกครึ่งยังไม่มี (bulk_create ไม่ยิง signal)
+        Profile.objects.bulk_create([Profile(user=u) for u in users[::2]])
+        TrainerApplication.objects.bulk_create([
+            TrainerApplication(user=u, full_name=u.username, phone="0800000000") for u in users
+        ])
+        apps = list(TrainerApplication.objects.filter(user__in=users).order_by("pk"))
+        half, rest = apps[: size // 2], apps[size // 2:]
+
+        with CaptureQueriesContext(connection) as approve_ctx:
+            approved = review.approve_applications(
+                TrainerApplication.objects.filter(pk__in=[a.pk for a in half]), reviewer
+            )
+        with CaptureQueriesContext(connection) as reject_ctx:
+            rejected = review.reject_applications(
+                TrainerApplication.objects.filter(pk__in=[a.pk for a in rest]), reviewer
+            )
+
+        self.assertEqual((approved, rejected), (len(half), len(rest)))
+        self.assertEqual(
+            Profile.objects.filter(user__in=[a.user_id for a in half], role=Profile.Role.TRAINER).count(),
+            len(half),
+        )
+        return len(approve_ctx.captured_queries), len(reject_ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_selection(self):
+        self.assertEqual(self.review(4), self.review(40))
+
+
+# ===== งบ query ต่อ route (trainmydog/query_budgets.py) =====
+@override_settings(CACHES=query_budgets.MEASURE_CACHES)
+class QueryBudgetTests(TestCase):
+    """เขียนงบใหม่ด้วย manage.py update_query_budgets (ไม่ใช่จาก test)"""
+
+    def test_every_named_route_is_measured(self):
+        self.assertEqual(query_budgets.unlisted_routes(), [])
+
+    def test_routes_stay_within_budget(self):
+        small, large = (query_budgets.measure(n) for n in query_budgets.SIZES)
+        found = query_budgets.problems(small, large, query_budgets.load_budgets())
+        for name, issues in found.items():
+            with self.subTest(route=name):
+                self.fail(f"{', '.join(issues)}\n{query_budgets.describe(large[name])}")
+
+
+# ===== ส่งออกรายการจอง (trainmydog/exports.py) =====
+class ExportTests(TestCase):
+
+    def test_csv_escapes_formula_cells(self):
+        rows = [(1, "=HYPERLINK(\"http://x\")", "+66 81", "-1", "@SUM(A1)", "\tแท็บ", "ปกติ", -5)]
+        lines = "".join(stream_csv(["a"] * 8, rows)).splitlines()
+        self.assertEqual(
+            lines[1], '1,"\'=HYPERLINK(""http://x"")",\'+66 81,\'-1,\'@SUM(A1),\'\tแท็บ,ปกติ,-5',
+        )
+
+
+# ===== ตัวนับการจองต่อสถานะ (trainmydog/counters.py) =====
+class BookingCounterTests(TestCase):
+
+    def setUp(self):
+        self.trainer = make_trainer()
+        self.member = User.objects.create_user("member@example.com")
+        self.course, self.round = make_course(self.trainer)
+        first = create_booking(make_booking(self.member, self.course, self.round))
+        create_booking(make_booking(self.member, self.course, self.round))
+        change_booking_status(first, Booking.Status.APPROVED)
+
+    def counts(self, trainer):
+        return {status: n for status, n in trainer_status_counts(trainer).items() if n}
+
+    def test_changing_course_trainer_moves_counts(self):
+        new_trainer = make_trainer("new-trainer@example.com")
+        self.course.trainer = new_trainer
+        self.course.save()
+
+        self.assertEqual(self.counts(self.trainer), {})
+        self.assertEqual(self.counts(new_trainer), {Booking.Status.PENDING: 1, Booking.Status.APPROVED: 1})
+        self.assertEqual(set(Booking.objects.values_list("trainer_id", flat=True)), {new_trainer.pk})
+
+    def test_rebuild_matches_incremental_counts(self):
+        self.course.trainer = make_trainer("new-trainer@example.com")
+        self.course.save()
+        before = {t: self.counts(t) for t in (self.trainer, self.course.trainer)}
+        rebuild_booking_counters()
+        self.assertEqual({t: self.counts(t) for t in before}, before)
+
+
+class BookingIndexTests(TestCase):
+
+    @skipUnless(connection.vendor == "mysql", "แผน EXPLAIN ที่ตรวจเป็นของ MySQL")
+    def test_trainer_inbox_queries_use_indexes(self):
+        trainer = make_trainer()
+        course, course_round = make_course(trainer)
+        create_booking(make_booking(User.objects.create_user("member@example.com"), course, course_round))
+        call_command("check_booking_indexes", trainer=trainer.pk, stdout=io.StringIO())
+
+
+# ===== ปฏิทิน .ics (trainmydog/ical.py) =====
+class CalendarFeedTests(TestCase):
+
+    def setUp(self):
+        self.trainer = make_trainer()
+        make_course(self.trainer)
+
+    def feed_url(self):
+        self.trainer.profile.refresh_from_db()
+        return reverse("trainmydog:trainer_calendar", args=[feed_token(self.trainer.profile, "trainer")])
+
+    def test_reset_revokes_old_link(self):
+        old_url = self.feed_url()
+        response = self.client.get(old_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"BEGIN:VCALENDAR", response.content)
+
+        self.client.force_login(self.trainer)
+        response = self.client.post(reverse("trainmydog:calendar_reset"), {"next": "https://evil.example/"})
+        self.assertRedirects(response, reverse("trainmydog:booking_history"), fetch_redirect_response=False)
+
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        self.assertEqual(self.client.get(self.feed_url()).status_code, 200)
+
+    def test_token_is_bound_to_feed_kind(self):
+        member_token = feed_token(self.trainer.profile, "member")
+        url = reverse("trainmydog:trainer_calendar", args=[member_token])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+# ===== แบ่งหน้าแบบ cursor (trainmydog/pagination.py) + feed ของหน้าแรก =====
+class CursorPaginationTests(TestCase):
+
+    def setUp(self):
+        trainer = make_trainer()
+        Course.objects.bulk_create([
+            Course(trainer=trainer, title=f"คอร์ส {i}", is_published=True) for i in range(DEFAULT_PER_PAGE + 1)
+        ])
+        self.ids = list(Course.objects.order_by("-id").values_list("id", flat=True))
+
+    def walk(self, per_page, descending=True):
+        ids, cursor = [], None
+        while True:
+            page = cursor_paginate(Course.objects.all(), cursor, per_page, descending)
+            ids += [c.pk for c in page]
+            if not page.has_next:
+                return ids
+            cursor = page.next_cursor
+
+    def test_equal_created_at_pages_by_pk(self):
+        Course.objects.update(created_at=timezone.now())
+        self.assertEqual(self.walk(2), self.ids)
+        self.assertEqual(self.walk(3, descending=False), self.ids[::-1])
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        valid = encode_position(timezone.now(), 1)
+        raw = ["not-a-cursor", "2026-13-99|1", "2026-01-01T00:00:00+00:00|1 OR 1=1"]
+        tokens = ["!!!", "//79", valid[:-4]] + [base64.urlsafe_b64encode(r.encode()).decode() for r in raw]
+        for token in tokens:
+            with self.subTest(token=token):
+                self.assertIsNone(decode_cursor(token))
+                self.assertTrue(cursor_paginate(Course.objects.all(), token, 2).is_first)
+                response = self.client.get(reverse("trainmydog:course_feed"), {"cursor": token})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["count"], DEFAULT_PER_PAGE)
+
+    def test_feed_next_cursor_ends_on_last_page(self):
+        url = reverse("trainmydog:course_feed")
+        first = self.client.get(url).json()
+        self.assertEqual(first["count"], DEFAULT_PER_PAGE)
+        self.assertTrue(first["next_cursor"])
+
+        last = self.client.get(url, {"cursor": first["next_cursor"]}).json()
+        self.assertEqual(last["count"], 1)
+        self.assertIsNone(last["next_cursor"])
+        self.assertIn("คอร์ส 0", last["html"])
+
+
+# ===== ETag / แคชหน้า public (trainmydog/cache.py) =====
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "page-tests"}})
+class PublicPageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.trainer = make_trainer()
+        self.course, self.course_round = make_course(self.trainer)
+        self.other, _ = make_course(self.trainer)
+
+    def detail_url(self, course):
+        return reverse("trainmydog:course_detail", args=[course.pk])
+
+    def etag(self, url):
+        return self.client.get(url)["ETag"]
+
+    def test_warm_anonymous_hit_runs_no_queries(self):
+        urls = [
+            reverse("trainmydog:home"), self.detail_url(self.course),
+            reverse("api_v1:course_list"), reverse("api_v1:course_detail", args=[self.course.pk]),
+        ]
+        for url in urls:
+            etag = self.client.get(url)["ETag"]
+            with self.subTest(url=url), self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url)["X-Page-Cache"], "hit")
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_course_edit_expires_only_its_own_detail_page(self):
+        home = reverse("trainmydog:home")
+        etags = {url: self.etag(url) for url in (home, self.detail_url(self.course), self.detail_url(self.other))}
+
+        self.course.title = "ชื่อใหม่"
+        self.course.save()
+        other_url = self.detail_url(self.other)
+        self.assertEqual(self.client.get(other_url, HTTP_IF_NONE_MATCH=etags[other_url]).status_code, 304)
+        for url in (home, self.detail_url(self.course)):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "ชื่อใหม่")
+
+        # รอบเรียนเปลี่ยน = updated_at ของคอร์สเลื่อน
+        etag = self.etag(self.detail_url(self.course))
+        self.course_round.end_time = datetime.time(11)
+        self.course_round.save()
+        self.assertNotEqual(self.etag(self.detail_url(self.course)), etag)
+
+    def test_role_change_expires_public_pages(self):
+        self.assertEqual(self.client.get(self.detail_url(self.course)).status_code, 200)
+        profile = Profile.objects.get(user=self.trainer)
+        profile.role = Profile.Role.MEMBER
+        profile.save()
+        self.assertEqual(self.client.get(self.detail_url(self.course)).status_code, 404)
+        self.assertNotContains(self.client.get(reverse("trainmydog:home")), "คอร์สฝึกสุนัข")
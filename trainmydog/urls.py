@@ -6,12 +6,18 @@ from .views import (
     home_view,
     apply_trainer_view,
     course_detail_view,
+    course_feed,
+    course_search_view,
+    user_fragment,
     booking_create,
     booking_history,
     booking_detail,
     trainer_booking_list,
+    trainer_booking_export,
     trainer_booking_update_status,
     trainer_booking_delete,
+    calendar_feed,
+    calendar_reset,
 )
 
 app_name = 'trainmydog'
@@ -24,6 +30,15 @@ urlpatterns = [
     # สมัครเป็นครูฝึก
     path('trainer/apply/', apply_trainer_view, name='apply_trainer'),
 
+    # feed การ์ดคอร์ส (JSON, infinite scroll หน้าแรก)
+    path('courses/feed/', course_feed, name='course_feed'),
+
+    # ค้นหาคอร์ส
+    path('search/', course_search_view, name='course_search'),
+
+    # navbar/messages ของผู้ใช้ สำหรับหน้าที่แคชได้ (hole-punch)
+    path('fragments/user/', user_fragment, name='user_fragment'),
+
     # รายละเอียดคอร์ส
     path('courses/<int:pk>/', course_detail_view, name='course_detail'),
 
@@ -36,6 +51,7 @@ urlpatterns = [
 
     # จัดการคำขอจองของครูฝึก
     path('trainer/bookings/', trainer_booking_list, name='trainer_booking_list'),
+    path('trainer/bookings/export/', trainer_booking_export, name='trainer_booking_export'),
     path(
         'trainer/bookings/<int:pk>/update/',
         trainer_booking_update_status,
@@ -46,4 +62,9 @@ urlpatterns = [
         trainer_booking_delete,
         name='trainer_booking_delete'
     ),
+
+    # ปฏิทิน .ics (token ใน URL แทนการล็อกอิน)
+    path('calendar/trainer/<str:token>.ics', calendar_feed, {'kind': 'trainer'}, name='trainer_calendar'),
+    path('calendar/member/<str:token>.ics', calendar_feed, {'kind': 'member'}, name='member_calendar'),
+    path('calendar/reset/', calendar_reset, name='calendar_reset'),
 ]
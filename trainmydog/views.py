@@ -1,60 +1,176 @@
 # trainmydog/views.py
+import hashlib
 
-from django.contrib.auth.decorators import login_required, user_passes_test
-from django.views.decorators.http import require_POST
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import condition, require_POST, require_GET
+from django.views.decorators.cache import never_cache
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib import messages
-
-from course.models import Course          # โมเดลคอร์ส (app: course)
-from base.models import Profile           # Profile ใช้ role = TRAINER
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
+
+from course.models import Course, CourseRound  # โมเดลคอร์ส (app: course)
+from course.forms import NearbyFilterForm, ScheduleFilterForm
+from course.geo import anearby_page
+from course.search import search_course_ids
+from base.models import Profile, new_calendar_key  # Profile ใช้ role = TRAINER
+from base.auth import get_user_role, role_required
 
 from .models import TrainerApplication, TrainerCertificate, Booking
-from .forms import TrainerApplicationForm, BookingForm, TrainerBookingActionForm
+from .forms import TrainerApplicationForm, BookingForm, TrainerBookingActionForm, BookingExportForm, BookingFilterForm
+from .ical import feed_state, feed_token, render_feed, user_id_from_token
+from .exports import EXPORT_HEADERS, format_round, iter_export_rows, stream_csv, stream_xlsx
+from .pagination import apaginate_request, paginate_request
+from .cache import anonymous_page_cache, public_page_condition
+from .capacity import RoundFull, create_booking, change_booking_status, delete_booking
+from .counters import trainer_pending_count
+from .jobs import enqueue
+from .tasks import notify_new_trainer_application
 
 
 def trainer_required(view_func):
     """
     decorator สำหรับ view ที่อนุญาตเฉพาะผู้ใช้ role = TRAINER
+    (role อ่านจาก Profile ที่โหลดมากับผู้ใช้ ดู base/auth.py)
     """
-    return login_required(
-        user_passes_test(
-            lambda u: hasattr(u, "profile") and u.profile.role == Profile.Role.TRAINER,
-            login_url="Authen:login"
-        )(view_func)
-    )
+    return role_required(Profile.Role.TRAINER, login_url="Authen:login")(view_func)
+
 
+def published_courses():
+    """คอร์สที่ 'เผยแพร่แล้ว' จากครูฝึก (ใช้ร่วมกันระหว่างหน้าแรกและ feed)"""
+    return Course.objects.public().select_related('trainer', 'trainer__profile')
 
-def home_view(request):
+
+@public_page_condition
+@anonymous_page_cache
+async def home_view(request):
     """
     หน้าแรก (Landing/Home)
-    แสดง Hero + รายการคอร์สที่ 'เผยแพร่แล้ว' จากครูฝึก
+    แสดง Hero + รายการคอร์สที่ 'เผยแพร่แล้ว' จากครูฝึก (หน้าแรกของ cursor)
+    async: ใต้ ASGI ระหว่างรอฐานข้อมูล event loop รับ request อื่นต่อได้
     """
-    courses = (
-        Course.objects
-        .filter(
-            is_published=True,
-            trainer__profile__role=Profile.Role.TRAINER
-        )
-        .select_related('trainer', 'trainer__profile')
-        .order_by('-created_at')
-    )
+    page, schedule_form, nearby_form = await _filtered_course_page(request)
+
+    return render(request, 'home.html', {
+        'courses': page,
+        'page': page,
+        'schedule_form': schedule_form,
+        'nearby_form': nearby_form,
+        'nearby': nearby_form.origin,
+        'filter_query': _filter_query(request),
+        'cache_shell': True,
+    })
+
+
+async def _filtered_course_page(request):
+    """
+    หนึ่งหน้าของคอร์สตามตัวกรองของหน้าแรก (ใช้ร่วมกับ course_feed)
+    มีจุดค้น "ใกล้" -> เรียงตามระยะภายในรัศมี (course/geo.py) ไม่มี -> ใหม่สุดก่อน
+    """
+    schedule_form = ScheduleFilterForm(request.GET)
+    schedule_form.is_valid()
+    nearby_form = NearbyFilterForm(request.GET)
+    nearby_form.is_valid()
+    courses = schedule_form.filter_courses(published_courses())
+    origin = nearby_form.origin
+    if origin:
+        page = await anearby_page(courses, origin[0], origin[1], nearby_form.radius_km, request.GET.get("cursor"))
+    else:
+        page = await apaginate_request(request, courses)
+    return page, schedule_form, nearby_form
+
+
+def _filter_query(request):
+    """query string ของตัวกรองปัจจุบัน (ไม่รวม cursor) ลงท้ายด้วย & สำหรับต่อ cursor="""
+    params = request.GET.copy()
+    params.pop("cursor", None)
+    return params.urlencode() + "&" if params else ""
 
-    return render(request, 'home.html', {'courses': courses})
+
+@require_GET
+@anonymous_page_cache
+async def course_feed(request):
+    """
+    JSON สำหรับ infinite scroll ของหน้าแรก: ?cursor=<token> (+ ตัวกรองวัน/เวลา/ใกล้ฉัน เดียวกับหน้าแรก)
+    ส่งการ์ดคอร์สเป็น HTML ที่ render จาก partial เดียวกับหน้าแรก
+    """
+    page, _, nearby_form = await _filtered_course_page(request)
+    html = render_to_string('partials/course_card_list.html', {
+        'courses': page,
+        'nearby': nearby_form.origin,
+    }, request=request)
+    return JsonResponse({
+        'html': html,
+        'count': len(page),
+        'next_cursor': page.next_cursor,
+    })
 
 
-def course_detail_view(request, pk):
+def course_search_view(request):
+    """
+    ค้นหาคอร์สจากชื่อ/รายละเอียด/สถานที่/สิ่งที่ได้รับ (?q=)
+    ใช้ดัชนีค้นหาของเรา (course/search.py) เรียงตามคะแนน BM25
+    """
+    q = (request.GET.get('q') or '').strip()
+    courses = []
+    if q:
+        ids = search_course_ids(q)
+        by_id = published_courses().in_bulk(ids)
+        courses = [by_id[i] for i in ids if i in by_id]
+
+    return render(request, 'search_results.html', {
+        'q': q,
+        'courses': courses,
+    })
+
+
+@public_page_condition(course_kwarg="pk")
+@anonymous_page_cache(course_kwarg="pk")
+async def course_detail_view(request, pk):
     """
     ดูรายละเอียดคอร์ส (หน้า public สำหรับผู้ใช้ทั่วไป)
     """
-    course = get_object_or_404(
-        Course.objects.select_related('trainer', 'trainer__profile'),
-        pk=pk,
-        is_published=True,
-        trainer__profile__role=Profile.Role.TRAINER,
-    )
+    try:
+        course = await published_courses().aget(pk=pk)
+    except Course.DoesNotExist:
+        raise Http404("ไม่พบคอร์ส")
+    await course.aload_round_list()
 
     return render(request, 'course_detail.html', {
         'course': course,
+        'cache_shell': True,
+    })
+
+
+@never_cache
+@require_GET
+def user_fragment(request):
+    """
+    ส่วนของหน้าที่ขึ้นกับผู้ใช้ (navbar + messages) สำหรับหน้าที่แคชได้
+    base.html จะ fetch มาแทนที่เมนูแบบผู้เข้าชมหลังโหลดหน้า
+    """
+    user = request.user
+    role = get_user_role(request)
+
+    nav_active = request.GET.get('active', '')
+    navbar = ''
+    if user.is_authenticated:
+        navbar = render_to_string('partials/navbar.html', {
+            'nav_user': user,
+            'nav_active': nav_active,
+        }, request=request)
+
+    return JsonResponse({
+        'authenticated': user.is_authenticated,
+        'role': role,
+        'navbar': navbar,
+        'messages': render_to_string('partials/flash_messages.html', request=request).strip(),
     })
 
 
@@ -88,6 +204,9 @@ def apply_trainer_view(request):
             if cert_file:
                 TrainerCertificate.objects.create(application=app, file=cert_file)
 
+            # แจ้งแอดมินนอก request (worker: manage.py run_workers)
+            enqueue(notify_new_trainer_application, application_id=app.pk)
+
             messages.success(request, "ส่งคำขอเรียบร้อย รอแอดมินตรวจสอบ")
             return redirect('trainmydog:home')
         else:
@@ -131,19 +250,52 @@ def booking_create(request, course_pk):
             bk = form.save(commit=False)
             bk.user = request.user
             bk.course = course
-            bk.save()
-            messages.success(request, "ส่งคำขอจองเรียบร้อย รอครูฝึกอนุมัติ")
-            return redirect("trainmydog:booking_history")
+            try:
+                create_booking(bk)
+            except RoundFull as full:
+                if full.remaining:
+                    form.add_error("round", f"รอบนี้เหลือที่ว่างอีก {full.remaining} ตัว กรุณาลดจำนวนสุนัขหรือเลือกรอบอื่น")
+                else:
+                    form.add_error("round", "รอบนี้เต็มแล้ว กรุณาเลือกรอบอื่น")
+            else:
+                messages.success(request, "ส่งคำขอจองเรียบร้อย รอครูฝึกอนุมัติ")
+                return redirect("trainmydog:booking_history")
     else:
         form = BookingForm(course=course)
 
     return render(request, "booking_form.html", {
         "course": course,
         "form": form,
+        "rounds": course.round_list(),
     })
 
 
+def _booking_history_etag(request):
+    """
+    ETag ของหน้าประวัติการจอง: การจองของผู้ใช้ (จำนวน + updated_at ล่าสุดของการจองและของคอร์สที่จอง
+    ใน query เดียว คอร์ส/รอบเรียนเปลี่ยนแล้วทุก worker เห็นทันที) + ส่วนของ navbar (ชื่อ, role, avatar, CSRF)
+    """
+    user = request.user
+    state = Booking.objects.filter(user=user).aggregate(
+        n=Count("id"), last=Max("updated_at"), course_last=Max("course__updated_at"),
+    )
+    profile = getattr(user, "profile", None)
+    role = get_user_role(request)
+    parts = [
+        user.pk, state["n"], state["last"], state["course_last"], request.get_full_path(),
+        user.get_full_name(), user.username, role, timezone.localdate().year,
+        profile.avatar.name if profile and profile.avatar else "",
+        sorted((profile.avatar_variants or {}).items()) if profile else "",
+        profile.calendar_key if profile else "",  # ลิงก์ปฏิทินในหน้า
+        # token ในฟอร์ม logout ผูกกับ CSRF secret ซึ่งเปลี่ยนตอนล็อกอินใหม่
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+        trainer_pending_count(user) if role == Profile.Role.TRAINER else "",
+    ]
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
 @login_required
+@condition(etag_func=_booking_history_etag)
 def booking_history(request):
     """
     ประวัติการจองของสมาชิก (ดึงตาม user)
@@ -152,9 +304,36 @@ def booking_history(request):
         Booking.objects
         .filter(user=request.user)
         .select_related("course", "round", "course__trainer")
-        .order_by("-created_at")
     )
-    return render(request, "history_booking.html", {"bookings": qs})
+    page = paginate_request(request, qs)
+    return render(request, "history_booking.html", {
+        "bookings": page,
+        "page": page,
+        "calendar_url": _calendar_url(request, "member"),
+    })
+
+
+def _calendar_url(request, kind):
+    """URL เต็มของ feed .ics ของผู้ใช้ที่ล็อกอิน (ใส่ในแอปปฏิทินแบบ subscribe)"""
+    profile = getattr(request.user, "profile", None)
+    if profile is None:
+        return ""
+    token = feed_token(profile, kind)
+    return request.build_absolute_uri(reverse(f"trainmydog:{kind}_calendar", args=[token]))
+
+
+@login_required
+@require_POST
+def calendar_reset(request):
+    """สร้างลิงก์ปฏิทินใหม่ (ลิงก์เดิมทั้งของครูฝึกและสมาชิกใช้ไม่ได้ทันที เช่น เผลอแชร์ลิงก์ไป)"""
+    profile, _ = Profile.objects.get_or_create(user=request.user)
+    profile.calendar_key = new_calendar_key()
+    profile.save(update_fields=["calendar_key"])
+    messages.success(request, "สร้างลิงก์ปฏิทินใหม่แล้ว ลิงก์เดิมใช้ไม่ได้อีก")
+    next_url = request.POST.get("next")
+    if not url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+        next_url = None
+    return redirect(next_url or "trainmydog:booking_history")
 
 
 @login_required
@@ -170,39 +349,74 @@ def booking_detail(request, pk):
 # ====== ครูฝึกดูคำขอจองในคอร์สของตัวเอง ======
 @trainer_required
 def trainer_booking_list(request):
-    status = request.GET.get("status", "")
-    qs = (
+    form = BookingFilterForm(request.GET, **_trainer_filter_choices(request.user))
+    form.is_valid()  # ช่องที่ไม่ถูกต้องจะถูกข้าม ไม่ทำให้ทั้งหน้าพัง
+    qs = form.filter_queryset(
         Booking.objects
-        .filter(course__trainer=request.user)
+        .filter(trainer=request.user)
         .select_related("user", "course", "round")
-        .order_by("-created_at")
     )
 
-    if status in {
-        Booking.Status.PENDING,
-        Booking.Status.APPROVED,
-        Booking.Status.REJECTED,
-        Booking.Status.CANCELED
-    }:
-        qs = qs.filter(status=status)
+    pending_count = trainer_pending_count(request.user)
 
-    pending_count = Booking.objects.filter(
-        course__trainer=request.user,
-        status=Booking.Status.PENDING
-    ).count()
+    page = paginate_request(request, qs, descending=form.descending)
 
     return render(request, "trainer_booking_list.html", {
-        "bookings": qs,
-        "status": status,
+        "bookings": page,
+        "page": page,
+        "form": form,
+        "status": form.cleaned_data.get("status", ""),
         "pending_count": pending_count,
+        "filter_query": _filter_query(request),
+        "calendar_url": _calendar_url(request, "trainer"),
     })
 
 
+def _trainer_filter_choices(trainer):
+    """ตัวเลือกคอร์ส / รอบเรียนของครูฝึกสำหรับ BookingFilterForm"""
+    courses = Course.objects.filter(trainer=trainer).order_by("title").values_list("pk", "title")
+    rounds = [
+        (pk, f"{title} · {format_round(days, start, end)}")
+        for pk, title, days, start, end in (
+            CourseRound.objects
+            .filter(course__trainer=trainer)
+            .order_by("course__title", "start_time", "id")
+            .values_list("pk", "course__title", "days", "start_time", "end_time")
+        )
+    ]
+    return {"courses": courses, "rounds": rounds}
+
+
+# ====== ครูฝึกส่งออกรายการจอง (CSV / XLSX แบบ streaming) ======
+@require_GET
+@trainer_required
+def trainer_booking_export(request):
+    form = BookingExportForm(request.GET, **_trainer_filter_choices(request.user))
+    if not form.is_valid():
+        messages.error(request, "ตัวกรองสำหรับส่งออกไม่ถูกต้อง")
+        return redirect("trainmydog:trainer_booking_list")
+
+    data = form.cleaned_data
+    qs = form.filter_queryset(Booking.objects.filter(trainer=request.user))
+
+    rows = iter_export_rows(qs, descending=form.descending)
+    if data["format"] == "xlsx":
+        response = StreamingHttpResponse(
+            stream_xlsx(EXPORT_HEADERS, rows),
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+    else:
+        response = StreamingHttpResponse(stream_csv(EXPORT_HEADERS, rows), content_type="text/csv; charset=utf-8")
+    filename = f"bookings-{timezone.localdate():%Y%m%d}.{data['format']}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
 @require_POST
 @trainer_required
 def trainer_booking_update_status(request, pk):
     booking = get_object_or_404(
-        Booking,
+        Booking.objects.select_related("course", "round__course"),
         pk=pk,
         course__trainer=request.user
     )
@@ -217,8 +431,7 @@ def trainer_booking_update_status(request, pk):
         messages.error(request, "ค่าสถานะไม่ถูกต้อง")
         return redirect("trainmydog:trainer_booking_list")
 
-    booking.status = new_status
-    booking.save(update_fields=["status"])
+    change_booking_status(booking, new_status)
 
     if new_status == Booking.Status.APPROVED:
         messages.success(request, "อนุมัติการจองเรียบร้อย")
@@ -233,11 +446,47 @@ def trainer_booking_update_status(request, pk):
 @trainer_required
 def trainer_booking_delete(request, pk):
     booking = get_object_or_404(
-        Booking,
+        Booking.objects.select_related("course", "round__course"),
         pk=pk,
         course__trainer=request.user
     )
-    booking.delete()
+    delete_booking(booking)
     messages.success(request, "ลบรายการจองเรียบร้อยแล้ว")
     next_url = request.POST.get("next")
     return redirect(next_url or "trainmydog:trainer_booking_list")
+
+
+# ====== ปฏิทิน (.ics) ของครูฝึก / สมาชิก ======
+CALENDAR_NAMES = {"trainer": "ตารางสอน • Train My Dog", "member": "ตารางเรียน • Train My Dog"}
+
+
+def _calendar_state(request, kind, token):
+    """(user_id, etag, last_modified) คำนวณครั้งเดียวต่อ request (condition() เรียกสองครั้ง)"""
+    if not hasattr(request, "_calendar_state"):
+        user_id = user_id_from_token(token, kind)
+        if user_id is None:
+            request._calendar_state = (None, None, None)
+        else:
+            request._calendar_state = (user_id, *feed_state(user_id, kind))
+    return request._calendar_state
+
+
+@require_GET
+@condition(
+    etag_func=lambda request, kind, token: _calendar_state(request, kind, token)[1],
+    last_modified_func=lambda request, kind, token: _calendar_state(request, kind, token)[2],
+)
+def calendar_feed(request, kind, token):
+    """
+    feed .ics (ไม่ต้องล็อกอิน ใช้ token ใน URL)
+    ETag / Last-Modified ไม่เปลี่ยน -> 304 จาก condition() โดยไม่เข้ามาถึงตรงนี้
+    """
+    user_id = _calendar_state(request, kind, token)[0]
+    if user_id is None:
+        raise Http404("ไม่พบปฏิทิน")
+    response = HttpResponse(
+        render_feed(user_id, kind, CALENDAR_NAMES[kind], request.build_absolute_uri),
+        content_type="text/calendar; charset=utf-8",
+    )
+    patch_cache_control(response, private=True, max_age=300)
+    return response